@@ -0,0 +1,97 @@
+"""Benchmark the pre-brief clustering stage.
+
+Builds a day's worth of summaries in which some stories are covered by
+several outlets, then compares the daily brief prompt rendered from the
+plain summary list with the one rendered from clustered summaries, and
+times the clustering itself.
+
+Run with: uv run python benchmarks/bench_clustering.py
+"""
+
+import random
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+import poml  # type: ignore[import-untyped]
+
+from hnbrief.clients.openai import StoryCluster, StorySummary, prompt_fields
+from hnbrief.clustering import cluster_summaries
+
+STORIES = 35
+ROUNDS = 20
+TEMPLATE = Path(__file__).parent.parent / "src/hnbrief/prompts/daily_brief.poml"
+
+TOPICS = {
+    "ai": "language model training inference benchmark reasoning agents gpu",
+    "rust": "rust compiler borrow checker crate cargo release memory safety",
+    "security": "vulnerability exploit patch cve attackers breach disclosure",
+    "web": "browser javascript css framework rendering react frontend",
+    "hardware": "chip fabrication silicon transistor risc arm laptop battery",
+    "startups": "funding founders seed round valuation acquisition revenue",
+}
+
+
+def day_of_summaries(seed: int = 5) -> list[StorySummary]:
+    """Summaries for one day, with a few stories reported more than once."""
+    rng = random.Random(seed)
+    summaries: list[StorySummary] = []
+    while len(summaries) < STORIES:
+        topic, vocabulary = rng.choice(sorted(TOPICS.items()))
+        words = vocabulary.split()
+        # Topic words mixed with terms specific to this story
+        text = " ".join(
+            rng.choice(words) if rng.random() < 0.3 else f"term{rng.randrange(5000)}"
+            for _ in range(45)
+        )
+        title = f"{topic.title()} story {len(summaries)}: {' '.join(words[:3])}"
+        summaries.append(
+            StorySummary(title, f"https://example.com/{len(summaries)}", text)
+        )
+        # Roughly one story in five shows up again from another outlet
+        if rng.random() < 0.2 and len(summaries) < STORIES:
+            summaries.append(
+                StorySummary(
+                    f"Report: {title}",
+                    f"https://other.example.com/{len(summaries)}",
+                    text + " according to reports",
+                )
+            )
+    return summaries
+
+
+def prompt_size(clusters: list[StoryCluster]) -> int:
+    context: dict[str, Any] = {
+        "clusters": [asdict(c, dict_factory=prompt_fields) for c in clusters],
+        "current_date": "January 01, 2026",
+    }
+    params = poml.poml(str(TEMPLATE), format="openai_chat", context=context)
+    return sum(len(message["content"]) for message in params["messages"])
+
+
+def main() -> None:
+    summaries = day_of_summaries()
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        clusters = cluster_summaries(summaries)
+    elapsed = (time.perf_counter() - started) / ROUNDS
+
+    duplicates = sum(len(cluster.duplicate_urls) for cluster in clusters)
+    print(
+        f"Clustered {len(summaries)} summaries into {len(clusters)} groups, "
+        f"folding {duplicates} duplicates, in {elapsed * 1000:.1f} ms"
+    )
+
+    plain = prompt_size([StoryCluster(summaries=[s]) for s in summaries])
+    grouped = prompt_size(clusters)
+    print(f"brief prompt, unclustered  {plain:7d} chars")
+    print(
+        f"brief prompt, clustered    {grouped:7d} chars "
+        f"({100 * (plain - grouped) / plain:.0f}% smaller)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark decoding of HackerNews item JSON along the detail-fetch path.
+
+Compares the per-item path (json.loads + model_validate in the client, one
+converter TypeAdapter per activity result and a second model_validate in the
+workflow) with the batched path (model_validate_json in the client and one
+list TypeAdapter per batch of results in the workflow).
+
+Run with: uv run python benchmarks/bench_decode.py
+"""
+
+import json
+import random
+import time
+from typing import Callable
+
+from pydantic import TypeAdapter
+
+from hnbrief.clients.hackernews import HackerNewsStory
+from hnbrief.workflows.hackernews import DETAIL_BATCH_SIZE
+
+ITEMS = 10_000
+ROUNDS = 3
+
+
+def recorded_items(count: int, seed: int = 3) -> list[bytes]:
+    """Item blobs shaped like real HN API story responses."""
+    rng = random.Random(seed)
+    blobs = []
+    for item_id in range(count):
+        item = {
+            "by": f"user{rng.randrange(5000)}",
+            "descendants": rng.randrange(400),
+            "id": 40_000_000 + item_id,
+            "kids": [rng.randrange(40_000_000, 41_000_000) for _ in range(30)],
+            "score": rng.randrange(1, 1500),
+            "time": 1_700_000_000 + item_id,
+            "title": f"Show HN: A project about topic number {item_id}",
+            "type": "story",
+            "url": f"https://example.com/posts/{item_id}",
+        }
+        blobs.append(json.dumps(item).encode())
+    return blobs
+
+
+def per_item(blobs: list[bytes]) -> None:
+    stories = [HackerNewsStory.model_validate(json.loads(blob)) for blob in blobs]
+    payloads = [story.model_dump_json().encode() for story in stories]
+    decoded = [TypeAdapter(HackerNewsStory).validate_json(p) for p in payloads]
+    [HackerNewsStory.model_validate(story) for story in decoded]
+
+
+def batched(blobs: list[bytes]) -> None:
+    stories = [HackerNewsStory.model_validate_json(blob) for blob in blobs]
+    adapter = TypeAdapter(list[HackerNewsStory])
+    for start in range(0, len(stories), DETAIL_BATCH_SIZE):
+        payload = adapter.dump_json(stories[start : start + DETAIL_BATCH_SIZE])
+        TypeAdapter(list[HackerNewsStory]).validate_json(payload)
+
+
+def best_of(fn: Callable[[list[bytes]], None], blobs: list[bytes]) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        fn(blobs)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    blobs = recorded_items(ITEMS)
+    print(f"Decoding {ITEMS} item blobs (best of {ROUNDS})")
+    baseline = best_of(per_item, blobs)
+    print(f"per-item  {baseline * 1000:8.1f} ms")
+    fast = best_of(batched, blobs)
+    print(f"batched   {fast * 1000:8.1f} ms  ({baseline / fast:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
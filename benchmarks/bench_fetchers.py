@@ -0,0 +1,151 @@
+"""Benchmark article coverage and latency for each fetcher chain.
+
+Serves a day of story URLs from a local fixture server: ordinary pages,
+PDFs, sites that block the scraper and sites that stall, plus an archive
+mirror holding copies of the blocked and stalled pages. Each chain fetches
+every story once, and the share of stories with text and the latency per
+strategy are reported.
+
+Run with: uv run --extra pdf python benchmarks/bench_fetchers.py
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hnbrief.clients.fetchers import (
+    ArchiveFetcher,
+    ArticleTimeouts,
+    DirectFetcher,
+    Fetcher,
+    PdfFetcher,
+)
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+
+STORIES = 60
+# Share of each kind of story URL in the fixture day
+KINDS = {"page": 0.6, "pdf": 0.15, "blocked": 0.15, "stalled": 0.1}
+PAGE = "<h1>Story</h1>" + "<p>Paragraph of article text.</p>" * 200
+
+
+def make_pdf(text: str) -> bytes:
+    """Smallest single-page PDF showing `text`."""
+    stream = f"BT /F1 18 Tf 20 100 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 144] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    out += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(out)
+
+
+async def fixture_server() -> TestServer:
+    pdf = make_pdf("Paper text")
+
+    async def handle(request: web.Request) -> web.Response:
+        # Every request takes a little while, like a real site
+        await asyncio.sleep(0.02)
+        path = request.path
+        if path.startswith("/mirror/"):
+            return web.Response(text=PAGE, content_type="text/html")
+        if path.startswith("/pdf/"):
+            return web.Response(body=pdf, content_type="application/pdf")
+        if path.startswith("/blocked/"):
+            return web.Response(status=403)
+        if path.startswith("/stalled/"):
+            await asyncio.sleep(5)
+        return web.Response(text=PAGE, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def fixture_stories(server: TestServer, seed: int = 7) -> list[HackerNewsStory]:
+    rng = random.Random(seed)
+    kinds = rng.choices(list(KINDS), weights=list(KINDS.values()), k=STORIES)
+    return [
+        HackerNewsStory(
+            id=index,
+            type="story",
+            title=f"Story {index}",
+            url=str(server.make_url(f"/{kind}/{index}")),
+            by="bench",
+            time=0,
+        )
+        for index, kind in enumerate(kinds)
+    ]
+
+
+async def run_chain(
+    name: str, fetchers: list[Fetcher], stories: list[HackerNewsStory]
+) -> None:
+    # Every fixture story shares one host; keep its circuit from opening
+    client = HackerNewsClient(
+        article_timeouts=ArticleTimeouts(read=1.0, total=3.0), fetchers=fetchers
+    )
+    client.breakers.failure_threshold = STORIES + 1
+    started = time.perf_counter()
+    try:
+        contents = await asyncio.gather(
+            *(client.get_story_content(story) for story in stories)
+        )
+    finally:
+        await client.close()
+    elapsed = time.perf_counter() - started
+
+    covered = sum(1 for content in contents if content.strategy)
+    print(
+        f"{name:<22} coverage {covered:3d}/{len(stories)} "
+        f"({100 * covered / len(stories):3.0f}%)  wall {elapsed:5.2f}s"
+    )
+    for strategy, stats in client.fetch_stats.items():
+        mean = stats.seconds / stats.attempts if stats.attempts else 0.0
+        print(
+            f"    {strategy:<8} {stats.successes:3d}/{stats.attempts:<3d} ok  "
+            f"mean {mean * 1000:6.0f} ms  {stats.size_bytes / 1024:7.0f} KiB"
+        )
+
+
+async def main() -> None:
+    # Per-story failure logs would drown out the report
+    logging.disable(logging.ERROR)
+    server = await fixture_server()
+    stories = fixture_stories(server)
+    mirror = str(server.make_url("/mirror/")) + "{url}"
+    try:
+        await run_chain("direct", [DirectFetcher(timeout=1.0)], stories)
+        await run_chain(
+            "direct + pdf", [DirectFetcher(timeout=1.0), PdfFetcher()], stories
+        )
+        await run_chain(
+            "direct + pdf + archive",
+            [DirectFetcher(timeout=1.0), PdfFetcher(), ArchiveFetcher(mirror)],
+            stories,
+        )
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Benchmark summarize_story tail latency with and without hedged requests.
+
+Simulates an OpenAI-compatible endpoint with a heavy-tailed latency
+distribution and fires concurrent summary requests through OpenAIClient,
+with its connection pool sized as the worker sizes it by default. Latency
+is measured from the call, so it includes any wait for a free connection.
+
+Run with: uv run python benchmarks/bench_hedging.py
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from typing import Any
+from unittest import mock
+
+from hnbrief.clients.openai import OpenAIClient
+from hnbrief.config import OpenAIConfig, WorkerConfig
+from hnbrief.worker import openai_connections
+
+REQUESTS = 500
+# Simulated seconds are scaled down so the benchmark finishes quickly
+SCALE = 0.05
+
+
+def simulated_latency(rng: random.Random) -> float:
+    """Mostly fast responses with a slow tail, as seen from shared providers."""
+    roll = rng.random()
+    if roll < 0.90:
+        return rng.uniform(2, 6)
+    if roll < 0.98:
+        return rng.uniform(8, 15)
+    return rng.uniform(30, 55)
+
+
+async def run(fallback_models: list[str], seed: int = 7) -> list[float]:
+    config = OpenAIConfig.model_validate(
+        {
+            "OPENROUTER_API_KEY": "benchmark",
+            "FALLBACK_MODELS": fallback_models,
+            "SUMMARIZE_ATTEMPT_TIMEOUT": 59 * SCALE,
+            "HEDGE_DELAY": 8 * SCALE,
+        }
+    )
+    client = OpenAIClient(
+        "http://localhost:1",
+        "benchmark",
+        config=config,
+        max_connections=openai_connections(WorkerConfig.model_validate({}), config),
+    )
+    rng = random.Random(seed)
+
+    async def create(**kwargs: Any) -> mock.Mock:
+        await asyncio.sleep(simulated_latency(rng) * SCALE)
+        response = mock.Mock()
+        response.choices = [mock.Mock()]
+        response.choices[0].message.content = f"summary from {kwargs['model']}"
+        return response
+
+    async def timed(index: int) -> float:
+        started = time.monotonic()
+        await client.summarize_story(f"Story {index}", None, "# Content")
+        return (time.monotonic() - started) / SCALE
+
+    with (
+        mock.patch("hnbrief.clients.openai.poml.poml", return_value={"messages": []}),
+        mock.patch.object(client.client.chat.completions, "create", create),
+    ):
+        # Warm the latency tracker so hedging follows the observed percentile
+        await asyncio.gather(*(timed(index) for index in range(50)))
+        return await asyncio.gather(*(timed(index) for index in range(REQUESTS)))
+
+
+def report(label: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<10} p50={quantiles[49]:6.2f}s  p90={quantiles[89]:6.2f}s  "
+        f"p99={quantiles[98]:6.2f}s  max={max(latencies):6.2f}s"
+    )
+
+
+async def main() -> None:
+    print(f"{REQUESTS} concurrent summaries (simulated seconds)")
+    report("baseline", await run(fallback_models=[]))
+    report("hedged", await run(fallback_models=["backup-model"]))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Benchmark summarize_story throughput against the HTTP connection pool.
+
+Serves a fake OpenAI-compatible chat completions endpoint from a local
+server with a fixed response delay, and sends waves of 500 concurrent
+summaries through OpenAIClient with different pools. Reports latency per
+wave and how many connections the server saw opened, since every new
+connection costs a TCP (and, against a real API, TLS) handshake.
+
+Run with: uv run python benchmarks/bench_openai_pool.py
+"""
+
+import asyncio
+import multiprocessing
+import statistics
+import time
+from typing import Optional
+from unittest import mock
+
+import aiohttp
+from aiohttp import web
+from openai import AsyncOpenAI
+
+from hnbrief.clients.openai import OpenAIClient
+from hnbrief.config import OpenAIConfig
+
+REQUESTS = 500
+PORT = 8765
+WAVES = 3
+# Seconds the fake API takes to answer
+RESPONSE_DELAY = 0.05
+POOL_SIZES = (25, 50, 100)
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "bench",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "A summary."},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+}
+
+
+def serve_fake_api(port: int) -> None:
+    """Run the fake API in its own process, so it does not share the loop."""
+    connections: set[int] = set()
+
+    async def complete(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        await request.read()
+        await asyncio.sleep(RESPONSE_DELAY)
+        return web.json_response(COMPLETION)
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({"connections": len(connections)})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", complete)
+    app.router.add_get("/stats", stats)
+    # A deep accept backlog, so a burst of new connections is not dropped
+    web.run_app(app, port=port, backlog=2048, print=None)
+
+
+async def opened_connections(base_url: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(base_url.replace("/v1", "/stats")) as response:
+            return int((await response.json())["connections"])
+
+
+async def run(name: str, base_url: str, max_connections: Optional[int]) -> None:
+    config = OpenAIConfig.model_validate(
+        {"OPENROUTER_API_KEY": "benchmark", "HEDGE_DELAY": 30}
+    )
+    client = OpenAIClient(base_url, "benchmark", config, max_connections)
+    if max_connections is None:
+        # The SDK's own client: up to 1000 connections, 100 kept alive
+        client.client = AsyncOpenAI(base_url=base_url, api_key="benchmark")
+
+    async def timed(index: int) -> float:
+        started = time.perf_counter()
+        await client.summarize_story(f"Story {index}", None, "# Content")
+        return time.perf_counter() - started
+
+    with mock.patch("hnbrief.clients.openai.poml.poml", return_value={"messages": []}):
+        try:
+            for wave in range(1, WAVES + 1):
+                opened = await opened_connections(base_url)
+                started = time.perf_counter()
+                latencies = sorted(
+                    await asyncio.gather(*(timed(index) for index in range(REQUESTS)))
+                )
+                elapsed = time.perf_counter() - started
+                p50 = statistics.median(latencies)
+                p99 = latencies[int(0.99 * len(latencies)) - 1]
+                print(
+                    f"{name:<24} wave {wave}  wall {elapsed:5.2f}s  "
+                    f"p50 {p50 * 1000:5.0f} ms  p99 {p99 * 1000:5.0f} ms  "
+                    f"new connections {await opened_connections(base_url) - opened:4d}"
+                )
+        finally:
+            await client.close()
+            if max_connections is None:
+                await client.client.close()
+
+
+async def main() -> None:
+    server = multiprocessing.Process(target=serve_fake_api, args=(PORT,), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{PORT}/v1"
+    try:
+        # Wait for the server to accept connections
+        for _ in range(50):
+            try:
+                await opened_connections(base_url)
+                break
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.1)
+        await run("SDK default client", base_url, None)
+        for max_connections in POOL_SIZES:
+            await run(f"pool of {max_connections}", base_url, max_connections)
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Benchmark how soon a brief's top stories are summarized, with and without priorities.
+
+Runs HackerNewsDailyBrief over 500 synthetic stories on a local Temporal
+dev server, with the worker's dedicated fetch and summary task queues
+capped by ACTIVITY_LIMITS and stand-ins for the article fetch and the LLM
+call. Articles take a heavy-tailed time to fetch, so summaries reach the
+LLM cap in fetch order rather than rank order. Reports the time until the
+top 10 stories are summarized and until all of them are, first with every
+story at the default priority and then with the priority bands the brief
+workflow assigns by rank.
+
+Run with: uv run python benchmarks/bench_priority.py
+The first run downloads the Temporal dev server.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from contextlib import AsyncExitStack
+
+from temporalio import activity
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.testing import WorkflowEnvironment
+
+from hnbrief.clients.fetchers import StoryContent
+from hnbrief.clients.hackernews import HackerNewsStory
+from hnbrief.clients.openai import DailyBrief, StorySummary
+from hnbrief.config import WorkerConfig
+from hnbrief.worker import create_workers
+from hnbrief.workflows.hackernews import (
+    BriefOptions,
+    HackerNewsDailyBrief,
+    HackerNewsStoryBatch,
+)
+
+STORIES = 500
+TOP = 10
+TASK_QUEUE = "bench-priority"
+LIMITS = {"get_story_content": 32, "summarize_story": 8}
+# Seconds per summary, and the median and spread of article fetch times
+SUMMARY_SECONDS = 0.05
+FETCH_MEDIAN = 0.05
+FETCH_SIGMA = 1.2
+
+# Seconds after the run started that each story's summary finished, by ID
+finished: dict[int, float] = {}
+started = 0.0
+
+
+@activity.defn(name="get_list_of_stories")
+async def get_list_of_stories() -> list[int]:
+    return list(range(1, STORIES + 1))
+
+
+@activity.defn(name="get_story_details")
+async def get_story_details(ids: list[int]) -> list[HackerNewsStory]:
+    # Scores fall with the ID, so story N is ranked N-1
+    return [
+        HackerNewsStory(
+            id=story_id,
+            type="story",
+            title=f"Story {story_id}",
+            url=f"https://example.com/{story_id}",
+            by="bench",
+            time=int(time.time()),
+            score=STORIES - story_id + 1,
+        )
+        for story_id in ids
+    ]
+
+
+@activity.defn(name="get_story_content")
+async def get_story_content(story: HackerNewsStory) -> StoryContent:
+    seconds = random.Random(story.id).lognormvariate(0, FETCH_SIGMA) * FETCH_MEDIAN
+    await asyncio.sleep(seconds)
+    return StoryContent("Article text.", "direct", 13, seconds)
+
+
+@activity.defn(name="get_story_comments")
+async def get_story_comments(story: HackerNewsStory) -> list[str]:
+    return []
+
+
+@activity.defn(name="summarize_story")
+async def summarize_story(story: HackerNewsStory, markdown: str) -> StorySummary:
+    await asyncio.sleep(SUMMARY_SECONDS)
+    finished[story.id] = time.perf_counter() - started
+    return StorySummary(story.title, story.url, "Summary.")
+
+
+@activity.defn(name="create_daily_brief")
+async def create_daily_brief(summaries: list[StorySummary]) -> DailyBrief:
+    return DailyBrief(f"Brief of {len(summaries)} stories")
+
+
+async def main() -> None:
+    global started
+    worker_config = WorkerConfig.model_validate(
+        {"WORKER_MAX_CONCURRENT_ACTIVITIES": 200, "ACTIVITY_LIMITS": LIMITS}
+    )
+    # Task queue priorities need the server's newer matcher
+    async with await WorkflowEnvironment.start_local(
+        data_converter=pydantic_data_converter,
+        dev_server_extra_args=[
+            "--dynamic-config-value",
+            "matching.useNewMatcher=true",
+        ],
+    ) as env:
+        workers = create_workers(
+            env.client,
+            TASK_QUEUE,
+            worker_config,
+            workflows=[HackerNewsDailyBrief, HackerNewsStoryBatch],
+            activities=[get_list_of_stories, get_story_details, create_daily_brief],
+            dedicated={
+                "get_story_content": get_story_content,
+                "get_story_comments": get_story_comments,
+                "summarize_story": summarize_story,
+            },
+        )
+        async with AsyncExitStack() as stack:
+            for worker in workers:
+                await stack.enter_async_context(worker)
+            for name, levels in (("default priority", 1), ("priority bands", 5)):
+                finished.clear()
+                options = BriefOptions(
+                    overfetch_factor=1.0,
+                    cluster_stories=False,
+                    priority_levels=levels,
+                )
+                started = time.perf_counter()
+                await env.client.execute_workflow(
+                    HackerNewsDailyBrief.run,
+                    args=[STORIES, options],
+                    id=f"bench-priority-{uuid.uuid4().hex}",
+                    task_queue=TASK_QUEUE,
+                )
+                top = max(finished[story_id] for story_id in range(1, TOP + 1))
+                print(
+                    f"{name:<18} top {TOP} done after {top:5.2f}s  "
+                    f"all {STORIES} after {max(finished.values()):5.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Benchmark event loop stalls from POML prompt rendering.
+
+Renders a burst of story summary prompts the way summarize_story used to,
+calling poml.poml inline from each coroutine, and through PromptRenderer
+with a few pool sizes. A ticker on the same loop measures the longest
+stall, which is how long every HTTP request in flight was held up.
+
+Run with: uv run python benchmarks/bench_prompts.py
+"""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import poml  # type: ignore[import-untyped]
+
+from hnbrief.clients.openai import PromptRenderer
+
+PROMPTS_DIR = Path(__file__).parent.parent / "src/hnbrief/prompts"
+RENDERS = 8
+MARKDOWN = "Paragraph of article text. " * 2000
+
+
+def context(index: int) -> dict[str, Any]:
+    return {
+        "title": f"Story {index}",
+        "markdown": MARKDOWN,
+        "comments": [f"Comment {n}" for n in range(20)],
+    }
+
+
+async def inline(index: int) -> dict[str, Any]:
+    params: dict[str, Any] = poml.poml(
+        str(PROMPTS_DIR / "story_summary.poml"),
+        format="openai_chat",
+        context=context(index),
+    )
+    return params
+
+
+async def measure(
+    name: str, render: Callable[[int], Awaitable[dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    longest_stall = 0.0
+
+    async def tick() -> None:
+        nonlocal longest_stall
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            longest_stall = max(longest_stall, time.perf_counter() - started)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(render(index) for index in range(RENDERS)))
+    elapsed = time.perf_counter() - started
+    # Let the ticker see the last stall before stopping it
+    await asyncio.sleep(0.01)
+    ticker.cancel()
+    print(
+        f"{name:<14} {RENDERS} renders  wall {elapsed:5.2f}s  "
+        f"longest loop stall {longest_stall * 1000:6.0f} ms"
+    )
+    return results
+
+
+async def main() -> None:
+    expected = await measure("inline", inline)
+    for workers in (1, 4):
+        renderer = PromptRenderer(PROMPTS_DIR, workers)
+        try:
+            results = await measure(
+                f"pool of {workers}",
+                lambda index: renderer.render("story_summary", lambda: context(index)),
+            )
+        finally:
+            renderer.close()
+        assert results == expected, "threaded renders differ from inline renders"
+        stats = renderer.stats["story_summary"]
+        print(
+            f"{'':<14} mean render {stats.seconds / stats.renders:5.2f}s  "
+            f"max {stats.max_seconds:5.2f}s  "
+            f"mean wait {stats.wait_seconds / stats.renders:5.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""Benchmark replaying a 500-story daily brief history, batched and unbatched.
+
+A worker that dies mid-run rebuilds the brief workflow by replaying its
+history, so replay time and memory grow with the number of events in it.
+This records two runs of HackerNewsDailyBrief over 500 synthetic stories on
+a local Temporal dev server, one summarizing every story in the workflow
+and one using story batch child workflows, with instant stand-ins for the
+activities. Each recorded history is then replayed and its size, replay
+time and peak Python memory are reported.
+
+Run with: uv run python benchmarks/bench_replay.py
+The first run downloads the Temporal dev server. Histories are written to
+--out, and `--replay PATH ...` replays saved histories without a server.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from temporalio import activity
+from temporalio.client import WorkflowHistory
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Replayer
+
+from hnbrief.clients.fetchers import StoryContent
+from hnbrief.clients.hackernews import HackerNewsStory
+from hnbrief.clients.openai import DailyBrief, StorySummary
+from hnbrief.config import WorkerConfig
+from hnbrief.worker import create_workers
+from hnbrief.workflows.hackernews import (
+    BriefOptions,
+    HackerNewsDailyBrief,
+    HackerNewsMultiBrief,
+    HackerNewsStoryBatch,
+)
+
+STORIES = 500
+BATCH_SIZE = 25
+TASK_QUEUE = "bench-replay"
+WORKFLOWS = [HackerNewsDailyBrief, HackerNewsMultiBrief, HackerNewsStoryBatch]
+# Article text of a typical story, so payload sizes are realistic
+ARTICLE = "Paragraph of article text. " * 400
+
+
+@activity.defn(name="get_list_of_stories")
+async def get_list_of_stories() -> list[int]:
+    return list(range(1, STORIES + 1))
+
+
+@activity.defn(name="get_story_details")
+async def get_story_details(ids: list[int]) -> list[HackerNewsStory]:
+    return [
+        HackerNewsStory(
+            id=story_id,
+            type="story",
+            title=f"Story {story_id}",
+            url=f"https://example.com/{story_id}",
+            by="bench",
+            time=int(time.time()),
+            score=STORIES - story_id,
+        )
+        for story_id in ids
+    ]
+
+
+@activity.defn(name="get_story_content")
+async def get_story_content(story: HackerNewsStory) -> StoryContent:
+    return StoryContent(ARTICLE, "direct", len(ARTICLE), 0.1)
+
+
+@activity.defn(name="get_story_comments")
+async def get_story_comments(story: HackerNewsStory) -> list[str]:
+    return []
+
+
+@activity.defn(name="summarize_story")
+async def summarize_story(story: HackerNewsStory, markdown: str) -> StorySummary:
+    return StorySummary(story.title, story.url, "Summary sentence. " * 20)
+
+
+@activity.defn(name="create_daily_brief")
+async def create_daily_brief(summaries: list[StorySummary]) -> DailyBrief:
+    return DailyBrief(f"Brief of {len(summaries)} stories")
+
+
+async def record(out: Path) -> list[Path]:
+    """Run one unbatched and one batched brief and save their histories."""
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    async with await WorkflowEnvironment.start_local(
+        data_converter=pydantic_data_converter
+    ) as env:
+        workers = create_workers(
+            env.client,
+            TASK_QUEUE,
+            WorkerConfig.model_validate({"WORKER_MAX_CONCURRENT_ACTIVITIES": 200}),
+            workflows=WORKFLOWS,
+            activities=[get_list_of_stories, get_story_details, create_daily_brief],
+            dedicated={
+                "get_story_content": get_story_content,
+                "get_story_comments": get_story_comments,
+                "summarize_story": summarize_story,
+            },
+        )
+        async with AsyncExitStack() as stack:
+            for worker in workers:
+                await stack.enter_async_context(worker)
+            for name, batch_size in (("unbatched", None), ("batched", BATCH_SIZE)):
+                options = BriefOptions(
+                    overfetch_factor=1.0,
+                    cluster_stories=False,
+                    inline_result_limit=64 * 1024 * 1024,
+                    story_batch_size=batch_size,
+                )
+                handle = await env.client.start_workflow(
+                    HackerNewsDailyBrief.run,
+                    args=[STORIES, options],
+                    id=f"bench-replay-{name}-{uuid.uuid4().hex}",
+                    task_queue=TASK_QUEUE,
+                )
+                await handle.result()
+                history = await handle.fetch_history()
+                path = out / f"{name}.json"
+                path.write_text(history.to_json(), encoding="utf-8")
+                paths.append(path)
+    return paths
+
+
+async def replay(path: Path) -> None:
+    """Replay a saved history, reporting its size, time and peak memory."""
+    content = path.read_text(encoding="utf-8")
+    events = len(json.loads(content)["events"])
+    history = WorkflowHistory.from_json(path.stem, content)
+    replayer = Replayer(workflows=WORKFLOWS, data_converter=pydantic_data_converter)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = await replayer.replay_workflow(history, raise_on_replay_failure=False)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    status = "ok" if result.replay_failure is None else "FAILED"
+    print(
+        f"{path.stem:<10} {events:6d} events  {len(content) / 1024:8.0f} KiB  "
+        f"replay {elapsed:6.2f}s  peak {peak / (1024 * 1024):6.1f} MiB  {status}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=Path("bench-histories"))
+    parser.add_argument("--replay", type=Path, nargs="+", help="Saved histories")
+    args = parser.parse_args()
+
+    paths = args.replay or await record(args.out)
+    for path in paths:
+        await replay(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+from dataclasses import replace
+from typing import TypeVar
+
+from temporalio import activity
+
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.clients.openai import DailyBrief, StoryCluster, StorySummary
+from hnbrief.workflows.hackernews import DailyBriefResult
+
+Text = TypeVar("Text", StorySummary, DailyBrief)
+
+
+def store_text(store: ArtifactStore, name: str, item: Text) -> Text:
+    """Move a summary's or brief's text to the store, keeping a reference."""
+    if not item.text:
+        return item
+    return replace(item, text="", artifact=store.save(name, item.text))
+
+
+def load_text(store: ArtifactStore, item: Text) -> Text:
+    """Bring back the text of a summary or brief moved to the store."""
+    if item.artifact is None:
+        return item
+    return replace(item, text=store.load(item.artifact), artifact=None)
+
+
+def load_cluster(store: ArtifactStore, cluster: StoryCluster) -> StoryCluster:
+    """Bring back the text of every summary in a cluster."""
+    summaries = [load_text(store, summary) for summary in cluster.summaries]
+    return replace(cluster, summaries=summaries)
+
+
+class ArtifactActivities:
+    """Activities for writing large results to the artifact store."""
+
+    def __init__(self, store: ArtifactStore):
+        self.store = store
+
+    @activity.defn
+    async def store_result(
+        self,
+        name: str,
+        result: DailyBriefResult,
+        brief: DailyBrief,
+        inline_limit: int,
+    ) -> DailyBriefResult:
+        """Fill in a result's stored texts, storing the whole if it is large.
+
+        Results up to `inline_limit` bytes of JSON are returned complete;
+        larger ones are written under `name` and returned as a reference.
+        """
+        full = result.model_copy(
+            update={
+                "brief": load_text(self.store, brief).text,
+                "summaries": [
+                    load_text(self.store, summary) for summary in result.summaries
+                ],
+            }
+        )
+        content = full.model_dump_json()
+        if len(content.encode("utf-8")) <= inline_limit:
+            return full
+        return result.model_copy(
+            update={
+                "brief": "",
+                "summaries": [],
+                "artifact": self.store.save(name, content),
+            }
+        )
@@ -0,0 +1,41 @@
+from dataclasses import replace
+from typing import Optional
+
+from temporalio import activity
+
+from hnbrief.activities.artifacts import load_text
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.clients.openai import StoryCluster, StorySummary
+from hnbrief.clustering import cluster_summaries
+
+
+class ClusteringActivities:
+    """Activities for grouping story summaries before the brief.
+
+    With a `store`, summaries stored by reference are read back for
+    clustering, and the clusters keep the references rather than the text.
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None):
+        self.store = store
+
+    @activity.defn
+    async def cluster_summaries(
+        self,
+        summaries: list[StorySummary],
+        cluster_threshold: float,
+        duplicate_threshold: float,
+    ) -> list[StoryCluster]:
+        """Group related summaries and fold near-duplicate stories together."""
+        if self.store is None:
+            return cluster_summaries(summaries, cluster_threshold, duplicate_threshold)
+        loaded = [load_text(self.store, summary) for summary in summaries]
+        stored = {id(text): summary for text, summary in zip(loaded, summaries)}
+        clusters = cluster_summaries(loaded, cluster_threshold, duplicate_threshold)
+        return [
+            replace(
+                cluster,
+                summaries=[stored[id(summary)] for summary in cluster.summaries],
+            )
+            for cluster in clusters
+        ]
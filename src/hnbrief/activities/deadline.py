@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Optional, TypeVar
+
+from temporalio import activity
+
+T = TypeVar("T")
+
+# Seconds an activity keeps back to return its own result before the server
+# times out the attempt
+DEADLINE_MARGIN = 1.0
+
+# Seconds between heartbeats of long activities; well under the heartbeat
+# timeout the workflow schedules them with
+HEARTBEAT_INTERVAL = 5.0
+
+
+def time_left() -> Optional[float]:
+    """Seconds the running activity attempt has left, or None if unbounded."""
+    info = activity.info()
+    deadlines = []
+    if info.start_to_close_timeout:
+        deadlines.append(info.started_time + info.start_to_close_timeout)
+    if info.schedule_to_close_timeout:
+        deadlines.append(info.scheduled_time + info.schedule_to_close_timeout)
+    if not deadlines:
+        return None
+    left = (min(deadlines) - datetime.now(timezone.utc)).total_seconds()
+    return max(left - DEADLINE_MARGIN, 0.0)
+
+
+async def heartbeating(work: Awaitable[T]) -> T:
+    """Await `work` while heartbeating.
+
+    Cancellation requested by the workflow only reaches an activity in the
+    response to a heartbeat, so without them a cancelled fetch or summary
+    would run on until it finished.
+    """
+
+    async def beat() -> None:
+        while True:
+            activity.heartbeat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    beater = asyncio.create_task(beat())
+    try:
+        return await work
+    finally:
+        beater.cancel()
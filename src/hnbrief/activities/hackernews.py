@@ -1,5 +1,7 @@
 from temporalio import activity
 
+from hnbrief.activities.deadline import heartbeating, time_left
+from hnbrief.clients.fetchers import StoryContent
 from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
 
 
@@ -19,7 +21,22 @@ class HackerNewsActivities:
         """Get detailed information for a specific story."""
         return await self.client.get_story_detail(story_id)
 
+    @activity.defn
+    async def get_story_details(self, story_ids: list[int]) -> list[HackerNewsStory]:
+        """Get detailed information for a batch of stories."""
+        return await self.client.get_story_details(story_ids)
+
     @activity.defn
     async def get_story_markdown(self, story: HackerNewsStory) -> str:
         """Fetch story content and convert to markdown."""
         return await self.client.get_story_markdown(story)
+
+    @activity.defn
+    async def get_story_content(self, story: HackerNewsStory) -> StoryContent:
+        """Fetch story content as markdown, recording which fetcher produced it."""
+        return await heartbeating(self.client.get_story_content(story, time_left()))
+
+    @activity.defn
+    async def get_story_comments(self, story: HackerNewsStory) -> list[str]:
+        """Fetch a story's top comments as plain text."""
+        return await heartbeating(self.client.get_top_comments(story))
@@ -1,23 +1,74 @@
+from typing import Optional
+
 from temporalio import activity
 
+from hnbrief.activities.artifacts import load_cluster, load_text, store_text
+from hnbrief.activities.deadline import heartbeating, time_left
+from hnbrief.clients.artifacts import ArtifactStore
 from hnbrief.clients.hackernews import HackerNewsStory
-from hnbrief.clients.openai import OpenAIClient, StorySummary
+from hnbrief.clients.openai import (
+    DailyBrief,
+    OpenAIClient,
+    StoryCluster,
+    StorySummary,
+)
 
 
 class OpenAIActivities:
-    """Activities for interacting with OpenAI API."""
+    """Activities for interacting with OpenAI API.
+
+    With a `store`, summaries and briefs are written to it and returned by
+    reference, so their text stays out of workflow history, and stored
+    summaries are read back before a brief is written.
+    """
 
-    def __init__(self, client: OpenAIClient):
+    def __init__(self, client: OpenAIClient, store: Optional[ArtifactStore] = None):
         self.client = client
+        self.store = store
 
     @activity.defn
     async def summarize_story(
-        self, story: HackerNewsStory, markdown: str
+        self,
+        story: HackerNewsStory,
+        markdown: str,
+        comments: Optional[list[str]] = None,
     ) -> StorySummary:
-        """Summarize a story using OpenAI."""
-        return await self.client.summarize_story(story.title, story.url, markdown)
+        """Summarize a story, and its top comments when given, using OpenAI."""
+        summary = await heartbeating(
+            self.client.summarize_story(
+                story.title, story.url, markdown, comments, time_left()
+            )
+        )
+        if self.store is None:
+            return summary
+        name = f"{activity.info().workflow_id}-{story.id}-summary.md"
+        return store_text(self.store, name, summary)
 
     @activity.defn
-    async def create_daily_brief(self, summaries: list[StorySummary]) -> str:
-        """Create a daily brief from story summaries."""
-        return await self.client.create_daily_brief(summaries)
+    async def create_daily_brief(
+        self,
+        summaries: list[StorySummary],
+        clusters: Optional[list[StoryCluster]] = None,
+        prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        brief_date: Optional[str] = None,
+    ) -> DailyBrief:
+        """Create a daily brief from story summaries, grouped when clustered."""
+        if self.store is None:
+            return await self.client.create_daily_brief(
+                summaries, clusters, prompt, model, brief_date, time_left()
+            )
+        store = self.store
+        brief = await self.client.create_daily_brief(
+            [load_text(store, summary) for summary in summaries],
+            [load_cluster(store, cluster) for cluster in clusters]
+            if clusters is not None
+            else None,
+            prompt,
+            model,
+            brief_date,
+            time_left(),
+        )
+        info = activity.info()
+        name = f"{info.workflow_id}-{info.activity_id}-brief.md"
+        return store_text(store, name, brief)
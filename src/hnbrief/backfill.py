@@ -0,0 +1,258 @@
+"""Backfill briefs for past days from a range of HN item IDs."""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+from temporalio.client import Client
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from hnbrief.cli import (
+    EXTENSIONS,
+    add_brief_arguments,
+    build_options,
+    connect,
+    load_full_result,
+)
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+from hnbrief.config import get_artifact_config, get_hackernews_config
+from hnbrief.formatters import render
+from hnbrief.workflows.hackernews import (
+    BriefOptions,
+    DailyBriefResult,
+    HackerNewsDailyBrief,
+)
+from hnbrief.worker import create_item_cache
+
+logger = logging.getLogger(__name__)
+
+# Item IDs fetched between state saves
+SCAN_CHUNK_SIZE = 1000
+# Attempts per chunk before the scan gives up; a rerun resumes from it
+SCAN_ATTEMPTS = 3
+
+
+class ScannedStory(BaseModel):
+    """The fields of a scanned story needed to pick a day's candidates."""
+
+    id: int
+    time: int
+    score: int = 0
+
+
+class BackfillState(BaseModel):
+    """Scan progress and candidates, saved so a backfill can resume."""
+
+    start_id: int
+    end_id: int
+    # Next item ID to scan
+    next_id: int
+    # Highest scoring stories of each day seen so far
+    days: dict[date, list[ScannedStory]] = Field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path, start_id: int, end_id: int) -> "BackfillState":
+        """Resume the saved scan of the same ID range, or start a new one."""
+        if path.exists():
+            state = cls.model_validate_json(path.read_bytes())
+            if (state.start_id, state.end_id) == (start_id, end_id):
+                return state
+            logger.warning(f"{path} is for another ID range; starting over")
+        return cls(start_id=start_id, end_id=end_id, next_id=start_id)
+
+    def save(self, path: Path) -> None:
+        # Write then rename, so an interrupted save keeps the previous state
+        temp = path.with_suffix(path.suffix + ".tmp")
+        temp.write_text(self.model_dump_json(), encoding="utf-8")
+        os.replace(temp, path)
+
+    def add(self, stories: list[HackerNewsStory], keep: int) -> None:
+        """Keep each day's `keep` highest scoring stories."""
+        for story in stories:
+            if story.type != "story" or story.dead or story.deleted:
+                continue
+            day = story_day(story.time)
+            scanned = ScannedStory(id=story.id, time=story.time, score=story.score or 0)
+            self.days[day] = sorted(
+                [*self.days.get(day, []), scanned],
+                key=lambda candidate: candidate.score,
+                reverse=True,
+            )[:keep]
+
+
+def story_day(timestamp: int) -> date:
+    """UTC day a story was posted on."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+
+def parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+
+async def scan(
+    client: HackerNewsClient, state: BackfillState, state_path: Path, keep: int
+) -> None:
+    """Fetch every item in the state's range, saving progress per chunk."""
+    while state.next_id <= state.end_id:
+        chunk = list(
+            range(state.next_id, min(state.next_id + SCAN_CHUNK_SIZE, state.end_id + 1))
+        )
+        for attempt in range(1, SCAN_ATTEMPTS + 1):
+            try:
+                stories = await client.get_story_details(chunk)
+                break
+            except Exception as e:
+                if attempt == SCAN_ATTEMPTS:
+                    raise
+                logger.warning(f"Retrying items {chunk[0]}-{chunk[-1]}: {e}")
+                await asyncio.sleep(attempt)
+        state.add(stories, keep)
+        state.next_id = chunk[-1] + 1
+        state.save(state_path)
+        print(
+            f"Scanned items up to {chunk[-1]} of {state.end_id}",
+            file=sys.stderr,
+        )
+
+
+async def backfill_day(
+    temporal_client: Client,
+    day: date,
+    max_stories: int,
+    options: BriefOptions,
+    path: Path,
+    output_format: str,
+    store: ArtifactStore,
+    slots: asyncio.Semaphore,
+) -> None:
+    """Run one day's brief and write it, reattaching to a run left behind."""
+    workflow_id = f"hacker-news-backfill-{day.isoformat()}"
+    async with slots:
+        try:
+            handle = await temporal_client.start_workflow(
+                HackerNewsDailyBrief.run,
+                args=[max_stories, options],
+                id=workflow_id,
+                task_queue="hacker-news-task-queue",
+            )
+        except WorkflowAlreadyStartedError:
+            # Still running from an interrupted backfill
+            handle = temporal_client.get_workflow_handle_for(
+                HackerNewsDailyBrief.run, workflow_id
+            )
+        result: DailyBriefResult = await handle.result()
+    result = load_full_result(result, store)
+    path.write_text(render(result, output_format), encoding="utf-8")
+    print(f"Brief for {day} written to {path}", file=sys.stderr)
+
+
+async def main() -> None:
+    """Generate one brief per day in a date range from scanned HN items."""
+    parser = argparse.ArgumentParser(description="Backfill briefs for past days")
+    hackernews_config = get_hackernews_config()
+    parser.add_argument("--from-date", type=parse_date, required=True)
+    parser.add_argument("--to-date", type=parse_date, required=True)
+    parser.add_argument(
+        "--start-id", type=int, required=True, help="First HN item ID to scan"
+    )
+    parser.add_argument(
+        "--end-id", type=int, required=True, help="Last HN item ID to scan"
+    )
+    parser.add_argument(
+        "--output", type=Path, required=True, help="Directory for the briefs"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Brief workflows running at once (default: 4)",
+    )
+    parser.add_argument(
+        "--scan-concurrency",
+        type=int,
+        default=64,
+        help="Item requests in flight while scanning (default: 64)",
+    )
+    add_brief_arguments(parser, hackernews_config)
+    args = parser.parse_args()
+    if args.from_date > args.to_date or args.start_id > args.end_id:
+        parser.error("ranges must not be empty")
+    artifact_config = get_artifact_config()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    state_path: Path = args.output / "backfill-state.json"
+    state = BackfillState.load(state_path, args.start_id, args.end_id)
+    keep = math.ceil(args.max_stories * max(hackernews_config.overfetch_factor, 1.0))
+
+    item_cache = create_item_cache(hackernews_config)
+    hn_client = HackerNewsClient(
+        item_cache=item_cache,
+        max_connections=args.scan_concurrency,
+        item_url=hackernews_config.item_url,
+    )
+    try:
+        await scan(hn_client, state, state_path, keep)
+    finally:
+        await hn_client.close()
+        item_cache.close()
+
+    options = build_options(args, hackernews_config, artifact_config)
+    store = ArtifactStore(artifact_config.artifact_dir)
+    slots = asyncio.Semaphore(args.concurrency)
+    temporal_client = await connect()
+    tasks = []
+    day: date = args.from_date
+    while day <= args.to_date:
+        path = args.output / f"{day.isoformat()}.{EXTENSIONS[args.format]}"
+        candidates = state.days.get(day, [])
+        if path.exists():
+            print(f"Brief for {day} already written, skipping", file=sys.stderr)
+        elif not candidates:
+            print(f"No stories scanned for {day}, skipping", file=sys.stderr)
+        else:
+            day_options = options.model_copy(
+                update={
+                    "story_ids": [story.id for story in candidates],
+                    "brief_date": day,
+                }
+            )
+            tasks.append(
+                backfill_day(
+                    temporal_client,
+                    day,
+                    args.max_stories,
+                    day_options,
+                    path,
+                    args.format,
+                    store,
+                    slots,
+                )
+            )
+        day += timedelta(days=1)
+
+    # Let every day finish before reporting failures; rerun to retry them
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    failures = [result for result in results if isinstance(result, BaseException)]
+    for failure in failures:
+        logger.error(f"Backfill brief failed: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+def run() -> None:
+    """Console script entry point."""
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -4,31 +4,232 @@ import argparse
 import asyncio
 import sys
 import uuid
+from pathlib import Path
+from typing import Any, TypeVar
 
-from temporalio.client import Client
+from pydantic import TypeAdapter, ValidationError
+from temporalio.client import Client, WorkflowHandle
 from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.service import RPCError
 
-from hnbrief.config import get_hackernews_config, get_temporal_config
-from hnbrief.workflows.hackernews import HackerNewsDailyBrief
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.config import (
+    ArtifactConfig,
+    HackerNewsConfig,
+    get_artifact_config,
+    get_hackernews_config,
+    get_temporal_config,
+)
+from hnbrief.formatters import FORMATS, render
+from hnbrief.ranking import StoryFilter
+from hnbrief.workflows.hackernews import (
+    BriefOptions,
+    BriefProgress,
+    BriefSpec,
+    DailyBriefResult,
+    HackerNewsDailyBrief,
+    HackerNewsMultiBrief,
+    MultiBriefResult,
+    RunReport,
+    StageTimings,
+)
 
+# Seconds between progress queries while the workflow runs
+PROGRESS_POLL_INTERVAL = 2.0
 
-async def main() -> None:
-    """Main entry point that runs the workflow."""
-    parser = argparse.ArgumentParser(description="Run HackerNews workflow")
-    hackernews_config = get_hackernews_config()
+# File extension used for each output format when writing several briefs
+EXTENSIONS = {"markdown": "md", "json": "json", "html": "html"}
+
+ResultType = TypeVar("ResultType")
+
+MIB = 1024 * 1024
+
+
+def format_progress(progress: BriefProgress) -> str:
+    """Render workflow progress as a single status line."""
+    stages = [("details", progress.details), ("markdown", progress.markdown)]
+    # The comments stage only runs when requested
+    if progress.comments.total:
+        stages.append(("comments", progress.comments))
+    stages += [("summaries", progress.summaries), ("brief", progress.brief)]
+    line = "  ".join(f"{name} {stage.done}/{stage.total}" for name, stage in stages)
+    if progress.deadline_reached:
+        line += "  (deadline reached)"
+    return line
+
+
+def format_report(report: RunReport, timings: StageTimings) -> str:
+    """Render a run's cost, token and timing report as plain text."""
+    lines = [
+        "Run report",
+        f"  stages: details {timings.details:.1f}s  stories {timings.stories:.1f}s  "
+        f"brief {timings.brief:.1f}s  total {timings.total:.1f}s",
+    ]
+    for name, model in sorted(report.models.items()):
+        cost = "no price" if model.cost is None else f"${model.cost:.4f}"
+        lines.append(
+            f"  {name}: {model.calls} calls  {model.prompt_tokens} prompt + "
+            f"{model.completion_tokens} completion tokens  "
+            f"{model.seconds:.1f}s  {cost}"
+        )
+    cost_line = f"  estimated cost: ${report.cost:.4f}"
+    if report.unpriced_models:
+        cost_line += f" (no price for {', '.join(report.unpriced_models)})"
+    lines.append(cost_line)
+    fetches = report.fetches
+    lines.append(
+        f"  fetched: {fetches.articles} articles  "
+        f"{fetches.size_bytes / MIB:.2f} MiB  {fetches.seconds:.1f}s"
+    )
+    lines.append(
+        f"  cache: {fetches.cached_articles} articles  "
+        f"{fetches.cached_bytes / MIB:.2f} MiB  {fetches.cached_seconds:.1f}s saved"
+    )
+    return "\n".join(lines)
+
+
+async def wait_with_progress(
+    handle: WorkflowHandle[Any, ResultType],
+) -> ResultType:
+    """Wait for the workflow result, printing progress whenever it changes."""
+    result_task = asyncio.create_task(handle.result())
+    last_line = ""
+    while True:
+        done, _ = await asyncio.wait({result_task}, timeout=PROGRESS_POLL_INTERVAL)
+        if done:
+            return await result_task
+        try:
+            progress = await handle.query(HackerNewsDailyBrief.get_progress)
+        except RPCError:
+            # The workflow may not have started on a worker yet
+            continue
+        line = format_progress(progress)
+        if line != last_line:
+            print(line, file=sys.stderr)
+            last_line = line
+
+
+def load_specs(path: Path) -> list[BriefSpec]:
+    """Read a JSON list of brief specs, checking that names are unique."""
+    specs = TypeAdapter(list[BriefSpec]).validate_json(path.read_bytes())
+    names = [spec.name for spec in specs]
+    if not specs:
+        raise ValueError(f"{path} contains no brief specs")
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate brief names in {path}: {', '.join(duplicates)}")
+    return specs
+
+
+def write_briefs(
+    briefs: dict[str, str], output_format: str, output: Path | None
+) -> None:
+    """Write rendered briefs to one file each in `output`, or to stdout."""
+    if output is None:
+        for name, text in briefs.items():
+            print(f"==> {name} <==")
+            print(text)
+        return
+    output.mkdir(parents=True, exist_ok=True)
+    for name, text in briefs.items():
+        path = output / f"{name}.{EXTENSIONS[output_format]}"
+        path.write_text(text, encoding="utf-8")
+        print(f"Brief written to {path}", file=sys.stderr)
+
+
+def load_full_result(
+    result: DailyBriefResult, store: ArtifactStore
+) -> DailyBriefResult:
+    """Resolve a result returned by reference from the artifact store."""
+    if result.artifact is None:
+        return result
+    return DailyBriefResult.model_validate_json(store.load(result.artifact))
+
+
+def add_brief_arguments(
+    parser: argparse.ArgumentParser, hackernews_config: HackerNewsConfig
+) -> None:
+    """Options shared by every command that starts brief workflows."""
     parser.add_argument(
         "--max-stories",
         type=int,
         default=hackernews_config.max_stories,
         help="Number of stories to process (1-500, defaults to config value)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--min-score",
+        type=int,
+        default=hackernews_config.min_score,
+        help="Skip stories with fewer points than this (defaults to config value)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=hackernews_config.deadline_seconds,
+        help="Seconds before the brief is built from the summaries completed so far",
+    )
+    parser.add_argument(
+        "--guaranteed-stories",
+        type=int,
+        default=hackernews_config.guaranteed_stories,
+        help="Top stories summarized even past the deadline (defaults to config value)",
+    )
+    parser.add_argument(
+        "--comments",
+        action=argparse.BooleanOptionalAction,
+        default=hackernews_config.include_comments,
+        help="Summarize each story's top comments along with the article",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=hackernews_config.story_batch_size,
+        help="Summarize stories in child workflows of this many stories each",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="markdown",
+        help="Output format for the brief (default: markdown)",
+    )
+
 
-    # Connect to local Temporal server
+def build_options(
+    args: argparse.Namespace,
+    hackernews_config: HackerNewsConfig,
+    artifact_config: ArtifactConfig,
+) -> BriefOptions:
+    """Brief options from the configuration and the shared arguments."""
+    return BriefOptions(
+        story_filter=StoryFilter(
+            min_score=args.min_score,
+            min_comments=hackernews_config.min_comments,
+            max_age_hours=hackernews_config.max_age_hours,
+            blocked_domains=hackernews_config.blocked_domains,
+            allowed_domains=hackernews_config.allowed_domains,
+        ),
+        overfetch_factor=hackernews_config.overfetch_factor,
+        deadline_seconds=args.deadline,
+        inline_result_limit=artifact_config.inline_result_limit,
+        include_comments=args.comments,
+        cluster_stories=hackernews_config.cluster_stories,
+        cluster_threshold=hackernews_config.cluster_threshold,
+        duplicate_threshold=hackernews_config.duplicate_threshold,
+        story_batch_size=args.batch_size,
+        batch_concurrency=hackernews_config.story_batch_concurrency,
+        history_size_limit=hackernews_config.history_size_limit,
+        model_prices=hackernews_config.model_prices,
+        priority_levels=hackernews_config.priority_levels,
+        guaranteed_stories=args.guaranteed_stories,
+    )
+
+
+async def connect() -> Client:
+    """Connect to the Temporal server, exiting with a hint when it is down."""
     temporal_config = get_temporal_config()
     server_url = temporal_config.temporal_server_url
     try:
-        temporal_client = await Client.connect(
+        return await Client.connect(
             server_url,
             data_converter=pydantic_data_converter,
         )
@@ -42,16 +243,81 @@ async def main() -> None:
         else:
             raise
 
-    print("Starting workflow!")
+
+async def main() -> None:
+    """Main entry point that runs the workflow."""
+    parser = argparse.ArgumentParser(description="Run HackerNews workflow")
+    hackernews_config = get_hackernews_config()
+    add_brief_arguments(parser, hackernews_config)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Write the brief to this file (a directory with --spec-file) instead of printing it",
+    )
+    parser.add_argument(
+        "--spec-file",
+        type=Path,
+        help="JSON list of brief specs; builds one brief per spec from a shared summary pass",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Print token, cost, fetch and timing totals for the run to stderr",
+    )
+    args = parser.parse_args()
+    artifact_config = get_artifact_config()
+
+    specs: list[BriefSpec] = []
+    if args.spec_file:
+        try:
+            specs = load_specs(args.spec_file)
+        except (OSError, ValidationError, ValueError) as e:
+            parser.error(str(e))
+
+    options = build_options(args, hackernews_config, artifact_config)
+
+    temporal_client = await connect()
+
+    print("Starting workflow!", file=sys.stderr)
+    store = ArtifactStore(artifact_config.artifact_dir)
+    if specs:
+        multi_handle = await temporal_client.start_workflow(
+            HackerNewsMultiBrief.run,
+            args=[args.max_stories, specs, options],
+            id=f"hacker-news-multi-workflow-{uuid.uuid4().hex}",
+            task_queue="hacker-news-task-queue",
+        )
+        multi_result: MultiBriefResult = await wait_with_progress(multi_handle)
+        briefs = {
+            name: render(load_full_result(brief, store), args.format)
+            for name, brief in multi_result.briefs.items()
+        }
+        write_briefs(briefs, args.format, args.output)
+        if args.report:
+            print(
+                format_report(multi_result.report, multi_result.timings),
+                file=sys.stderr,
+            )
+        return
+
     # Start the workflow
-    result = await temporal_client.execute_workflow(
+    handle = await temporal_client.start_workflow(
         HackerNewsDailyBrief.run,
-        args=[args.max_stories],
+        args=[args.max_stories, options],
         id=f"hacker-news-workflow-{uuid.uuid4().hex}",
         task_queue="hacker-news-task-queue",
     )
+    result = await wait_with_progress(handle)
+    result = load_full_result(result, store)
 
-    print(f"Workflow result: {result}")
+    output = render(result, args.format)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+        print(f"Brief written to {args.output}", file=sys.stderr)
+    else:
+        print(output, end="")
+    if args.report:
+        print(format_report(result.report, result.timings), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from pydantic import BaseModel
+
+
+class ArtifactRef(BaseModel):
+    """Reference to a result written to the local artifact store."""
+
+    # Relative to the store's root, which the worker and CLI may mount at
+    # different paths
+    name: str
+    size_bytes: int
+    sha256: str
+
+
+class ArtifactStore:
+    """Stores large workflow outputs as files instead of inline payloads."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def save(self, name: str, content: str) -> ArtifactRef:
+        """Atomically write an artifact and return a reference to it."""
+        data = content.encode("utf-8")
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=f".{name}.")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+
+        return ArtifactRef(
+            name=name,
+            size_bytes=len(data),
+            sha256=hashlib.sha256(data).hexdigest(),
+        )
+
+    def _path(self, name: str) -> Path:
+        """Location of an artifact, which must be directly under the root."""
+        path = (self.root / name).resolve()
+        if path.parent != self.root.resolve():
+            raise ValueError(f"Artifact name {name!r} is outside the store")
+        return path
+
+    def load(self, ref: ArtifactRef) -> str:
+        """Read an artifact back, checking it has not been altered."""
+        data = self._path(ref.name).read_bytes()
+        if hashlib.sha256(data).hexdigest() != ref.sha256:
+            raise ValueError(f"Artifact {ref.name} does not match its checksum")
+        return data.decode("utf-8")
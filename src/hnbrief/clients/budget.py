@@ -0,0 +1,71 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class BudgetStats:
+    """Counters describing how much a byte budget held fetches back."""
+
+    waits: int = 0
+    wait_seconds: float = 0.0
+    peak_bytes: int = 0
+
+
+class ByteBudget:
+    """Bytes of article bodies that may be held in memory at once.
+
+    Fetches reserve their expected size before reading a body and wait
+    while the budget is exhausted, so a burst of large pages queues up
+    instead of growing the worker's memory. A single reservation larger
+    than the whole budget is capped to it, so it can still proceed once
+    nothing else is in flight. None means unlimited.
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        self.capacity = capacity
+        self.in_flight = 0
+        self.stats = BudgetStats()
+        self.changed = asyncio.Condition()
+
+    def _fits(self, size: int) -> bool:
+        return self.capacity is None or self.in_flight + size <= self.capacity
+
+    async def acquire(
+        self, size: int, deadline: Optional[asyncio.Timeout] = None
+    ) -> int:
+        """Wait until `size` bytes are free and reserve them.
+
+        A wait here says nothing about the site being fetched, so the
+        caller's `deadline` is held while waiting and then pushed back by
+        the time waited. Returns the number of bytes actually reserved, to
+        be released later.
+        """
+        if self.capacity is not None:
+            size = min(size, self.capacity)
+        async with self.changed:
+            if not self._fits(size):
+                self.stats.waits += 1
+                started = time.monotonic()
+                when = deadline.when() if deadline is not None else None
+                if deadline is not None:
+                    deadline.reschedule(None)
+                try:
+                    await self.changed.wait_for(lambda: self._fits(size))
+                finally:
+                    waited = time.monotonic() - started
+                    self.stats.wait_seconds += waited
+                    if deadline is not None and when is not None:
+                        deadline.reschedule(when + waited)
+            self.in_flight += size
+            self.stats.peak_bytes = max(self.stats.peak_bytes, self.in_flight)
+        return size
+
+    async def release(self, size: int) -> None:
+        """Return reserved bytes to the budget and wake waiting fetches."""
+        if size <= 0:
+            return
+        async with self.changed:
+            self.in_flight -= size
+            self.changed.notify_all()
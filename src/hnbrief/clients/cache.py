@@ -0,0 +1,221 @@
+import gzip
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+ItemModel = TypeVar("ItemModel", bound=BaseModel)
+
+# Writes held in a batch before they are committed regardless
+MAX_PENDING_WRITES = 1000
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how item lookups were served."""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class CacheEntry:
+    """A raw item response, when it was fetched, and its decoded model."""
+
+    raw: bytes
+    fetched_at: float
+    # Item creation time and whether it is dead or deleted, which decide
+    # whether its mutable fields can still change
+    created: Optional[int] = None
+    final: bool = False
+    item: Optional[BaseModel] = None
+
+    @classmethod
+    def from_raw(cls, raw: bytes, fetched_at: float) -> "CacheEntry":
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            return cls(raw=raw, fetched_at=fetched_at)
+        created = data.get("time")
+        return cls(
+            raw=raw,
+            fetched_at=fetched_at,
+            created=created if isinstance(created, int) else None,
+            final=bool(data.get("dead") or data.get("deleted")),
+        )
+
+
+class ItemCache:
+    """Two-level cache of HackerNews item responses.
+
+    Decoded models live in an in-memory LRU so hits skip validation, backed
+    by an optional SQLite file that survives worker restarts. Only `score`,
+    `descendants` and `kids` change on live items, so entries expire after
+    `mutable_ttl` seconds; items older than `frozen_after` seconds, dead or
+    deleted items never change again and are kept indefinitely.
+
+    Disk writes made inside `batch()` are committed together when the
+    outermost batch ends, so a fetch of many items costs one commit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_items: int = 10_000,
+        mutable_ttl: float = 300.0,
+        frozen_after: float = 14 * 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_items = max_items
+        self.mutable_ttl = mutable_ttl
+        self.frozen_after = frozen_after
+        self.clock = clock
+        self.stats = CacheStats()
+        self.entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        # Rows not yet written to disk, and how many batches are open
+        self.pending: dict[int, tuple[float, bytes]] = {}
+        self.batches = 0
+
+        self.db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS items "
+                "(id INTEGER PRIMARY KEY, fetched_at REAL NOT NULL, raw BLOB NOT NULL)"
+            )
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        """Check whether an entry can be served without refetching."""
+        if self.clock() - entry.fetched_at < self.mutable_ttl:
+            return True
+        if entry.final:
+            return True
+        return (
+            entry.created is not None
+            and entry.fetched_at - entry.created > self.frozen_after
+        )
+
+    def _remember(self, item_id: int, entry: CacheEntry) -> None:
+        self.entries[item_id] = entry
+        self.entries.move_to_end(item_id)
+        while len(self.entries) > self.max_items:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _load_from_disk(self, item_id: int) -> Optional[CacheEntry]:
+        if self.db is None:
+            return None
+        if item_id in self.pending:
+            fetched_at, raw = self.pending[item_id]
+            return CacheEntry.from_raw(raw, fetched_at)
+        row = self.db.execute(
+            "SELECT fetched_at, raw FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry.from_raw(row[1], row[0])
+
+    def get(self, item_id: int, model: type[ItemModel]) -> Optional[ItemModel]:
+        """Return a fresh cached item decoded as `model`, or None."""
+        entry = self.entries.get(item_id)
+        from_disk = False
+        if entry is None:
+            entry = self._load_from_disk(item_id)
+            from_disk = entry is not None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        if not self._is_fresh(entry):
+            self.stats.stale += 1
+            return None
+
+        if not isinstance(entry.item, model):
+            entry.item = model.model_validate_json(entry.raw)
+        self._remember(item_id, entry)
+        if from_disk:
+            self.stats.disk_hits += 1
+        else:
+            self.stats.hits += 1
+        return entry.item
+
+    def raw(self, item_id: int) -> Optional[bytes]:
+        """Raw response of an item held in memory, as it was fetched."""
+        entry = self.entries.get(item_id)
+        return entry.raw if entry is not None else None
+
+    def put(self, item_id: int, raw: bytes, item: Optional[BaseModel] = None) -> None:
+        """Store a freshly fetched raw response and its decoded model."""
+        entry = CacheEntry.from_raw(raw, self.clock())
+        entry.item = item
+        self._remember(item_id, entry)
+        if self.db is not None:
+            self.pending[item_id] = (entry.fetched_at, raw)
+            if not self.batches or len(self.pending) >= MAX_PENDING_WRITES:
+                self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Hold disk writes until the outermost batch ends."""
+        self.batches += 1
+        try:
+            yield
+        finally:
+            self.batches -= 1
+            if not self.batches:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write pending items to disk in a single commit."""
+        if self.db is None or not self.pending:
+            return
+        rows = [(item_id, *row) for item_id, row in self.pending.items()]
+        self.pending.clear()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO items (id, fetched_at, raw) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def load_snapshot(self, path: Path) -> int:
+        """Warm the cache from a snapshot written by `save_snapshot`."""
+        rows: list[tuple[int, float, bytes]] = []
+        with gzip.open(path, "rt", encoding="utf-8") as snapshot:
+            for line in snapshot:
+                item_id, fetched_at, raw = json.loads(line)
+                entry = CacheEntry.from_raw(raw.encode("utf-8"), fetched_at)
+                self._remember(item_id, entry)
+                rows.append((item_id, fetched_at, entry.raw))
+        if self.db is not None:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO items (id, fetched_at, raw) VALUES (?, ?, ?)",
+                    rows,
+                )
+        logging.info(f"Warmed item cache with {len(rows)} items from {path}")
+        return len(rows)
+
+    def save_snapshot(self, path: Path) -> int:
+        """Write the in-memory items as gzip-compressed JSON lines."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as snapshot:
+            for item_id, entry in self.entries.items():
+                line = [item_id, entry.fetched_at, entry.raw.decode("utf-8")]
+                snapshot.write(json.dumps(line, separators=(",", ":")) + "\n")
+        return len(self.entries)
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
@@ -0,0 +1,207 @@
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+# Failure reasons recorded in the negative cache
+FORBIDDEN = "forbidden"
+NOT_FOUND = "not_found"
+TIMEOUT = "timeout"
+NON_HTML = "non_html"
+HTTP_ERROR = "http_error"
+CONNECTION = "connection"
+TOO_LARGE = "too_large"
+# Skipped because the site's circuit was open; never cached
+CIRCUIT_OPEN = "circuit_open"
+# Given up because the activity ran out of time; never cached
+OUT_OF_TIME = "out_of_time"
+
+# Seconds a failed URL is skipped for, by reason; pages that are gone or
+# not HTML rarely change, while timeouts and server errors often clear up
+NEGATIVE_TTLS = {
+    FORBIDDEN: 6 * 3600.0,
+    NOT_FOUND: 24 * 3600.0,
+    TIMEOUT: 1800.0,
+    NON_HTML: 7 * 24 * 3600.0,
+    HTTP_ERROR: 900.0,
+    CONNECTION: 900.0,
+    TOO_LARGE: 7 * 24 * 3600.0,
+}
+# Failures stored between sweeps of expired negative cache entries
+PURGE_EVERY = 1000
+
+
+class CircuitBreaker:
+    """Circuit breaker for one site.
+
+    Closed until `failure_threshold` consecutive failures, then open for
+    `reset_timeout` seconds. After that it is half-open: a single probe
+    request is let through, which closes the circuit on success and opens
+    it again on failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent, claiming the probe if half-open."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+        self.probing = False
+
+    def release(self) -> None:
+        """Give up a claimed probe without a result, so another can be sent."""
+        self.probing = False
+
+
+class DomainBreakers:
+    """Circuit breakers keyed by the host of the requested URL."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def host(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = self.host(url)
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout, self.clock
+            )
+        return self.breakers[host]
+
+
+@dataclass
+class NegativeCacheStats:
+    """Counters describing how many fetches the negative cache saved."""
+
+    hits: int = 0
+    stored: int = 0
+    by_reason: dict[str, int] = field(default_factory=dict)
+
+
+class NegativeCache:
+    """URLs that recently failed to fetch, and why.
+
+    Entries expire after the TTL for their reason. Kept in memory, backed
+    by an optional SQLite file so known-bad URLs survive worker restarts.
+    Expired entries are swept on load and every PURGE_EVERY failures.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttls: Optional[dict[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttls = ttls or NEGATIVE_TTLS
+        self.clock = clock
+        self.stats = NegativeCacheStats()
+        self.entries: dict[str, tuple[str, float]] = {}
+
+        self.db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS failures "
+                "(url TEXT PRIMARY KEY, reason TEXT NOT NULL, failed_at REAL NOT NULL)"
+            )
+            rows = self.db.execute("SELECT url, reason, failed_at FROM failures")
+            for url, reason, failed_at in rows.fetchall():
+                self.entries[url] = (reason, failed_at)
+            self._purge()
+
+    def _expired(self, reason: str, failed_at: float) -> bool:
+        return self.clock() - failed_at >= self.ttls.get(reason, 0.0)
+
+    def _purge(self) -> None:
+        """Drop expired entries, from disk too, so the file stays small."""
+        expired = [url for url, entry in self.entries.items() if self._expired(*entry)]
+        for url in expired:
+            del self.entries[url]
+        if self.db is not None and expired:
+            with self.db:
+                self.db.executemany(
+                    "DELETE FROM failures WHERE url = ?", [(url,) for url in expired]
+                )
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the reason a URL recently failed, or None to fetch it."""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        reason, failed_at = entry
+        if self._expired(reason, failed_at):
+            del self.entries[url]
+            return None
+        self.stats.hits += 1
+        return reason
+
+    def put(self, url: str, reason: str) -> None:
+        """Remember that a URL failed for `reason`."""
+        failed_at = self.clock()
+        self.entries[url] = (reason, failed_at)
+        self.stats.stored += 1
+        self.stats.by_reason[reason] = self.stats.by_reason.get(reason, 0) + 1
+        if self.db is not None:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO failures (url, reason, failed_at) "
+                    "VALUES (?, ?, ?)",
+                    (url, reason, failed_at),
+                )
+        logging.info(f"Skipping {url} for now: {reason}")
+        if self.stats.stored % PURGE_EVERY == 0:
+            self._purge()
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
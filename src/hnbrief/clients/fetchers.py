@@ -0,0 +1,334 @@
+"""Strategies for turning a story URL into markdown.
+
+HackerNewsClient tries its fetchers in order until one succeeds: the page
+itself, text extracted from a PDF, then a copy from an archive mirror.
+"""
+
+import asyncio
+import importlib.util
+import io
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+import html2text
+
+from hnbrief.clients.budget import ByteBudget
+from hnbrief.clients.circuit import (
+    CONNECTION,
+    FORBIDDEN,
+    HTTP_ERROR,
+    NON_HTML,
+    NOT_FOUND,
+    TIMEOUT,
+    TOO_LARGE,
+)
+
+# Optional dependency, installed with the "pdf" extra; imported only by the
+# extraction processes, so workflow code importing this module stays clean
+HAS_PYPDF = importlib.util.find_spec("pypdf") is not None
+
+ARTICLE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+# Content types converted to markdown; anything else is recorded as non-HTML
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+PDF_CONTENT_TYPE = "application/pdf"
+READ_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class ArticleTimeouts:
+    """Timeouts for article fetches, in seconds.
+
+    `connect` and `read` apply to every request; `total` bounds the whole
+    fetcher chain for one story and is kept well below the 60 second
+    activity timeout, so a slow site fails fast instead of holding the
+    activity open.
+    """
+
+    connect: float = 5.0
+    read: float = 15.0
+    total: float = 30.0
+
+    def client_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(sock_connect=self.connect, sock_read=self.read)
+
+
+@dataclass
+class StoryContent:
+    """Article text for a story and how it was obtained."""
+
+    markdown: str
+    # Fetcher that produced the text, or None when none succeeded
+    strategy: Optional[str] = None
+    size_bytes: int = 0
+    seconds: float = 0.0
+    # Served from the content or negative cache; size and seconds are then
+    # those of the original fetch
+    cached: bool = False
+
+
+@dataclass
+class StrategyStats:
+    """Coverage and latency counters for one fetcher."""
+
+    attempts: int = 0
+    successes: int = 0
+    size_bytes: int = 0
+    seconds: float = 0.0
+
+
+class ArticleFetchError(Exception):
+    """An article could not be fetched as text.
+
+    `reason` is one of the negative cache reasons; `domain_failure` tells
+    whether the failure says something about the whole site, and so counts
+    towards opening its circuit breaker.
+    """
+
+    def __init__(
+        self,
+        reason: str,
+        detail: str,
+        domain_failure: bool,
+        content_type: str = "",
+    ) -> None:
+        super().__init__(f"{reason}: {detail}")
+        self.reason = reason
+        self.domain_failure = domain_failure
+        self.content_type = content_type
+
+
+def status_failure(status: int) -> ArticleFetchError:
+    """Classify an unsuccessful HTTP status."""
+    if status in (401, 403):
+        return ArticleFetchError(FORBIDDEN, f"HTTP {status}", domain_failure=True)
+    if status in (404, 410):
+        return ArticleFetchError(NOT_FOUND, f"HTTP {status}", domain_failure=False)
+    # Rate limiting and server errors affect the whole site
+    domain_failure = status == 429 or status >= 500
+    return ArticleFetchError(HTTP_ERROR, f"HTTP {status}", domain_failure)
+
+
+async def read_limited(response: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+    """Read a response body, failing once it exceeds `max_bytes`."""
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ArticleFetchError(
+                TOO_LARGE, f"over {max_bytes} bytes", domain_failure=False
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def extract_pdf_text(data: bytes, max_pages: int) -> str:
+    """Extract text from the first pages of a PDF; runs in a worker process."""
+    import pypdf
+
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    pages = reader.pages[:max_pages]
+    return "\n\n".join(page.extract_text() or "" for page in pages).strip()
+
+
+class Fetcher(ABC):
+    """One way of turning a story URL into markdown, with its own budget."""
+
+    name = "fetcher"
+
+    def __init__(self, timeout: float = 15.0, max_bytes: int = 5 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def applies(self, url: str, failures: list[ArticleFetchError]) -> bool:
+        """Check whether to try this fetcher after the earlier failures."""
+        return True
+
+    def target(self, url: str) -> str:
+        """URL actually requested, which decides the circuit breaker used."""
+        return url
+
+    @abstractmethod
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        budget: ByteBudget,
+        deadline: Optional[asyncio.Timeout] = None,
+    ) -> tuple[str, int]:
+        """Return markdown and the number of bytes downloaded.
+
+        Bodies are read through `fetch_body`, so they count against `budget`
+        without the wait for it counting against `deadline`.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+@asynccontextmanager
+async def fetch_body(
+    session: aiohttp.ClientSession,
+    url: str,
+    content_types: tuple[str, ...],
+    max_bytes: int,
+    budget: ByteBudget,
+    deadline: Optional[asyncio.Timeout] = None,
+) -> AsyncIterator[tuple[bytes, str]]:
+    """GET a URL and yield its body and charset, classifying failures.
+
+    The body's size is reserved from `budget` before it is read, using
+    Content-Length when the server sends it and `max_bytes` otherwise, and
+    is held until the caller is done converting it. The attempt's
+    `deadline` is held while waiting for the reservation.
+    """
+    reserved = 0
+    try:
+        try:
+            async with session.get(url) as response:
+                if response.status >= 400:
+                    raise status_failure(response.status)
+                if response.content_type not in content_types:
+                    raise ArticleFetchError(
+                        NON_HTML,
+                        response.content_type,
+                        domain_failure=False,
+                        content_type=response.content_type,
+                    )
+                expected = min(response.content_length or max_bytes, max_bytes)
+                reserved = await budget.acquire(expected, deadline)
+                body = await read_limited(response, max_bytes)
+                charset = response.charset or "utf-8"
+        except TimeoutError as e:
+            raise ArticleFetchError(TIMEOUT, str(e) or "timed out", True) from e
+        except aiohttp.ClientConnectionError as e:
+            raise ArticleFetchError(CONNECTION, str(e), True) from e
+        except aiohttp.ClientError as e:
+            raise ArticleFetchError(HTTP_ERROR, str(e), True) from e
+
+        # Hand back whatever the estimate reserved beyond the actual body
+        if reserved > len(body):
+            await budget.release(reserved - len(body))
+            reserved = len(body)
+        yield body, charset
+    finally:
+        await budget.release(reserved)
+
+
+class DirectFetcher(Fetcher):
+    """Fetch the page itself and convert its HTML to markdown."""
+
+    name = "direct"
+
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        budget: ByteBudget,
+        deadline: Optional[asyncio.Timeout] = None,
+    ) -> tuple[str, int]:
+        async with fetch_body(
+            session, url, TEXT_CONTENT_TYPES, self.max_bytes, budget, deadline
+        ) as (body, charset):
+            html = body.decode(charset, errors="replace")
+            return html2text.html2text(html), len(body)
+
+
+class PdfFetcher(Fetcher):
+    """Download a PDF and extract its text in a separate worker process.
+
+    Only tried when an earlier fetcher found a PDF, and only when the
+    optional pypdf dependency is installed.
+    """
+
+    name = "pdf"
+
+    def __init__(
+        self,
+        timeout: float = 20.0,
+        max_bytes: int = 20 * 1024 * 1024,
+        max_pages: int = 30,
+        workers: int = 2,
+    ) -> None:
+        super().__init__(timeout, max_bytes)
+        self.max_pages = max_pages
+        self.workers = workers
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if not HAS_PYPDF:
+            logging.warning("pypdf is not installed; PDF stories will be skipped")
+
+    def applies(self, url: str, failures: list[ArticleFetchError]) -> bool:
+        return (
+            HAS_PYPDF
+            and bool(failures)
+            and failures[-1].content_type == PDF_CONTENT_TYPE
+        )
+
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        budget: ByteBudget,
+        deadline: Optional[asyncio.Timeout] = None,
+    ) -> tuple[str, int]:
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        async with fetch_body(
+            session, url, (PDF_CONTENT_TYPE,), self.max_bytes, budget, deadline
+        ) as (body, _):
+            try:
+                text = await loop.run_in_executor(
+                    self.pool, extract_pdf_text, body, self.max_pages
+                )
+            except Exception as e:
+                raise ArticleFetchError(NON_HTML, f"unreadable PDF: {e}", False) from e
+        if not text:
+            raise ArticleFetchError(NON_HTML, "PDF has no text", domain_failure=False)
+        return text, len(body)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+class ArchiveFetcher(DirectFetcher):
+    """Fetch a copy of the page from an archive mirror.
+
+    `mirror_url` is a template such as
+    "https://web.archive.org/web/2id_/{url}". Tried when the site failed,
+    but not for content that is simply not HTML.
+    """
+
+    name = "archive"
+
+    def __init__(
+        self,
+        mirror_url: str,
+        timeout: float = 15.0,
+        max_bytes: int = 5 * 1024 * 1024,
+    ) -> None:
+        super().__init__(timeout, max_bytes)
+        self.mirror_url = mirror_url
+
+    def applies(self, url: str, failures: list[ArticleFetchError]) -> bool:
+        return bool(failures) and failures[0].reason != NON_HTML
+
+    def target(self, url: str) -> str:
+        if "{url}" in self.mirror_url:
+            return self.mirror_url.replace("{url}", url)
+        return self.mirror_url + url
@@ -1,14 +1,47 @@
+import asyncio
 import aiohttp
 import html2text
 import logging
+import time
+from collections import OrderedDict
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, replace
 from typing import Optional
-from pydantic import BaseModel, Field, RootModel
+from pydantic import BaseModel, Field, RootModel, ValidationError
+
+from hnbrief.clients.budget import ByteBudget
+from hnbrief.clients.cache import CacheStats, ItemCache, ItemModel
+from hnbrief.clients.circuit import (
+    CIRCUIT_OPEN,
+    HTTP_ERROR,
+    OUT_OF_TIME,
+    TIMEOUT,
+    DomainBreakers,
+    NegativeCache,
+)
+from hnbrief.clients.fetchers import (
+    ARTICLE_HEADERS,
+    ArticleFetchError,
+    ArticleTimeouts,
+    DirectFetcher,
+    Fetcher,
+    StoryContent,
+    StrategyStats,
+)
 
 
 # Constants
 STORIES_URL = "https://hacker-news.firebaseio.com/v0/topstories.json"
 ITEM_URL_BASE = "https://hacker-news.firebaseio.com/v0/item"
 
+# Longest comment passed on to the summary prompt, in characters
+MAX_COMMENT_CHARS = 1000
+# Formatted comment threads kept in memory, keyed by story and comment count
+THREAD_CACHE_SIZE = 1000
+
+# Fetched articles kept in memory, keyed by URL
+CONTENT_CACHE_SIZE = 500
+
 
 class StoryIds(RootModel[list[int]]):
     """Pydantic model for list of story IDs."""
@@ -29,49 +62,377 @@ class HackerNewsStory(BaseModel):
     score: Optional[int] = None
     descendants: Optional[int] = None
     kids: Optional[list[int]] = Field(default_factory=lambda: [])
+    dead: bool = False
+    deleted: bool = False
+
+
+class HackerNewsComment(BaseModel):
+    """Pydantic model for HackerNews comment data."""
+
+    id: int
+    type: str
+    by: Optional[str] = None
+    text: Optional[str] = None
+    time: int = 0
+    parent: Optional[int] = None
+    kids: list[int] = Field(default_factory=list)
+    dead: bool = False
+    deleted: bool = False
+
+
+@dataclass
+class CommentLimits:
+    """Bounds on how much of a comment thread is fetched."""
+
+    max_depth: int = 2
+    max_comments: int = 20
+    # Comment requests in flight across all stories, and within one story
+    concurrency: int = 32
+    story_concurrency: int = 8
+    deadline: float = 20.0
+
+
+def comment_text(comment: HackerNewsComment) -> str:
+    """Convert a comment's HTML body to plain text for the summary prompt."""
+    converter = html2text.HTML2Text()
+    converter.body_width = 0
+    converter.ignore_links = True
+    text = converter.handle(comment.text or "").strip()
+    if len(text) > MAX_COMMENT_CHARS:
+        text = text[:MAX_COMMENT_CHARS].rstrip() + "…"
+    return f"{comment.by or 'anonymous'}: {text}"
 
 
 class HackerNewsClient:
-    """Client for interacting with HackerNews API."""
+    """Client for interacting with HackerNews API.
+
+    Item requests share one pooled session, so fetching hundreds of items
+    for details and comment threads reuses a bounded set of connections.
+    """
+
+    def __init__(
+        self,
+        item_cache: Optional[ItemCache] = None,
+        comment_limits: Optional[CommentLimits] = None,
+        max_connections: int = 64,
+        article_timeouts: Optional[ArticleTimeouts] = None,
+        breakers: Optional[DomainBreakers] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        fetchers: Optional[list[Fetcher]] = None,
+        byte_budget: Optional[ByteBudget] = None,
+        item_url: Optional[str] = None,
+    ) -> None:
+        self.item_cache = item_cache
+        self.comment_limits = comment_limits or CommentLimits()
+        self.max_connections = max_connections
+        self.article_timeouts = article_timeouts or ArticleTimeouts()
+        self.breakers = breakers or DomainBreakers()
+        self.negative_cache = negative_cache or NegativeCache()
+        self.fetchers = fetchers or [DirectFetcher()]
+        self.byte_budget = byte_budget or ByteBudget()
+        self.item_url = (item_url or ITEM_URL_BASE).rstrip("/")
+        self.fetch_stats: dict[str, StrategyStats] = {}
+        self.contents: OrderedDict[str, StoryContent] = OrderedDict()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.article_session: Optional[aiohttp.ClientSession] = None
+        self.comment_slots = asyncio.Semaphore(self.comment_limits.concurrency)
+        self.threads: OrderedDict[tuple[int, int], list[str]] = OrderedDict()
+
+    def cache_stats(self) -> CacheStats:
+        """Return item cache counters, all zero when caching is disabled."""
+        return self.item_cache.stats if self.item_cache else CacheStats()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Pooled session for item requests, created on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+        return self.session
+
+    def _get_article_session(self) -> aiohttp.ClientSession:
+        """Pooled session for article requests, with explicit timeouts."""
+        if self.article_session is None or self.article_session.closed:
+            self.article_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.article_timeouts.client_timeout(),
+                headers=ARTICLE_HEADERS,
+            )
+        return self.article_session
+
+    async def close(self) -> None:
+        """Close the pooled item and article sessions, and the fetchers."""
+        for session in (self.session, self.article_session):
+            if session is not None:
+                await session.close()
+        for fetcher in self.fetchers:
+            await fetcher.close()
+        self.session = None
+        self.article_session = None
+
+    def _item_batch(self) -> AbstractContextManager[None]:
+        """Commit the items cached inside the block to disk together."""
+        return self.item_cache.batch() if self.item_cache else nullcontext()
+
+    async def _fetch_item(self, item_id: int) -> bytes:
+        """Raw JSON response for an item, which may be null or invalid."""
+        session = self._get_session()
+        async with session.get(f"{self.item_url}/{item_id}.json") as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def _get_item(self, item_id: int, model: type[ItemModel]) -> ItemModel:
+        """Fetch an item through the cache and the pooled session."""
+        if self.item_cache:
+            cached = self.item_cache.get(item_id, model)
+            if cached is not None:
+                return cached
+
+        raw = await self._fetch_item(item_id)
+        item = model.model_validate_json(raw)
+        if self.item_cache:
+            self.item_cache.put(item_id, raw, item)
+        return item
 
     async def get_list_of_stories(self) -> list[int]:
         """Get the list of top story IDs from HackerNews."""
         async with aiohttp.ClientSession() as session:
             async with session.get(STORIES_URL) as response:
                 response.raise_for_status()
-                all_ids = await response.json()
-                story_ids = StoryIds(root=all_ids)
+                story_ids = StoryIds.model_validate_json(await response.read())
                 return story_ids.root
 
     async def get_story_detail(self, story_id: int) -> HackerNewsStory:
         """Get detailed information for a specific story."""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ITEM_URL_BASE}/{story_id}.json") as response:
-                response.raise_for_status()
-                data = await response.json()
-                return HackerNewsStory.model_validate(data)
+        return await self._get_item(story_id, HackerNewsStory)
 
-    async def get_story_markdown(self, story: HackerNewsStory) -> str:
-        """Fetch story content and convert to markdown."""
+    async def get_story_details(self, story_ids: list[int]) -> list[HackerNewsStory]:
+        """Get details for a batch of stories, skipping items that are not stories.
+
+        Deleted items and other records missing story fields fail validation
+        and are dropped; network errors are raised so the batch is retried,
+        which is cheap because completed items are served from the cache.
+        """
+        with self._item_batch():
+            results = await asyncio.gather(
+                *(self.get_story_detail(story_id) for story_id in story_ids),
+                return_exceptions=True,
+            )
+        stories: list[HackerNewsStory] = []
+        for story_id, result in zip(story_ids, results):
+            if isinstance(result, ValidationError):
+                logging.info(f"Skipping item {story_id}: not a valid story")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                stories.append(result)
+        return stories
+
+    async def _walk_comments(
+        self, story: HackerNewsStory
+    ) -> tuple[list[HackerNewsComment], bool]:
+        """Fetch comments breadth-first, reporting whether the walk finished."""
+        limits = self.comment_limits
+        story_slots = asyncio.Semaphore(limits.story_concurrency)
+        comments: list[HackerNewsComment] = []
+
+        async def fetch(comment_id: int) -> HackerNewsComment:
+            # Queue within the story first, so waiting requests don't hold
+            # slots other stories could use
+            async with story_slots, self.comment_slots:
+                return await self._get_item(comment_id, HackerNewsComment)
+
+        level = list(story.kids or [])
+        depth = 1
+        try:
+            async with asyncio.timeout(limits.deadline):
+                while level and depth <= limits.max_depth:
+                    next_level: list[int] = []
+                    # Fetch only as many comments as could still be kept
+                    while level and len(comments) < limits.max_comments:
+                        chunk = level[: limits.max_comments - len(comments)]
+                        level = level[len(chunk) :]
+                        with self._item_batch():
+                            results = await asyncio.gather(
+                                *(fetch(comment_id) for comment_id in chunk),
+                                return_exceptions=True,
+                            )
+                        for comment_id, result in zip(chunk, results):
+                            if isinstance(result, BaseException):
+                                logging.info(f"Skipping comment {comment_id}: {result}")
+                            elif result.text and not (result.dead or result.deleted):
+                                comments.append(result)
+                                next_level.extend(result.kids)
+                    level = next_level
+                    depth += 1
+        except TimeoutError:
+            logging.info(
+                f"Comment deadline reached for story {story.id} "
+                f"after {len(comments)} comments"
+            )
+            return comments, False
+        return comments, True
+
+    async def get_comment_thread(
+        self, story: HackerNewsStory
+    ) -> list[HackerNewsComment]:
+        """Fetch a story's comments breadth-first within the comment limits.
+
+        Each level of the tree is fetched concurrently, bounded by both the
+        client-wide and the per-story limits. Dead, deleted and unreadable
+        comments are skipped along with their replies. When the deadline
+        passes, the comments gathered so far are returned.
+        """
+        comments, _ = await self._walk_comments(story)
+        return comments
+
+    async def get_top_comments(self, story: HackerNewsStory) -> list[str]:
+        """Get a story's top comments as plain text, ready for summarizing.
+
+        Complete threads are remembered until the story's comment count
+        changes; the items themselves are served from the item cache.
+        """
+        key = (story.id, story.descendants or 0)
+        if key in self.threads:
+            self.threads.move_to_end(key)
+            return self.threads[key]
+
+        thread, complete = await self._walk_comments(story)
+        comments = [comment_text(comment) for comment in thread]
+        if complete:
+            self.threads[key] = comments
+            while len(self.threads) > THREAD_CACHE_SIZE:
+                self.threads.popitem(last=False)
+        return comments
+
+    async def _attempt(
+        self,
+        fetcher: Fetcher,
+        url: str,
+        timeout: float,
+        give_up_at: Optional[float] = None,
+    ) -> tuple[str, int]:
+        """Run one fetcher within its budget, raising ArticleFetchError.
+
+        Waiting for the byte budget doesn't count towards `timeout`, so only
+        time spent on the site can make it a timeout. Nothing, that wait
+        included, runs past `give_up_at` in event loop time.
+        """
+        session = self._get_article_session()
+        try:
+            async with asyncio.timeout_at(give_up_at):
+                try:
+                    async with asyncio.timeout(timeout) as deadline:
+                        return await fetcher.fetch(
+                            session, url, self.byte_budget, deadline
+                        )
+                except ArticleFetchError:
+                    raise
+                except TimeoutError as e:
+                    detail = f"{fetcher.name} took over {timeout:.1f}s"
+                    raise ArticleFetchError(TIMEOUT, detail, True) from e
+                except Exception as e:
+                    raise ArticleFetchError(HTTP_ERROR, str(e), True) from e
+        except TimeoutError as e:
+            detail = f"out of time running {fetcher.name}"
+            raise ArticleFetchError(OUT_OF_TIME, detail, domain_failure=False) from e
+
+    async def get_story_content(
+        self, story: HackerNewsStory, time_left: Optional[float] = None
+    ) -> StoryContent:
+        """Fetch a story's article through the fetcher chain.
+
+        Fetchers are tried in order until one returns text, each within its
+        own timeout and all within the total article timeout. Each request
+        goes through the circuit breaker of the host it is sent to. URLs
+        that recently failed every fetcher are skipped without a request,
+        and fetched articles are remembered by URL. `time_left` bounds the
+        whole fetch, including waits for the byte budget.
+        """
         if not story.url:
-            return ""
+            return StoryContent(markdown="")
+        url = story.url
+
+        if url in self.contents:
+            self.contents.move_to_end(url)
+            return replace(self.contents[url], cached=True)
+        reason = self.negative_cache.get(url)
+        if reason is not None:
+            logging.info(f"Skipping markdown for {story.title}: {reason}")
+            return StoryContent(markdown="", cached=True)
 
         logging.info(f"Fetching markdown for story: {story.title}")
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        }
+        started = time.monotonic()
+        deadline = started + self.article_timeouts.total
+        give_up_at = None
+        if time_left is not None:
+            give_up_at = asyncio.get_running_loop().time() + time_left
+        failures: list[ArticleFetchError] = []
+        for fetcher in self.fetchers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not fetcher.applies(url, failures):
+                continue
+            target = fetcher.target(url)
+            breaker = self.breakers.for_url(target)
+            if not breaker.allow():
+                host = self.breakers.host(target)
+                failures.append(
+                    ArticleFetchError(CIRCUIT_OPEN, f"{host} circuit open", False)
+                )
+                continue
 
-        async with aiohttp.ClientSession() as session:
+            stats = self.fetch_stats.setdefault(fetcher.name, StrategyStats())
+            stats.attempts += 1
+            attempt_started = time.monotonic()
             try:
-                async with session.get(story.url, headers=headers) as response:
-                    response.raise_for_status()
-                    html = await response.text()
-                    return html2text.html2text(html)
-            except Exception as e:
-                logging.error(f"Failed to fetch markdown for {story.title}: {e}")
-                return ""
+                markdown, size = await self._attempt(
+                    fetcher, target, min(fetcher.timeout, remaining), give_up_at
+                )
+            except ArticleFetchError as e:
+                stats.seconds += time.monotonic() - attempt_started
+                if e.reason == OUT_OF_TIME:
+                    # Running out of time says nothing about the site
+                    breaker.release()
+                    failures.append(e)
+                    break
+                if e.domain_failure:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                failures.append(e)
+                logging.info(f"{fetcher.name} fetch failed for {story.title}: {e}")
+                continue
+            except asyncio.CancelledError:
+                # A cancelled request says nothing about the site
+                breaker.release()
+                raise
+
+            breaker.record_success()
+            stats.successes += 1
+            stats.size_bytes += size
+            stats.seconds += time.monotonic() - attempt_started
+            content = StoryContent(
+                markdown=markdown,
+                strategy=fetcher.name,
+                size_bytes=size,
+                seconds=time.monotonic() - started,
+            )
+            self.contents[url] = content
+            while len(self.contents) > CONTENT_CACHE_SIZE:
+                self.contents.popitem(last=False)
+            return content
+
+        # Skipped sites are retried once their circuit closes, not cached
+        cacheable = [e for e in failures if e.reason not in (CIRCUIT_OPEN, OUT_OF_TIME)]
+        if cacheable:
+            self.negative_cache.put(url, cacheable[0].reason)
+        detail = failures[0] if failures else "out of time"
+        logging.error(f"Failed to fetch markdown for {story.title}: {detail}")
+        return StoryContent(markdown="", seconds=time.monotonic() - started)
+
+    async def get_story_markdown(self, story: HackerNewsStory) -> str:
+        """Fetch story content and convert to markdown."""
+        content = await self.get_story_content(story)
+        return content.markdown
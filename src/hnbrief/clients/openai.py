@@ -1,14 +1,57 @@
-from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
+import asyncio
+import importlib.util
 import logging
+import time
+import httpx
 import poml  # type: ignore[import-untyped]
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion
 
+from hnbrief.clients.artifacts import ArtifactRef
 from hnbrief.config import get_openai_config, OpenAIConfig
 
+# Minimum number of latency samples before the hedge delay follows the percentile
+MIN_LATENCY_SAMPLES = 20
+
+# Connections to the API when neither the config nor the worker sizes the pool.
+# httpcore checks every pooled connection against the others on each request,
+# so a pool much larger than the concurrency it serves costs more than it saves
+DEFAULT_MAX_CONNECTIONS = 32
+
+# HTTP/2 needs the optional h2 package, installed by the http2 extra
+HAS_H2 = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the API for a completion.
+
+    Also records the model that answered and the seconds spent waiting for
+    it, including failed attempts and hedges.
+    """
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model: str = ""
+    seconds: float = 0.0
+
+    @classmethod
+    def from_response(
+        cls, response: ChatCompletion, model: str = "", seconds: float = 0.0
+    ) -> "TokenUsage":
+        usage = getattr(response, "usage", None)
+        if not isinstance(usage, CompletionUsage):
+            return cls(model=model, seconds=seconds)
+        return cls(usage.prompt_tokens, usage.completion_tokens, model, seconds)
+
 
 @dataclass
 class StorySummary:
@@ -17,72 +60,433 @@ class StorySummary:
     title: str
     url: Optional[str]
     text: str
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    # Set when the worker moved `text` to the artifact store, leaving it empty
+    artifact: Optional[ArtifactRef] = None
+
+
+@dataclass
+class StoryCluster:
+    """Related story summaries the brief presents together."""
+
+    summaries: list[StorySummary]
+    keywords: list[str] = field(default_factory=list)
+    # URLs of near-duplicate stories folded into this cluster's summaries
+    duplicate_urls: list[str] = field(default_factory=list)
+
+
+@dataclass
+class DailyBrief:
+    """Data object for the generated brief and the tokens it used."""
+
+    text: str
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    # Set when the worker moved `text` to the artifact store, leaving it empty
+    artifact: Optional[ArtifactRef] = None
+
+
+@dataclass
+class ModelEndpoint:
+    """A model served by a specific OpenAI-compatible endpoint."""
+
+    model: str
+    client: AsyncOpenAI
+
+
+def prompt_fields(items: list[tuple[str, Any]]) -> dict[str, Any]:
+    """Dict factory that keeps bookkeeping fields out of prompt context."""
+    return {key: value for key, value in items if key != "usage"}
+
+
+def create_http_client(config: OpenAIConfig, max_connections: int) -> httpx.AsyncClient:
+    """Pooled HTTP client shared by every endpoint of an OpenAIClient.
+
+    Every connection of the pool is kept alive between requests, so a burst
+    of summaries reuses warm connections instead of opening new ones.
+    """
+    if config.http2 and not HAS_H2:
+        logging.warning("OPENAI_HTTP2 needs the http2 extra; using HTTP/1.1")
+    return DefaultAsyncHttpxClient(
+        http2=config.http2 and HAS_H2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+        ),
+        # Attempts are bounded by their own deadlines; these only catch
+        # requests stuck connecting or waiting for a free connection
+        timeout=httpx.Timeout(
+            max(config.summarize_attempt_timeout, config.daily_brief_attempt_timeout),
+            connect=config.http_connect_timeout,
+            pool=config.http_pool_timeout,
+        ),
+    )
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th quantile, or None until enough samples exist."""
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+@dataclass
+class RenderStats:
+    """Timings of the prompt renders of one template."""
+
+    renders: int = 0
+    # Seconds spent rendering, and waiting for a free render worker
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    wait_seconds: float = 0.0
+
+
+class PromptRenderer:
+    """Renders POML templates on a small thread pool.
+
+    `poml.poml` runs the template through a Node.js process and blocks for
+    the whole render, so calling it from a coroutine stalls every other
+    request on the event loop. Renders run on at most `workers` threads
+    instead; the prompt context is also built there, since serializing
+    hundreds of summaries for the brief is not free either.
+    """
+
+    def __init__(self, prompts_dir: Path, workers: int = 4) -> None:
+        self.prompts_dir = prompts_dir
+        self.workers = workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.stats: dict[str, RenderStats] = {}
+
+    def _render(
+        self, template: str, build_context: Callable[[], dict[str, Any]], queued: float
+    ) -> dict[str, Any]:
+        started = time.monotonic()
+        params: dict[str, Any] = poml.poml(
+            str(self.prompts_dir / f"{template}.poml"),
+            format="openai_chat",
+            context=build_context(),
+        )
+        seconds = time.monotonic() - started
+        stats = self.stats.setdefault(template, RenderStats())
+        stats.renders += 1
+        stats.seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        stats.wait_seconds += started - queued
+        logging.debug(f"Rendered prompt {template} in {seconds:.3f}s")
+        return params
+
+    async def render(
+        self, template: str, build_context: Callable[[], dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Render a template to OpenAI chat parameters off the event loop."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="prompt-render"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._render, template, build_context, time.monotonic()
+        )
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
 
 
 class OpenAIClient:
     """Client for interacting with OpenAI API."""
 
-    def __init__(self, base_url: str, api_key: str) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        config: Optional[OpenAIConfig] = None,
+        max_connections: Optional[int] = None,
+    ) -> None:
+        # Get config for model settings
+        self.config: OpenAIConfig = config or get_openai_config()
+
+        # One connection pool for the primary and fallback endpoints, sized
+        # by the config or else by the caller's expected concurrency
+        pool_size = (
+            self.config.http_max_connections
+            or max_connections
+            or DEFAULT_MAX_CONNECTIONS
+        )
+        self.http_client = create_http_client(self.config, pool_size)
+        # Requests beyond the pool size wait here rather than in httpcore,
+        # which rescans its whole queue against every connection whenever a
+        # request starts or finishes
+        self.request_slots = asyncio.Semaphore(pool_size)
         self.client = AsyncOpenAI(
             base_url=base_url,
             api_key=api_key,
+            http_client=self.http_client,
         )
 
         # POML template paths
         self.prompts_dir = Path(__file__).parent.parent / "prompts"
 
-        # Get config for model settings
-        self.config: OpenAIConfig = get_openai_config()
+        self.fallback_client: Optional[AsyncOpenAI] = None
+        self.summarize_latency = LatencyTracker()
+        self.prompts = PromptRenderer(self.prompts_dir, self.config.prompt_workers)
+
+    async def close(self) -> None:
+        """Close the connection pool and stop the prompt render workers."""
+        await self.http_client.aclose()
+        self.prompts.close()
+
+    def _get_fallback_client(self) -> AsyncOpenAI:
+        """Client for fallback models, sharing the primary unless configured."""
+        if self.fallback_client is None:
+            if self.config.fallback_base_url or self.config.fallback_api_key:
+                self.fallback_client = AsyncOpenAI(
+                    base_url=self.config.fallback_base_url or self.client.base_url,
+                    api_key=self.config.fallback_api_key or self.client.api_key,
+                    http_client=self.http_client,
+                )
+            else:
+                self.fallback_client = self.client
+        return self.fallback_client
+
+    def _cascade(self, primary_model: str) -> list[ModelEndpoint]:
+        """Build the ordered list of endpoints to try for a request."""
+        cascade = [ModelEndpoint(primary_model, self.client)]
+        for model in self.config.fallback_models:
+            cascade.append(ModelEndpoint(model, self._get_fallback_client()))
+        return cascade
+
+    def _hedge_delay(self) -> float:
+        """Delay before hedging a summary request, following observed latency."""
+        observed = self.summarize_latency.percentile(self.config.hedge_percentile)
+        return observed if observed is not None else self.config.hedge_delay
+
+    async def _attempt(
+        self,
+        endpoint: ModelEndpoint,
+        params: dict[str, Any],
+        timeout: float,
+        latency: Optional[LatencyTracker],
+        started: asyncio.Event,
+        deadline: Optional[float] = None,
+    ) -> tuple[ChatCompletion, str]:
+        """Run a single completion attempt with its own deadline.
+
+        The deadline starts once the attempt has a free connection, and
+        `started` is set then. Neither the wait for a connection nor the
+        attempt runs past the overall `deadline`, in event loop time.
+        Returns the response and its model.
+        """
+        async with asyncio.timeout_at(deadline):
+            await self.request_slots.acquire()
+        try:
+            started.set()
+            if deadline is not None:
+                timeout = min(timeout, deadline - asyncio.get_running_loop().time())
+            began = time.monotonic()
+            response: ChatCompletion = await asyncio.wait_for(
+                endpoint.client.chat.completions.create(**params, model=endpoint.model),
+                timeout=timeout,
+            )
+            if latency is not None:
+                latency.record(time.monotonic() - began)
+            return response, endpoint.model
+        finally:
+            self.request_slots.release()
+
+    async def _complete(
+        self,
+        params: dict[str, Any],
+        cascade: list[ModelEndpoint],
+        timeout: float,
+        hedge_after: Optional[float] = None,
+        latency: Optional[LatencyTracker] = None,
+        time_left: Optional[float] = None,
+    ) -> tuple[ChatCompletion, str]:
+        """Complete a chat request, walking the cascade on failure.
+
+        When `hedge_after` is set and an attempt is still running that many
+        seconds after it got a connection, the next endpoint is started
+        alongside it and the first successful response wins. Time queued
+        for a connection neither fires hedges nor counts towards attempt
+        deadlines. `time_left` bounds the whole request, queueing included:
+        attempts are cut short at it and no fallback starts after it.
+        Returns the response and the model that produced it.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_left if time_left is not None else None
+        remaining = list(cascade)
+        pending: set[asyncio.Task[tuple[ChatCompletion, str]]] = set()
+        errors: list[BaseException] = []
+        hedge_timer: Optional[asyncio.Task[None]] = None
+
+        def launch() -> asyncio.Event:
+            endpoint = remaining.pop(0)
+            started = asyncio.Event()
+            pending.add(
+                asyncio.create_task(
+                    self._attempt(endpoint, params, timeout, latency, started, deadline)
+                )
+            )
+            return started
+
+        def expired() -> bool:
+            return deadline is not None and loop.time() >= deadline
+
+        async def hedge_clock(started: asyncio.Event, delay: float) -> None:
+            await started.wait()
+            await asyncio.sleep(delay)
+
+        started = launch()
+        try:
+            while pending:
+                if hedge_after is not None and remaining and hedge_timer is None:
+                    hedge_timer = asyncio.create_task(hedge_clock(started, hedge_after))
+                waiting: set[asyncio.Future[Any]] = set(pending)
+                if hedge_timer is not None:
+                    waiting.add(hedge_timer)
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                if hedge_timer in done:
+                    hedge_timer = None
+                    if not expired():
+                        logging.info("Hedging slow completion request")
+                        started = launch()
+                    continue
+
+                for task in pending & done:
+                    pending.discard(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(error)
+
+                if not pending and remaining and not expired():
+                    # A fresh attempt gets a fresh hedge clock
+                    if hedge_timer is not None:
+                        hedge_timer.cancel()
+                        hedge_timer = None
+                    started = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if hedge_timer is not None:
+                hedge_timer.cancel()
+
+        raise errors[-1]
 
     async def summarize_story(
-        self, title: str, url: Optional[str], markdown: str
+        self,
+        title: str,
+        url: Optional[str],
+        markdown: str,
+        comments: Optional[list[str]] = None,
+        time_left: Optional[float] = None,
     ) -> StorySummary:
-        """Summarize a story using OpenAI."""
+        """Summarize a story, and its top comments when given, using OpenAI.
+
+        `time_left` is the number of seconds the whole cascade may take.
+        """
         if not markdown:
             return StorySummary(title=title, url=url or "", text="")
 
         try:
             # Use POML template for story summarization
-            template_path = self.prompts_dir / "story_summary.poml"
-            params = poml.poml(
-                str(template_path),
-                format="openai_chat",
-                context={"title": title, "markdown": markdown},
+            params = await self.prompts.render(
+                "story_summary",
+                lambda: {
+                    "title": title,
+                    "markdown": markdown,
+                    "comments": comments or [],
+                },
             )
 
-            response = await self.client.chat.completions.create(
-                **params, model=self.config.summarize_model
-            )  # pyright: ignore[reportCallIssue]
+            started = time.monotonic()
+            response, model = await self._complete(
+                params,
+                self._cascade(self.config.summarize_model),
+                timeout=self.config.summarize_attempt_timeout,
+                hedge_after=self._hedge_delay(),
+                latency=self.summarize_latency,
+                time_left=time_left,
+            )
 
             summary_text = response.choices[0].message.content or ""
-            return StorySummary(title=title, url=url, text=summary_text)
+            return StorySummary(
+                title=title,
+                url=url,
+                text=summary_text,
+                usage=TokenUsage.from_response(
+                    response, model, time.monotonic() - started
+                ),
+            )
         except Exception as e:
             logging.error(f"Failed to summarize story '{title}': {e}")
             return StorySummary(title=title, url=url, text="")
 
-    async def create_daily_brief(self, summaries: list[StorySummary]) -> str:
-        """Create a daily brief from story summaries."""
+    async def create_daily_brief(
+        self,
+        summaries: list[StorySummary],
+        clusters: Optional[list[StoryCluster]] = None,
+        prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        brief_date: Optional[str] = None,
+        time_left: Optional[float] = None,
+    ) -> DailyBrief:
+        """Create a daily brief from story summaries.
+
+        When `clusters` is given, stories are presented in those topic
+        groups; otherwise each story forms its own group. `prompt` names an
+        alternative template in the prompts directory and `model` overrides
+        the configured brief model. `brief_date` dates a brief for a past
+        day instead of today. `time_left` is the number of seconds the
+        whole cascade may take.
+        """
         if not summaries:
-            return "No stories to summarize."
+            return DailyBrief(text="No stories to summarize.")
+        if clusters is None:
+            clusters = [StoryCluster(summaries=[summary]) for summary in summaries]
 
         try:
             # Use POML template for daily brief creation
-            template_path = self.prompts_dir / "daily_brief.poml"
-            current_date = datetime.now().strftime("%B %d, %Y")
-            params = poml.poml(
-                str(template_path),
-                format="openai_chat",
-                context={
-                    "summaries": [asdict(summary) for summary in summaries],
+            current_date = brief_date or datetime.now().strftime("%B %d, %Y")
+            params = await self.prompts.render(
+                prompt or "daily_brief",
+                lambda: {
+                    "clusters": [
+                        asdict(cluster, dict_factory=prompt_fields)
+                        for cluster in clusters
+                    ],
                     "current_date": current_date,
                 },
             )
 
-            response = await self.client.chat.completions.create(
-                **params, model=self.config.daily_brief_model
-            )  # pyright: ignore[reportCallIssue]
+            started = time.monotonic()
+            response, used_model = await self._complete(
+                params,
+                self._cascade(model or self.config.daily_brief_model),
+                timeout=self.config.daily_brief_attempt_timeout,
+                time_left=time_left,
+            )
 
-            return response.choices[0].message.content or ""
+            return DailyBrief(
+                text=response.choices[0].message.content or "",
+                usage=TokenUsage.from_response(
+                    response, used_model, time.monotonic() - started
+                ),
+            )
         except Exception as e:
             logging.error(f"Failed to generate daily brief: {e}")
-            return "Failed to generate daily brief."
+            return DailyBrief(text="Failed to generate daily brief.")
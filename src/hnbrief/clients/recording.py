@@ -0,0 +1,314 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from hnbrief.clients.cache import ItemModel
+from hnbrief.clients.fetchers import StoryContent
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+from hnbrief.clients.openai import (
+    DailyBrief,
+    OpenAIClient,
+    StoryCluster,
+    StorySummary,
+    TokenUsage,
+)
+from hnbrief.config import OpenAIConfig
+
+
+class ReplayMissError(LookupError):
+    """Raised when a replayed request was never recorded."""
+
+
+@dataclass
+class Recording:
+    """A recorded response and how long the original request took."""
+
+    value: Any
+    latency: float
+
+
+class Archive:
+    """Compact on-disk archive of recorded client responses.
+
+    Stored as gzip-compressed JSON lines, one response per line, keyed by the
+    kind of request and a stable key for its input.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: dict[tuple[str, str], Recording] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Archive":
+        archive = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+            for line in archive_file:
+                entry = json.loads(line)
+                archive.entries[(entry["kind"], entry["key"])] = Recording(
+                    value=entry["value"], latency=entry["latency"]
+                )
+        return archive
+
+    def put(self, kind: str, key: str, value: Any, latency: float) -> None:
+        self.entries[(kind, key)] = Recording(value=value, latency=latency)
+
+    def get(self, kind: str, key: str) -> Recording:
+        try:
+            return self.entries[(kind, key)]
+        except KeyError:
+            raise ReplayMissError(f"No recorded {kind} response for {key}") from None
+
+    async def replay(self, kind: str, key: str, with_latency: bool = False) -> Any:
+        """Return a recorded value, optionally after its recorded latency."""
+        recording = self.get(kind, key)
+        if with_latency:
+            await asyncio.sleep(recording.latency)
+        return recording.value
+
+    def save(self) -> None:
+        """Atomically write every recorded response to the archive file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".archive.")
+        with os.fdopen(fd, "wb") as raw_file:
+            with gzip.open(raw_file, "wt", encoding="utf-8") as archive_file:
+                for (kind, key), recording in self.entries.items():
+                    entry = {
+                        "kind": kind,
+                        "key": key,
+                        "latency": round(recording.latency, 4),
+                        "value": recording.value,
+                    }
+                    archive_file.write(json.dumps(entry, separators=(",", ":")))
+                    archive_file.write("\n")
+        os.replace(tmp_path, self.path)
+        logging.info(f"Saved {len(self.entries)} recordings to {self.path}")
+
+
+def content_key(*parts: Optional[str]) -> str:
+    """Stable key for requests identified by their full input."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def summaries_key(
+    summaries: list[StorySummary],
+    clusters: Optional[list[StoryCluster]] = None,
+    prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    brief_date: Optional[str] = None,
+) -> str:
+    parts = [f"{s.title}\n{s.url}\n{s.text}" for s in summaries]
+    for cluster in clusters or []:
+        titles = "\n".join(summary.title for summary in cluster.summaries)
+        parts.append(f"{titles}\n{cluster.keywords}\n{cluster.duplicate_urls}")
+    if prompt or model:
+        parts.append(f"{prompt}\n{model}")
+    if brief_date:
+        parts.append(brief_date)
+    return content_key(*parts)
+
+
+class RecordingHackerNewsClient(HackerNewsClient):
+    """HackerNews client that records every response it returns."""
+
+    def __init__(self, archive: Archive, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.archive = archive
+
+    async def get_list_of_stories(self) -> list[int]:
+        started = time.monotonic()
+        story_ids = await super().get_list_of_stories()
+        self.archive.put("topstories", "", story_ids, time.monotonic() - started)
+        return story_ids
+
+    async def _fetch_item(self, item_id: int) -> bytes:
+        # Raw responses are kept, so null and invalid items are skipped the
+        # same way on replay
+        started = time.monotonic()
+        raw = await super()._fetch_item(item_id)
+        self.archive.put(
+            "raw_item", str(item_id), raw.decode("utf-8"), time.monotonic() - started
+        )
+        return raw
+
+    async def _get_item(self, item_id: int, model: type[ItemModel]) -> ItemModel:
+        item = await super()._get_item(item_id, model)
+        # Items served from the item cache were never fetched by this run
+        if ("raw_item", str(item_id)) not in self.archive.entries and self.item_cache:
+            raw = self.item_cache.raw(item_id)
+            if raw is not None:
+                self.archive.put("raw_item", str(item_id), raw.decode("utf-8"), 0.0)
+        return item
+
+    async def get_story_content(
+        self, story: HackerNewsStory, time_left: Optional[float] = None
+    ) -> StoryContent:
+        started = time.monotonic()
+        content = await super().get_story_content(story, time_left)
+        self.archive.put(
+            "content",
+            story.url or str(story.id),
+            asdict(content),
+            time.monotonic() - started,
+        )
+        return content
+
+    async def get_top_comments(self, story: HackerNewsStory) -> list[str]:
+        started = time.monotonic()
+        comments = await super().get_top_comments(story)
+        self.archive.put(
+            "comments", str(story.id), comments, time.monotonic() - started
+        )
+        return comments
+
+
+class ReplayHackerNewsClient(HackerNewsClient):
+    """HackerNews client that serves recorded responses without the network."""
+
+    def __init__(self, archive: Archive, replay_latency: bool = False) -> None:
+        super().__init__()
+        self.archive = archive
+        self.replay_latency = replay_latency
+
+    async def get_list_of_stories(self) -> list[int]:
+        return list(await self.archive.replay("topstories", "", self.replay_latency))
+
+    async def _fetch_item(self, item_id: int) -> bytes:
+        key = str(item_id)
+        if ("raw_item", key) not in self.archive.entries:
+            if ("item", key) in self.archive.entries:
+                # Archives recorded before raw items hold validated stories
+                value = await self.archive.replay("item", key, self.replay_latency)
+                return json.dumps(value).encode("utf-8")
+        raw = await self.archive.replay("raw_item", key, self.replay_latency)
+        return str(raw).encode("utf-8")
+
+    async def get_story_content(
+        self, story: HackerNewsStory, time_left: Optional[float] = None
+    ) -> StoryContent:
+        key = story.url or str(story.id)
+        if ("content", key) not in self.archive.entries:
+            # Archives recorded before fetch strategies only hold markdown
+            markdown = await self.archive.replay("markdown", key, self.replay_latency)
+            return StoryContent(markdown=str(markdown))
+        value = await self.archive.replay("content", key, self.replay_latency)
+        return StoryContent(**value)
+
+    async def get_top_comments(self, story: HackerNewsStory) -> list[str]:
+        return list(
+            await self.archive.replay("comments", str(story.id), self.replay_latency)
+        )
+
+
+class RecordingOpenAIClient(OpenAIClient):
+    """OpenAI client that records every summary and brief it returns."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        archive: Archive,
+        config: Optional[OpenAIConfig] = None,
+        max_connections: Optional[int] = None,
+    ) -> None:
+        super().__init__(base_url, api_key, config, max_connections)
+        self.archive = archive
+
+    async def summarize_story(
+        self,
+        title: str,
+        url: Optional[str],
+        markdown: str,
+        comments: Optional[list[str]] = None,
+        time_left: Optional[float] = None,
+    ) -> StorySummary:
+        started = time.monotonic()
+        summary = await super().summarize_story(
+            title, url, markdown, comments, time_left
+        )
+        self.archive.put(
+            "summary",
+            content_key(title, url, markdown, *(comments or [])),
+            asdict(summary),
+            time.monotonic() - started,
+        )
+        return summary
+
+    async def create_daily_brief(
+        self,
+        summaries: list[StorySummary],
+        clusters: Optional[list[StoryCluster]] = None,
+        prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        brief_date: Optional[str] = None,
+        time_left: Optional[float] = None,
+    ) -> DailyBrief:
+        started = time.monotonic()
+        brief = await super().create_daily_brief(
+            summaries, clusters, prompt, model, brief_date, time_left
+        )
+        self.archive.put(
+            "brief",
+            summaries_key(summaries, clusters, prompt, model, brief_date),
+            asdict(brief),
+            time.monotonic() - started,
+        )
+        return brief
+
+
+class ReplayOpenAIClient(OpenAIClient):
+    """OpenAI client that serves recorded responses without the network.
+
+    No API key is needed since no request is ever sent.
+    """
+
+    def __init__(self, archive: Archive, replay_latency: bool = False) -> None:
+        config = OpenAIConfig.model_validate({"OPENROUTER_API_KEY": "replay"})
+        super().__init__(config.openai_base_url, "replay", config=config)
+        self.archive = archive
+        self.replay_latency = replay_latency
+
+    async def summarize_story(
+        self,
+        title: str,
+        url: Optional[str],
+        markdown: str,
+        comments: Optional[list[str]] = None,
+        time_left: Optional[float] = None,
+    ) -> StorySummary:
+        value = dict(
+            await self.archive.replay(
+                "summary",
+                content_key(title, url, markdown, *(comments or [])),
+                self.replay_latency,
+            )
+        )
+        usage = TokenUsage(**value.pop("usage", {}))
+        return StorySummary(**value, usage=usage)
+
+    async def create_daily_brief(
+        self,
+        summaries: list[StorySummary],
+        clusters: Optional[list[StoryCluster]] = None,
+        prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        brief_date: Optional[str] = None,
+        time_left: Optional[float] = None,
+    ) -> DailyBrief:
+        value = await self.archive.replay(
+            "brief",
+            summaries_key(summaries, clusters, prompt, model, brief_date),
+            self.replay_latency,
+        )
+        return DailyBrief(text=value["text"], usage=TokenUsage(**value["usage"]))
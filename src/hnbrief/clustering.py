@@ -0,0 +1,125 @@
+"""Offline topic clustering and near-duplicate detection for story summaries.
+
+Summaries are embedded as hashed TF-IDF vectors, so no model or vocabulary
+has to be fitted or downloaded, and compared with a single matrix product.
+"""
+
+import re
+import zlib
+
+import numpy as np
+import numpy.typing as npt
+
+from hnbrief.clients.openai import StoryCluster, StorySummary
+
+# Hashed feature space; collisions only slightly blur similarity at this size
+N_FEATURES = 2**14
+# Keywords reported for each cluster
+N_KEYWORDS = 3
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOP_WORDS = frozenset(
+    "a about after all also an and any are as at be been but by can could do "
+    "does for from has have how in into is it its it's more most new not now "
+    "of on one or other our over so some than that the their them then there "
+    "these they this those through to up use used uses using was we were what "
+    "when which while who will with would you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stop words or single characters."""
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def feature_index(token: str) -> int:
+    """Stable hash bucket for a token, independent of PYTHONHASHSEED."""
+    return zlib.crc32(token.encode("utf-8")) % N_FEATURES
+
+
+def vectorize(
+    documents: list[str],
+) -> tuple[npt.NDArray[np.float32], dict[int, str]]:
+    """Embed documents as L2-normalized hashed TF-IDF rows.
+
+    Returns the matrix and a bucket-to-token map used to name clusters.
+    """
+    counts = np.zeros((len(documents), N_FEATURES), dtype=np.float32)
+    names: dict[int, str] = {}
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        buckets = np.fromiter(map(feature_index, tokens), dtype=np.intp)
+        counts[row] = np.bincount(buckets, minlength=N_FEATURES)
+        for token, bucket in zip(tokens, buckets.tolist()):
+            # Bare numbers help match duplicates but make poor cluster names
+            if not token.isdigit():
+                names.setdefault(bucket, token)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    vectors = np.log1p(counts) * idf.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12), names
+
+
+def cluster_summaries(
+    summaries: list[StorySummary],
+    cluster_threshold: float = 0.2,
+    duplicate_threshold: float = 0.5,
+) -> list[StoryCluster]:
+    """Group related summaries and fold near-duplicates into one story.
+
+    Summaries are expected in rank order. Walking that order, a summary
+    absorbs later ones at or above `duplicate_threshold` cosine similarity
+    as duplicates, then each remaining summary not yet clustered leads a
+    cluster of the later ones at or above `cluster_threshold`. Clusters
+    keep the order of their highest ranked story.
+    """
+    if not summaries:
+        return []
+
+    documents = [f"{summary.title}\n{summary.text}" for summary in summaries]
+    vectors, names = vectorize(documents)
+    similarity = vectors @ vectors.T
+    count = len(summaries)
+    later = np.triu(np.ones((count, count), dtype=bool), k=1)
+
+    # Fold near-duplicates into the highest ranked copy of the story
+    duplicate_of = np.full(count, -1)
+    for index in range(count):
+        if duplicate_of[index] >= 0:
+            continue
+        matches = later[index] & (similarity[index] >= duplicate_threshold)
+        duplicate_of[matches & (duplicate_of < 0)] = index
+
+    # Greedy leader clustering over the remaining stories
+    leader_of = np.where(duplicate_of >= 0, -2, -1)
+    for index in range(count):
+        if leader_of[index] != -1:
+            continue
+        leader_of[index] = index
+        matches = later[index] & (similarity[index] >= cluster_threshold)
+        leader_of[matches & (leader_of == -1)] = index
+
+    clusters: list[StoryCluster] = []
+    for leader in np.flatnonzero(leader_of == np.arange(count)).tolist():
+        members = np.flatnonzero(leader_of == leader)
+        folded = np.flatnonzero(np.isin(duplicate_of, members))
+        centroid = vectors[np.concatenate([members, folded])].sum(axis=0)
+        present = np.flatnonzero(centroid > 0)
+        ranked = present[np.argsort(centroid[present])[::-1]].tolist()
+        keywords = [names[i] for i in ranked if i in names]
+        clusters.append(
+            StoryCluster(
+                summaries=[summaries[i] for i in members.tolist()],
+                keywords=keywords[:N_KEYWORDS],
+                duplicate_urls=[
+                    url for i in folded.tolist() if (url := summaries[i].url)
+                ],
+            )
+        )
+    return clusters
@@ -1,10 +1,11 @@
 """Configuration management for hnbrief application."""
 
 import sys
-from typing import Optional
+from pathlib import Path
+from typing import Annotated, Any, Literal, Optional
 
 from pydantic import Field, ValidationError, field_validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, NoDecode
 
 
 class TemporalConfig(BaseSettings):
@@ -30,6 +31,66 @@ class OpenAIConfig(BaseSettings):
         default="x-ai/grok-4-fast:free", validation_alias="DAILY_BRIEF_MODEL"
     )
 
+    fallback_models: Annotated[list[str], NoDecode] = Field(
+        default_factory=list, validation_alias="FALLBACK_MODELS"
+    )
+
+    fallback_base_url: Optional[str] = Field(
+        default=None, validation_alias="FALLBACK_BASE_URL"
+    )
+
+    fallback_api_key: Optional[str] = Field(
+        default=None, validation_alias="FALLBACK_API_KEY"
+    )
+
+    # Per-attempt deadlines, kept below the activity start_to_close timeouts
+    summarize_attempt_timeout: float = Field(
+        default=40.0, validation_alias="SUMMARIZE_ATTEMPT_TIMEOUT", gt=0, lt=60
+    )
+
+    daily_brief_attempt_timeout: float = Field(
+        default=100.0, validation_alias="DAILY_BRIEF_ATTEMPT_TIMEOUT", gt=0, lt=120
+    )
+
+    # Hedge delay used until enough latency samples exist to estimate the percentile
+    hedge_delay: float = Field(default=10.0, validation_alias="HEDGE_DELAY", gt=0)
+
+    hedge_percentile: float = Field(
+        default=0.9, validation_alias="HEDGE_PERCENTILE", gt=0, lt=1
+    )
+
+    # Connection pool to the API; unset sizes it to the worker's summarize
+    # concurrency
+    http_max_connections: Optional[int] = Field(
+        default=None, validation_alias="OPENAI_MAX_CONNECTIONS", ge=1
+    )
+
+    http_keepalive_expiry: float = Field(
+        default=60.0, validation_alias="OPENAI_KEEPALIVE_EXPIRY", ge=0
+    )
+
+    # Needs the http2 extra; falls back to HTTP/1.1 without it
+    http2: bool = Field(default=False, validation_alias="OPENAI_HTTP2")
+
+    http_connect_timeout: float = Field(
+        default=5.0, validation_alias="OPENAI_CONNECT_TIMEOUT", gt=0
+    )
+
+    # Seconds a request may wait for a free pooled connection
+    http_pool_timeout: float = Field(
+        default=30.0, validation_alias="OPENAI_POOL_TIMEOUT", gt=0
+    )
+
+    # Threads rendering POML prompts; each render runs a Node.js process
+    prompt_workers: int = Field(default=4, validation_alias="PROMPT_WORKERS", ge=1)
+
+    @field_validator("fallback_models", mode="before")
+    @classmethod
+    def split_models(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            return [model.strip() for model in v.split(",") if model.strip()]
+        return v
+
     @field_validator("openai_api_key")
     @classmethod
     def validate_openai_api_key(cls, v: Optional[str]) -> str:
@@ -47,6 +108,270 @@ class HackerNewsConfig(BaseSettings):
 
     max_stories: int = Field(default=35, validation_alias="MAX_STORIES", ge=1, le=500)
 
+    overfetch_factor: float = Field(
+        default=2.0, validation_alias="OVERFETCH_FACTOR", ge=1.0, le=10.0
+    )
+
+    deadline_seconds: Optional[float] = Field(
+        default=None, validation_alias="BRIEF_DEADLINE_SECONDS", gt=0
+    )
+
+    # Top stories summarized even after the deadline has passed
+    guaranteed_stories: int = Field(
+        default=0, validation_alias="GUARANTEED_STORIES", ge=0, le=500
+    )
+
+    # Task queue priority keys used for stories by rank; Temporal's default
+    # range is 1 to 5, and 1 gives every story the default priority
+    priority_levels: int = Field(
+        default=5, validation_alias="PRIORITY_LEVELS", ge=1, le=100
+    )
+
+    min_score: int = Field(default=0, validation_alias="MIN_SCORE", ge=0)
+
+    min_comments: int = Field(default=0, validation_alias="MIN_COMMENTS", ge=0)
+
+    max_age_hours: Optional[float] = Field(
+        default=None, validation_alias="MAX_AGE_HOURS", gt=0
+    )
+
+    blocked_domains: Annotated[list[str], NoDecode] = Field(
+        default_factory=list, validation_alias="BLOCKED_DOMAINS"
+    )
+
+    allowed_domains: Annotated[list[str], NoDecode] = Field(
+        default_factory=list, validation_alias="ALLOWED_DOMAINS"
+    )
+
+    # Base URL of HN items, e.g. a local mirror serving <url>/<id>.json
+    item_url: Optional[str] = Field(default=None, validation_alias="HN_ITEM_URL")
+
+    # Item cache used by the worker; unset ITEM_CACHE_PATH keeps it in memory only
+    item_cache_path: Optional[Path] = Field(
+        default=None, validation_alias="ITEM_CACHE_PATH"
+    )
+
+    item_cache_size: int = Field(
+        default=10_000, validation_alias="ITEM_CACHE_SIZE", ge=0
+    )
+
+    item_cache_ttl: float = Field(
+        default=300.0, validation_alias="ITEM_CACHE_TTL", ge=0
+    )
+
+    item_frozen_after_hours: float = Field(
+        default=14 * 24, validation_alias="ITEM_FROZEN_AFTER_HOURS", gt=0
+    )
+
+    item_cache_snapshot: Optional[Path] = Field(
+        default=None, validation_alias="ITEM_CACHE_SNAPSHOT"
+    )
+
+    # Summarize each story's top comments along with the article
+    include_comments: bool = Field(default=False, validation_alias="INCLUDE_COMMENTS")
+
+    comment_max_depth: int = Field(
+        default=2, validation_alias="COMMENT_MAX_DEPTH", ge=1
+    )
+
+    comment_max_count: int = Field(
+        default=20, validation_alias="COMMENT_MAX_COUNT", ge=1
+    )
+
+    # Comment requests in flight across all stories, and within one story
+    comment_concurrency: int = Field(
+        default=32, validation_alias="COMMENT_CONCURRENCY", ge=1
+    )
+
+    comment_story_concurrency: int = Field(
+        default=8, validation_alias="COMMENT_STORY_CONCURRENCY", ge=1
+    )
+
+    # Kept below the get_story_comments activity start_to_close timeout
+    comment_deadline_seconds: float = Field(
+        default=20.0, validation_alias="COMMENT_DEADLINE_SECONDS", gt=0, lt=60
+    )
+
+    # Article fetch timeouts, kept below the get_story_markdown activity timeout
+    article_connect_timeout: float = Field(
+        default=5.0, validation_alias="ARTICLE_CONNECT_TIMEOUT", gt=0
+    )
+
+    article_read_timeout: float = Field(
+        default=15.0, validation_alias="ARTICLE_READ_TIMEOUT", gt=0
+    )
+
+    article_total_timeout: float = Field(
+        default=30.0, validation_alias="ARTICLE_TOTAL_TIMEOUT", gt=0, lt=60
+    )
+
+    # Consecutive failures before a site's circuit opens, and seconds until
+    # a probe request is let through again
+    breaker_failure_threshold: int = Field(
+        default=3, validation_alias="BREAKER_FAILURE_THRESHOLD", ge=1
+    )
+
+    breaker_reset_seconds: float = Field(
+        default=300.0, validation_alias="BREAKER_RESET_SECONDS", gt=0
+    )
+
+    # URLs that recently failed; unset keeps them in memory only
+    negative_cache_path: Optional[Path] = Field(
+        default=None, validation_alias="NEGATIVE_CACHE_PATH"
+    )
+
+    # Largest article page downloaded, in bytes
+    article_max_bytes: int = Field(
+        default=5 * 1024 * 1024, validation_alias="ARTICLE_MAX_BYTES", ge=1
+    )
+
+    # Extract text from PDF stories (needs the "pdf" extra) in worker processes
+    pdf_extraction: bool = Field(default=True, validation_alias="PDF_EXTRACTION")
+
+    pdf_timeout: float = Field(default=20.0, validation_alias="PDF_TIMEOUT", gt=0)
+
+    pdf_max_bytes: int = Field(
+        default=20 * 1024 * 1024, validation_alias="PDF_MAX_BYTES", ge=1
+    )
+
+    pdf_max_pages: int = Field(default=30, validation_alias="PDF_MAX_PAGES", ge=1)
+
+    pdf_workers: int = Field(default=2, validation_alias="PDF_WORKERS", ge=1)
+
+    # Article bytes held in memory across all fetches; fetches wait while
+    # it is used up
+    article_budget_bytes: int = Field(
+        default=64 * 1024 * 1024, validation_alias="ARTICLE_BUDGET_BYTES", ge=1
+    )
+
+    # Mirror tried when a site fails, with {url} replaced by the story URL,
+    # e.g. https://web.archive.org/web/2id_/{url}; unset disables it
+    archive_mirror_url: Optional[str] = Field(
+        default=None, validation_alias="ARCHIVE_MIRROR_URL"
+    )
+
+    archive_timeout: float = Field(
+        default=15.0, validation_alias="ARCHIVE_TIMEOUT", gt=0
+    )
+
+    # Group summaries by topic and fold near-duplicates before the brief
+    cluster_stories: bool = Field(default=True, validation_alias="CLUSTER_STORIES")
+
+    cluster_threshold: float = Field(
+        default=0.2, validation_alias="CLUSTER_THRESHOLD", gt=0, le=1
+    )
+
+    duplicate_threshold: float = Field(
+        default=0.5, validation_alias="DUPLICATE_THRESHOLD", gt=0, le=1
+    )
+
+    # Summarize stories in child workflows of this size; unset keeps them
+    # all in the brief workflow
+    story_batch_size: Optional[int] = Field(
+        default=None, validation_alias="STORY_BATCH_SIZE", ge=1, le=500
+    )
+
+    story_batch_concurrency: int = Field(
+        default=4, validation_alias="STORY_BATCH_CONCURRENCY", ge=1
+    )
+
+    # History bytes after which a batched brief continues as new
+    history_size_limit: int = Field(
+        default=4 * 1024 * 1024, validation_alias="HISTORY_SIZE_LIMIT", ge=64 * 1024
+    )
+
+    # Dollars per million prompt and completion tokens by model, for the run
+    # report, e.g. "openai/gpt-4o-mini=0.15/0.60,x-ai/grok-4-fast:free=0/0"
+    model_prices: Annotated[dict[str, tuple[float, float]], NoDecode] = Field(
+        default_factory=dict, validation_alias="MODEL_PRICES"
+    )
+
+    @field_validator("blocked_domains", "allowed_domains", mode="before")
+    @classmethod
+    def split_domains(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            return [domain.strip() for domain in v.split(",") if domain.strip()]
+        return v
+
+    @field_validator("model_prices", mode="before")
+    @classmethod
+    def split_prices(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            prices: dict[str, list[str]] = {}
+            for item in v.split(","):
+                if item.strip():
+                    # Model names may contain "/" and ":", but not "="
+                    model, _, price = item.rpartition("=")
+                    prices[model.strip()] = price.strip().split("/")
+            return prices
+        return v
+
+
+class WorkerConfig(BaseSettings):
+    """Resource limits for the worker process."""
+
+    # Activities run at once by each worker without a per-type cap; unset
+    # keeps Temporal's default
+    max_concurrent_activities: Optional[int] = Field(
+        default=None, validation_alias="WORKER_MAX_CONCURRENT_ACTIVITIES", ge=1
+    )
+
+    # Caps for the dedicated activity types, e.g.
+    # "get_story_content=32,summarize_story=16"
+    activity_limits: Annotated[dict[str, int], NoDecode] = Field(
+        default_factory=dict, validation_alias="ACTIVITY_LIMITS"
+    )
+
+    @field_validator("activity_limits", mode="before")
+    @classmethod
+    def split_limits(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            limits: dict[str, str] = {}
+            for item in v.split(","):
+                if item.strip():
+                    name, _, limit = item.partition("=")
+                    limits[name.strip()] = limit.strip()
+            return limits
+        return v
+
+    @field_validator("activity_limits")
+    @classmethod
+    def validate_limits(cls, v: dict[str, int]) -> dict[str, int]:
+        for name, limit in v.items():
+            if limit < 1:
+                raise ValueError(f"limit for {name} must be at least 1")
+        return v
+
+
+class ArtifactConfig(BaseSettings):
+    """Local artifact store configuration shared by worker and CLI."""
+
+    artifact_dir: Path = Field(
+        default=Path("artifacts"), validation_alias="ARTIFACT_DIR"
+    )
+
+    # Results larger than this are stored as artifacts instead of returned inline
+    inline_result_limit: int = Field(
+        default=256 * 1024, validation_alias="INLINE_RESULT_LIMIT", ge=0
+    )
+
+
+class RecordingConfig(BaseSettings):
+    """Record/replay configuration for offline, reproducible worker runs."""
+
+    # live: use the network; record: use the network and save responses;
+    # replay: serve saved responses only
+    mode: Literal["live", "record", "replay"] = Field(
+        default="live", validation_alias="HNBRIEF_MODE"
+    )
+
+    archive_path: Path = Field(
+        default=Path("recordings/hnbrief.jsonl.gz"), validation_alias="HNBRIEF_ARCHIVE"
+    )
+
+    # Sleep for each response's recorded latency when replaying
+    replay_latency: bool = Field(default=False, validation_alias="REPLAY_LATENCY")
+
 
 def get_temporal_config() -> TemporalConfig:
     """Get Temporal configuration."""
@@ -74,6 +399,26 @@ def get_hackernews_config() -> HackerNewsConfig:
     """Get HackerNews configuration."""
     try:
         return HackerNewsConfig()
-    except ValidationError:
-        print("MAX_STORIES must be between 1 and 500 due to API limits.")
+    except ValidationError as e:
+        for error in e.errors():
+            if error["loc"] == ("MAX_STORIES",):
+                print("MAX_STORIES must be between 1 and 500 due to API limits.")
+            else:
+                field = ".".join(str(part) for part in error["loc"])
+                print(f"{field}: {error['msg']}")
         sys.exit(1)
+
+
+def get_worker_config() -> WorkerConfig:
+    """Get worker resource configuration."""
+    return WorkerConfig()
+
+
+def get_artifact_config() -> ArtifactConfig:
+    """Get artifact store configuration."""
+    return ArtifactConfig()
+
+
+def get_recording_config() -> RecordingConfig:
+    """Get record/replay configuration."""
+    return RecordingConfig()
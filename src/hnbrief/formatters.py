@@ -0,0 +1,114 @@
+"""Output formats for daily brief results."""
+
+import html
+import re
+
+from hnbrief.workflows.hackernews import DailyBriefResult
+
+FORMATS = ("markdown", "json", "html")
+
+# URLs may contain balanced parentheses, as Wikipedia links often do
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://(?:[^()\s]|\([^()\s]*\))+)\)")
+BOLD_PATTERN = re.compile(r"\*\*(.+?)\*\*")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+LIST_ITEM_PATTERN = re.compile(r"^\s*[-*]\s+(.*)$")
+
+
+def render_markdown(result: DailyBriefResult) -> str:
+    """Render the brief followed by the list of omitted stories."""
+    text = result.brief.rstrip()
+    if result.omitted:
+        lines = [f"- {story.title} ({story.reason})" for story in result.omitted]
+        text += "\n\n## Omitted Stories\n\n" + "\n".join(lines)
+    return text + "\n"
+
+
+def render_json(result: DailyBriefResult) -> str:
+    """Render the full structured result as JSON."""
+    return result.model_dump_json(indent=2) + "\n"
+
+
+def _inline_text(text: str) -> str:
+    """Escape text and convert bold markup."""
+    return BOLD_PATTERN.sub(r"<strong>\1</strong>", html.escape(text, quote=False))
+
+
+def _inline_html(text: str) -> str:
+    """Convert inline links and bold markup, escaping each part once.
+
+    Links are found in the raw markdown, so their URLs are escaped as
+    attributes and their text as content, without passing through both.
+    """
+    parts: list[str] = []
+    position = 0
+    for match in LINK_PATTERN.finditer(text):
+        parts.append(_inline_text(text[position : match.start()]))
+        label, url = _inline_text(match.group(1)), html.escape(match.group(2))
+        parts.append(f'<a href="{url}">{label}</a>')
+        position = match.end()
+    parts.append(_inline_text(text[position:]))
+    return "".join(parts)
+
+
+def markdown_to_html(markdown: str) -> str:
+    """Convert the subset of markdown the brief prompt produces to HTML."""
+    blocks: list[str] = []
+    paragraph: list[str] = []
+    items: list[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            blocks.append(f"<p>{_inline_html(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if items:
+            rendered = "".join(f"<li>{_inline_html(item)}</li>" for item in items)
+            blocks.append(f"<ul>{rendered}</ul>")
+            items.clear()
+
+    for line in markdown.splitlines():
+        heading = HEADING_PATTERN.match(line)
+        item = LIST_ITEM_PATTERN.match(line)
+        if not line.strip():
+            flush()
+        elif heading:
+            flush()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline_html(heading.group(2))}</h{level}>")
+        elif item:
+            if paragraph:
+                flush()
+            items.append(item.group(1))
+        else:
+            if items:
+                flush()
+            paragraph.append(line.strip())
+    flush()
+    return "\n".join(blocks)
+
+
+def render_html(result: DailyBriefResult) -> str:
+    """Render the brief and its sources as a standalone HTML document."""
+    sources = "".join(
+        f'<li><a href="{html.escape(url)}">{html.escape(url)}</a></li>'
+        for url in result.sources
+    )
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+        "<title>HackerNews Daily Brief</title>\n</head>\n<body>\n"
+        f"{markdown_to_html(render_markdown(result))}\n"
+        f"<h2>Sources</h2>\n<ul>{sources}</ul>\n"
+        "</body>\n</html>\n"
+    )
+
+
+def render(result: DailyBriefResult, output_format: str) -> str:
+    """Render a result in one of FORMATS."""
+    renderers = {
+        "markdown": render_markdown,
+        "json": render_json,
+        "html": render_html,
+    }
+    if output_format not in renderers:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return renderers[output_format](result)
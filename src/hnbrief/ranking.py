@@ -0,0 +1,111 @@
+"""Story ranking and filtering applied before the expensive pipeline stages.
+
+Everything in this module is pure so it can run inside the workflow sandbox.
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+from hnbrief.clients.hackernews import HackerNewsStory
+
+# Query parameters that only carry tracking information
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "source"}
+
+
+class StoryFilter(BaseModel):
+    """Criteria used to prune and rank candidate stories."""
+
+    min_score: int = 0
+    min_comments: int = 0
+    max_age_hours: float | None = None
+    blocked_domains: list[str] = Field(default_factory=list)
+    allowed_domains: list[str] = Field(default_factory=list)
+    gravity: float = 1.8
+    comment_weight: float = 0.5
+
+
+def story_domain(url: str) -> str:
+    """Return the lowercased host of a URL without port or leading www."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host.removeprefix("www.")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so the same article submitted twice compares equal."""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", story_domain(url), path, urlencode(sorted(query)), ""))
+
+
+def domain_matches(domain: str, patterns: list[str]) -> bool:
+    """Check whether a domain equals, or is a subdomain of, any pattern."""
+    for pattern in patterns:
+        pattern = pattern.lower().removeprefix("www.")
+        if domain == pattern or domain.endswith(f".{pattern}"):
+            return True
+    return False
+
+
+def rank_score(story: HackerNewsStory, now: float, story_filter: StoryFilter) -> float:
+    """Score a story with HN-style gravity decay, counting discussion too."""
+    age_hours = max(now - story.time, 0) / 3600
+    points = (story.score or 0) + story_filter.comment_weight * (story.descendants or 0)
+    return float(points / (age_hours + 2) ** story_filter.gravity)
+
+
+def is_candidate(story: HackerNewsStory, now: float, story_filter: StoryFilter) -> bool:
+    """Check whether a story is worth sending to the fetch and summary stages."""
+    if story.type != "story" or not story.url or story.dead or story.deleted:
+        return False
+    if (story.score or 0) < story_filter.min_score:
+        return False
+    if (story.descendants or 0) < story_filter.min_comments:
+        return False
+    if story_filter.max_age_hours is not None:
+        if now - story.time > story_filter.max_age_hours * 3600:
+            return False
+
+    domain = story_domain(story.url)
+    if domain_matches(domain, story_filter.blocked_domains):
+        return False
+    if story_filter.allowed_domains and not domain_matches(
+        domain, story_filter.allowed_domains
+    ):
+        return False
+    return True
+
+
+def select_stories(
+    stories: list[HackerNewsStory],
+    story_filter: StoryFilter,
+    now: float,
+    limit: int,
+) -> list[HackerNewsStory]:
+    """Filter, rank and deduplicate stories, returning the best `limit`.
+
+    Stories are ordered by rank score, with the original front page position
+    breaking ties. When several stories share a canonical URL only the
+    highest ranked one is kept.
+    """
+    candidates = [story for story in stories if is_candidate(story, now, story_filter)]
+    candidates.sort(
+        key=lambda story: rank_score(story, now, story_filter), reverse=True
+    )
+
+    selected: list[HackerNewsStory] = []
+    seen_urls: set[str] = set()
+    for story in candidates:
+        url = canonical_url(story.url or "")
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        selected.append(story)
+        if len(selected) >= limit:
+            break
+    return selected
@@ -1,22 +1,255 @@
 import asyncio
 import logging
+import resource
 import signal
 import sys
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
 
 from temporalio.client import Client
 from temporalio.contrib.pydantic import pydantic_data_converter
 from temporalio.worker import Worker
 
+from hnbrief.activities.artifacts import ArtifactActivities
+from hnbrief.activities.clustering import ClusteringActivities
 from hnbrief.activities.hackernews import HackerNewsActivities
 from hnbrief.activities.openai import OpenAIActivities
-from hnbrief.clients.hackernews import HackerNewsClient
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.clients.budget import ByteBudget
+from hnbrief.clients.cache import ItemCache
+from hnbrief.clients.circuit import DomainBreakers, NegativeCache
+from hnbrief.clients.fetchers import (
+    ArchiveFetcher,
+    ArticleTimeouts,
+    DirectFetcher,
+    Fetcher,
+    PdfFetcher,
+)
+from hnbrief.clients.hackernews import CommentLimits, HackerNewsClient
 from hnbrief.clients.openai import OpenAIClient
-from hnbrief.config import get_temporal_config, get_openai_config
-from hnbrief.workflows.hackernews import HackerNewsDailyBrief
+from hnbrief.clients.recording import (
+    Archive,
+    RecordingHackerNewsClient,
+    RecordingOpenAIClient,
+    ReplayHackerNewsClient,
+    ReplayOpenAIClient,
+)
+from hnbrief.config import (
+    HackerNewsConfig,
+    OpenAIConfig,
+    RecordingConfig,
+    WorkerConfig,
+    get_artifact_config,
+    get_hackernews_config,
+    get_recording_config,
+    get_temporal_config,
+    get_openai_config,
+    get_worker_config,
+)
+from hnbrief.workflows.hackernews import (
+    DEDICATED_ACTIVITIES,
+    HackerNewsDailyBrief,
+    HackerNewsMultiBrief,
+    HackerNewsStoryBatch,
+    dedicated_task_queue,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+TASK_QUEUE = "hacker-news-task-queue"
+# Activities a Temporal worker runs at once unless configured otherwise
+TEMPORAL_MAX_CONCURRENT_ACTIVITIES = 100
+
+
+def create_item_cache(config: HackerNewsConfig) -> ItemCache:
+    """Create the HN item cache, warming it from a snapshot when one exists."""
+    item_cache = ItemCache(
+        config.item_cache_path,
+        max_items=config.item_cache_size,
+        mutable_ttl=config.item_cache_ttl,
+        frozen_after=config.item_frozen_after_hours * 3600,
+    )
+    if config.item_cache_snapshot and config.item_cache_snapshot.exists():
+        item_cache.load_snapshot(config.item_cache_snapshot)
+    return item_cache
+
+
+def create_comment_limits(config: HackerNewsConfig) -> CommentLimits:
+    """Comment thread bounds shared by every story the worker processes."""
+    return CommentLimits(
+        max_depth=config.comment_max_depth,
+        max_comments=config.comment_max_count,
+        concurrency=config.comment_concurrency,
+        story_concurrency=config.comment_story_concurrency,
+        deadline=config.comment_deadline_seconds,
+    )
+
+
+def create_fetchers(config: HackerNewsConfig) -> list[Fetcher]:
+    """Article fetchers in the order they are tried."""
+    fetchers: list[Fetcher] = [
+        DirectFetcher(config.article_read_timeout, config.article_max_bytes)
+    ]
+    if config.pdf_extraction:
+        fetchers.append(
+            PdfFetcher(
+                config.pdf_timeout,
+                config.pdf_max_bytes,
+                config.pdf_max_pages,
+                config.pdf_workers,
+            )
+        )
+    if config.archive_mirror_url:
+        fetchers.append(
+            ArchiveFetcher(
+                config.archive_mirror_url,
+                config.archive_timeout,
+                config.article_max_bytes,
+            )
+        )
+    return fetchers
+
+
+def create_hackernews_client(
+    config: HackerNewsConfig,
+    item_cache: ItemCache,
+    archive: Optional[Archive] = None,
+) -> HackerNewsClient:
+    """Create a live HN client, recording its responses when given an archive."""
+    settings: dict[str, Any] = {
+        "item_cache": item_cache,
+        "comment_limits": create_comment_limits(config),
+        "article_timeouts": ArticleTimeouts(
+            connect=config.article_connect_timeout,
+            read=config.article_read_timeout,
+            total=config.article_total_timeout,
+        ),
+        "breakers": DomainBreakers(
+            config.breaker_failure_threshold, config.breaker_reset_seconds
+        ),
+        "negative_cache": NegativeCache(config.negative_cache_path),
+        "fetchers": create_fetchers(config),
+        "byte_budget": ByteBudget(config.article_budget_bytes),
+        "item_url": config.item_url,
+    }
+    if archive is not None:
+        return RecordingHackerNewsClient(archive, **settings)
+    return HackerNewsClient(**settings)
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def activity_slots(worker_config: WorkerConfig, activity_type: str) -> int:
+    """Activities of a dedicated type its worker runs at once.
+
+    That is the type's ACTIVITY_LIMITS cap, else the worker-wide setting,
+    Temporal's default included.
+    """
+    return worker_config.activity_limits.get(
+        activity_type,
+        worker_config.max_concurrent_activities or TEMPORAL_MAX_CONCURRENT_ACTIVITIES,
+    )
+
+
+def openai_connections(worker_config: WorkerConfig, openai_config: OpenAIConfig) -> int:
+    """API connections needed for the worker's summarize concurrency.
+
+    Hedged summaries can have a second request in flight, so the pool is
+    doubled when fallback models are configured.
+    """
+    limit = activity_slots(worker_config, "summarize_story")
+    return limit * 2 if openai_config.fallback_models else limit
+
+
+def create_workers(
+    client: Client,
+    task_queue: str,
+    worker_config: WorkerConfig,
+    workflows: Sequence[type],
+    activities: Sequence[Callable[..., Any]],
+    dedicated: dict[str, Callable[..., Any]],
+) -> list[Worker]:
+    """Workers for the workflows and shared activities, and for each dedicated type.
+
+    Each type in DEDICATED_ACTIVITIES gets its own task queue and worker,
+    capped by `activity_slots`. Activities over the cap stay queued on the
+    server, where no timeout runs until a worker starts them, and are
+    handed out by priority.
+    """
+    unknown = set(worker_config.activity_limits) - set(DEDICATED_ACTIVITIES)
+    if unknown:
+        logger.warning(
+            f"Ignoring ACTIVITY_LIMITS for {', '.join(sorted(unknown))}; "
+            f"only {', '.join(DEDICATED_ACTIVITIES)} can be limited"
+        )
+    workers = [
+        Worker(
+            client,
+            task_queue=task_queue,
+            max_concurrent_activities=worker_config.max_concurrent_activities,
+            workflows=workflows,
+            activities=activities,
+        )
+    ]
+    for activity_type in DEDICATED_ACTIVITIES:
+        workers.append(
+            Worker(
+                client,
+                task_queue=dedicated_task_queue(task_queue, activity_type),
+                max_concurrent_activities=activity_slots(worker_config, activity_type),
+                activities=[dedicated[activity_type]],
+            )
+        )
+    return workers
+
+
+def create_clients(
+    recording_config: RecordingConfig,
+    hackernews_config: HackerNewsConfig,
+    item_cache: ItemCache,
+    worker_config: WorkerConfig,
+) -> tuple[HackerNewsClient, OpenAIClient, Optional[Archive]]:
+    """Create the API clients for the configured live, record or replay mode."""
+    if recording_config.mode == "replay":
+        archive = Archive.load(recording_config.archive_path)
+        logger.info(f"Replaying {len(archive.entries)} recorded responses")
+        return (
+            ReplayHackerNewsClient(archive, recording_config.replay_latency),
+            ReplayOpenAIClient(archive, recording_config.replay_latency),
+            None,
+        )
+
+    openai_config = get_openai_config()
+    max_connections = openai_connections(worker_config, openai_config)
+    if recording_config.mode == "record":
+        archive = Archive(recording_config.archive_path)
+        return (
+            create_hackernews_client(hackernews_config, item_cache, archive),
+            RecordingOpenAIClient(
+                openai_config.openai_base_url,
+                openai_config.openai_api_key,
+                archive,
+                max_connections=max_connections,
+            ),
+            archive,
+        )
+
+    return (
+        create_hackernews_client(hackernews_config, item_cache),
+        OpenAIClient(
+            openai_config.openai_base_url,
+            openai_config.openai_api_key,
+            max_connections=max_connections,
+        ),
+        None,
+    )
+
 
 async def main() -> None:
     # Create shutdown event for graceful shutdown
@@ -45,41 +278,60 @@ async def main() -> None:
         )
 
         # Instantiate clients and activity classes
-        hn_client = HackerNewsClient()
+        hackernews_config = get_hackernews_config()
+        item_cache = create_item_cache(hackernews_config)
+        worker_config = get_worker_config()
+        hn_client, openai_client, recording_archive = create_clients(
+            get_recording_config(), hackernews_config, item_cache, worker_config
+        )
+        # Summaries and briefs go to the artifact store as they are written,
+        # so workflow histories only carry references to them
+        artifact_store = ArtifactStore(get_artifact_config().artifact_dir)
         hn_activities = HackerNewsActivities(hn_client)
+        openai_activities = OpenAIActivities(openai_client, artifact_store)
 
-        openai_config = get_openai_config()
-        openai_client = OpenAIClient(
-            openai_config.openai_base_url, openai_config.openai_api_key
-        )
-        openai_activities = OpenAIActivities(openai_client)
+        clustering_activities = ClusteringActivities(artifact_store)
+
+        artifact_activities = ArtifactActivities(artifact_store)
 
-        # Create and run worker
-        worker = Worker(
+        # Create and run the workers
+        workers = create_workers(
             temporal_client,
-            task_queue="hacker-news-task-queue",
-            workflows=[HackerNewsDailyBrief],
+            TASK_QUEUE,
+            worker_config,
+            workflows=[
+                HackerNewsDailyBrief,
+                HackerNewsMultiBrief,
+                HackerNewsStoryBatch,
+            ],
             activities=[
                 hn_activities.get_list_of_stories,
                 hn_activities.get_story_detail,
+                hn_activities.get_story_details,
                 hn_activities.get_story_markdown,
-                openai_activities.summarize_story,
+                clustering_activities.cluster_summaries,
                 openai_activities.create_daily_brief,
+                artifact_activities.store_result,
             ],
+            dedicated={
+                "get_story_content": hn_activities.get_story_content,
+                "get_story_comments": hn_activities.get_story_comments,
+                "summarize_story": openai_activities.summarize_story,
+            },
         )
 
         print("Worker started, polling task queue...")
         print("Press Ctrl+C to stop gracefully")
 
-        # Run worker task
-        worker_task = asyncio.create_task(worker.run())
+        # Run the workers together
+        worker_task = asyncio.gather(*(worker.run() for worker in workers))
 
         # Wait for shutdown signal
         await shutdown_event.wait()
 
         # Graceful shutdown
         logger.info("Shutting down worker...")
-        await worker.shutdown()
+        await asyncio.gather(*(worker.shutdown() for worker in workers))
 
         # Cancel and clean up worker task
         worker_task.cancel()
@@ -88,6 +340,24 @@ async def main() -> None:
         except asyncio.CancelledError:
             pass
 
+        await hn_client.close()
+        await openai_client.close()
+        if recording_archive is not None:
+            recording_archive.save()
+
+        logger.info(f"Item cache stats: {hn_client.cache_stats()}")
+        logger.info(f"Negative cache stats: {hn_client.negative_cache.stats}")
+        for strategy, stats in hn_client.fetch_stats.items():
+            logger.info(f"Article fetcher {strategy} stats: {stats}")
+        logger.info(f"Article byte budget stats: {hn_client.byte_budget.stats}")
+        for template, render_stats in openai_client.prompts.stats.items():
+            logger.info(f"Prompt {template} render stats: {render_stats}")
+        logger.info(f"Peak RSS: {peak_rss_mib():.0f} MiB")
+        hn_client.negative_cache.close()
+        if hackernews_config.item_cache_snapshot:
+            item_cache.save_snapshot(hackernews_config.item_cache_snapshot)
+        item_cache.close()
+
     except Exception as e:
         if "Connection refused" in str(e):
             print(
@@ -1,107 +1,1014 @@
 import asyncio
-from typing import cast
+import math
+from typing import Optional, cast
 
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta, timezone
 
+from pydantic import BaseModel, Field
 from temporalio import workflow
-from temporalio.common import RetryPolicy
+from temporalio.common import Priority, RetryPolicy
 
-from hnbrief.clients.hackernews import HackerNewsStory
-from hnbrief.clients.openai import StorySummary
+from hnbrief.ranking import StoryFilter, select_stories
 
+# Only data classes are used from the clients; their HTTP libraries touch
+# modules the sandbox restricts, so they are imported outside it
+with workflow.unsafe.imports_passed_through():
+    from hnbrief.clients.artifacts import ArtifactRef
+    from hnbrief.clients.fetchers import StoryContent
+    from hnbrief.clients.hackernews import HackerNewsStory
+    from hnbrief.clients.openai import (
+        DailyBrief,
+        StoryCluster,
+        StorySummary,
+        TokenUsage,
+    )
 
-@workflow.defn
-class HackerNewsDailyBrief:
-    async def _process_story(
-        self, story: HackerNewsStory, retry_policy: RetryPolicy
-    ) -> StorySummary:
-        """Process a single story: get markdown then summarize."""
-        # Get markdown for this story
-        markdown = await workflow.execute_activity(
-            "get_story_markdown",
-            result_type=str,
+
+# Story IDs fetched per get_story_details activity
+DETAIL_BATCH_SIZE = 50
+
+# Activity types scheduled on a task queue of their own, so workers can cap
+# each type and activities over the cap wait on the server, unstarted
+DEDICATED_ACTIVITIES = ("get_story_content", "get_story_comments", "summarize_story")
+
+
+# Story fetches and summaries heartbeat, so when a deadline cancels them the
+# worker hears of it within this long and stops working on them
+STORY_HEARTBEAT_TIMEOUT = timedelta(seconds=20)
+
+
+def dedicated_task_queue(task_queue: str, activity_type: str) -> str:
+    """Task queue for a dedicated activity type of workflows on `task_queue`."""
+    return f"{task_queue}-{activity_type}"
+
+
+class BriefOptions(BaseModel):
+    """Optional settings for a daily brief run."""
+
+    story_filter: StoryFilter = Field(default_factory=StoryFilter)
+    overfetch_factor: float = 2.0
+    # Candidate story IDs in front page order; None uses the live top stories
+    story_ids: Optional[list[int]] = None
+    # Past day a backfilled brief covers; its stories are ranked as of the
+    # end of that day and the brief is dated with it
+    brief_date: Optional[date] = None
+    # Seconds from workflow start after which the brief is built from
+    # whatever summaries have completed
+    deadline_seconds: Optional[float] = None
+    # Results whose JSON exceeds this many bytes are returned by reference
+    inline_result_limit: int = 256 * 1024
+    # Fetch each story's top comments and summarize them with the article
+    include_comments: bool = False
+    # Group summaries by topic and fold near-duplicates before the brief,
+    # using cosine similarity thresholds on their text
+    cluster_stories: bool = True
+    cluster_threshold: float = 0.2
+    duplicate_threshold: float = 0.5
+    # Summarize stories in child workflows of this many stories each, so the
+    # brief's own history stays small; None summarizes them all in place
+    story_batch_size: Optional[int] = None
+    # Child workflows running at once
+    batch_concurrency: int = 4
+    # History bytes after which a batched daily brief continues as new
+    history_size_limit: int = 4 * 1024 * 1024
+    # Dollars per million prompt and completion tokens, by model
+    model_prices: dict[str, tuple[float, float]] = Field(default_factory=dict)
+    # Task queue priority keys given to stories' fetch and summary activities
+    # by rank; 1 leaves every story at the default priority
+    priority_levels: int = 5
+    # Highest ranked stories that are summarized even past the deadline
+    guaranteed_stories: int = 0
+
+
+class StageProgress(BaseModel):
+    """Completed and total work items for one workflow stage."""
+
+    done: int = 0
+    total: int = 0
+
+
+class BriefProgress(BaseModel):
+    """Live progress of a daily brief run, exposed through a query."""
+
+    details: StageProgress = Field(default_factory=StageProgress)
+    markdown: StageProgress = Field(default_factory=StageProgress)
+    comments: StageProgress = Field(default_factory=StageProgress)
+    summaries: StageProgress = Field(default_factory=StageProgress)
+    brief: StageProgress = Field(default_factory=StageProgress)
+    deadline_reached: bool = False
+
+
+class OmittedStory(BaseModel):
+    """A selected story that did not make it into the brief."""
+
+    id: int
+    title: str
+    url: Optional[str] = None
+    reason: str
+
+
+class ContentSource(BaseModel):
+    """How a story's article text was fetched."""
+
+    story_id: int
+    # Fetcher that produced the text, or None when every fetcher failed
+    strategy: Optional[str] = None
+    size_bytes: int = 0
+    seconds: float = 0.0
+    # Served from the worker's content or negative cache
+    cached: bool = False
+
+
+class StageTimings(BaseModel):
+    """Wall-clock seconds spent in each stage of a run."""
+
+    details: float = 0.0
+    stories: float = 0.0
+    brief: float = 0.0
+    total: float = 0.0
+
+
+class TokenStats(BaseModel):
+    """Token totals across every LLM call of a run."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def add(self, usage: TokenUsage) -> None:
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+
+
+class ModelUsage(BaseModel):
+    """LLM calls made to one model during a run."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0
+    # Estimated dollars, or None when the model has no configured price
+    cost: Optional[float] = None
+
+
+class FetchReport(BaseModel):
+    """Article fetches of a run, and the fetches the caches saved."""
+
+    articles: int = 0
+    size_bytes: int = 0
+    seconds: float = 0.0
+    cached_articles: int = 0
+    # Size and fetch time of the cached articles when they were first fetched
+    cached_bytes: int = 0
+    cached_seconds: float = 0.0
+
+
+class RunReport(BaseModel):
+    """Where a run's tokens, money and fetch time went."""
+
+    models: dict[str, ModelUsage] = Field(default_factory=dict)
+    # Estimated dollars for the models with a configured price
+    cost: float = 0.0
+    unpriced_models: list[str] = Field(default_factory=list)
+    fetches: FetchReport = Field(default_factory=FetchReport)
+
+
+def build_report(
+    usages: list[TokenUsage],
+    sources: list[ContentSource],
+    prices: dict[str, tuple[float, float]],
+) -> RunReport:
+    """Aggregate LLM usage and article fetches into a run report."""
+    report = RunReport()
+    for usage in usages:
+        # Failed calls and stories without article text report no model
+        if not usage.model:
+            continue
+        model = report.models.setdefault(usage.model, ModelUsage())
+        model.calls += 1
+        model.prompt_tokens += usage.prompt_tokens
+        model.completion_tokens += usage.completion_tokens
+        model.seconds += usage.seconds
+
+    for name, model in report.models.items():
+        if name not in prices:
+            report.unpriced_models.append(name)
+            continue
+        prompt_price, completion_price = prices[name]
+        model.cost = (
+            model.prompt_tokens * prompt_price
+            + model.completion_tokens * completion_price
+        ) / 1_000_000
+        report.cost += model.cost
+
+    fetches = report.fetches
+    for source in sources:
+        if source.cached:
+            fetches.cached_articles += 1
+            fetches.cached_bytes += source.size_bytes
+            fetches.cached_seconds += source.seconds
+        else:
+            fetches.articles += 1
+            fetches.size_bytes += source.size_bytes
+            fetches.seconds += source.seconds
+    return report
+
+
+class StoryBatchResult(BaseModel):
+    """Summaries produced by one story batch child workflow."""
+
+    summaries: dict[int, StorySummary] = Field(default_factory=dict)
+    omitted: list[OmittedStory] = Field(default_factory=list)
+    content_sources: list[ContentSource] = Field(default_factory=list)
+    progress: BriefProgress = Field(default_factory=BriefProgress)
+
+
+class BriefCheckpoint(BaseModel):
+    """State a batched daily brief carries across continue-as-new."""
+
+    stories: list[HackerNewsStory]
+    summaries: dict[int, StorySummary] = Field(default_factory=dict)
+    omitted: list[OmittedStory] = Field(default_factory=list)
+    content_sources: list[ContentSource] = Field(default_factory=list)
+    progress: BriefProgress = Field(default_factory=BriefProgress)
+    started_at: datetime
+    stories_started: datetime
+
+
+class DailyBriefResult(BaseModel):
+    """Result of a daily brief run.
+
+    When the full result is too large to return inline, `brief` and
+    `summaries` are left empty and `artifact` points at the stored JSON.
+    """
+
+    brief: str
+    summaries: list[StorySummary] = Field(default_factory=list)
+    sources: list[str] = Field(default_factory=list)
+    omitted: list[OmittedStory] = Field(default_factory=list)
+    timings: StageTimings = Field(default_factory=StageTimings)
+    tokens: TokenStats = Field(default_factory=TokenStats)
+    content_sources: list[ContentSource] = Field(default_factory=list)
+    report: RunReport = Field(default_factory=RunReport)
+    artifact: Optional[ArtifactRef] = None
+
+
+class BriefSpec(BaseModel):
+    """One of the briefs produced by a multi-brief run."""
+
+    # Used as a file and artifact name, so kept to a safe alphabet
+    name: str = Field(pattern=r"^[a-z0-9_]+$")
+    story_filter: StoryFilter = Field(default_factory=StoryFilter)
+    # Stories in this brief; defaults to the run's max_stories
+    max_stories: Optional[int] = Field(default=None, ge=1, le=500)
+    # Prompt template in hnbrief/prompts, without the .poml suffix
+    prompt: str = Field(default="daily_brief", pattern=r"^[a-z0-9_]+$")
+    # Model for this brief; defaults to DAILY_BRIEF_MODEL
+    model: Optional[str] = None
+
+
+class MultiBriefResult(BaseModel):
+    """Result of a multi-brief run, with one brief per spec name.
+
+    `tokens` counts every LLM call once, although summaries are shared
+    between the briefs that include them.
+    """
+
+    briefs: dict[str, DailyBriefResult] = Field(default_factory=dict)
+    timings: StageTimings = Field(default_factory=StageTimings)
+    tokens: TokenStats = Field(default_factory=TokenStats)
+    report: RunReport = Field(default_factory=RunReport)
+
+
+def ranking_time(options: BriefOptions) -> float:
+    """Timestamp stories are ranked at: now, or the end of a backfilled day."""
+    if options.brief_date is None:
+        return workflow.now().timestamp()
+    day_end = datetime.combine(
+        options.brief_date + timedelta(days=1), time.min, timezone.utc
+    )
+    return day_end.timestamp()
+
+
+def story_priority(rank: int, levels: int) -> Priority:
+    """Task queue priority for the story at `rank`, counting from 0.
+
+    Bands double in width down the ranking: key 1 is the top story, key 2
+    the next two, key 3 the next four, and every story past the last band
+    shares key `levels`. Temporal dispatches lower keys first, so backlogged
+    activities on a dedicated task queue reach its workers in rank order.
+    """
+    if levels <= 1:
+        return Priority.default
+    return Priority(priority_key=min((rank + 1).bit_length(), levels))
+
+
+def default_retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        maximum_attempts=5,
+        maximum_interval=timedelta(seconds=5),
+        non_retryable_error_types=[],
+    )
+
+
+class BriefStages:
+    """Stages shared by the single and multi-brief workflows."""
+
+    def __init__(self) -> None:
+        self.progress = BriefProgress()
+        self.content_sources: dict[int, ContentSource] = {}
+
+    @workflow.query
+    def get_progress(self) -> BriefProgress:
+        """Return done/total counts for each stage of the run."""
+        return self.progress
+
+    async def _get_story_details(
+        self, story_ids: list[int], retry_policy: RetryPolicy
+    ) -> list[HackerNewsStory]:
+        """Fetch a batch of story details and record progress."""
+        stories = await workflow.execute_activity(
+            "get_story_details",
+            result_type=list[HackerNewsStory],
+            args=(story_ids,),
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=retry_policy,
+        )
+        self.progress.details.done += len(story_ids)
+        return cast(list[HackerNewsStory], stories)
+
+    async def _get_story_markdown(
+        self,
+        story: HackerNewsStory,
+        retry_policy: RetryPolicy,
+        priority: Priority = Priority.default,
+    ) -> str:
+        """Fetch a story's article as markdown, recording how it was fetched."""
+        content = cast(
+            StoryContent,
+            await workflow.execute_activity(
+                "get_story_content",
+                task_queue=dedicated_task_queue(
+                    workflow.info().task_queue, "get_story_content"
+                ),
+                result_type=StoryContent,
+                args=(story,),
+                start_to_close_timeout=timedelta(seconds=60),
+                heartbeat_timeout=STORY_HEARTBEAT_TIMEOUT,
+                retry_policy=retry_policy,
+                priority=priority,
+            ),
+        )
+        self.content_sources[story.id] = ContentSource(
+            story_id=story.id,
+            strategy=content.strategy,
+            size_bytes=content.size_bytes,
+            seconds=content.seconds,
+            cached=content.cached,
+        )
+        self.progress.markdown.done += 1
+        return content.markdown
+
+    def _sources_for(self, stories: list[HackerNewsStory]) -> list[ContentSource]:
+        """Content sources of the given stories that were fetched, in order."""
+        return [
+            self.content_sources[story.id]
+            for story in stories
+            if story.id in self.content_sources
+        ]
+
+    async def _get_story_comments(
+        self,
+        story: HackerNewsStory,
+        retry_policy: RetryPolicy,
+        priority: Priority = Priority.default,
+    ) -> list[str]:
+        """Fetch a story's top comments and record progress."""
+        comments = await workflow.execute_activity(
+            "get_story_comments",
+            task_queue=dedicated_task_queue(
+                workflow.info().task_queue, "get_story_comments"
+            ),
+            result_type=list[str],
             args=(story,),
             start_to_close_timeout=timedelta(seconds=60),
+            heartbeat_timeout=STORY_HEARTBEAT_TIMEOUT,
             retry_policy=retry_policy,
+            priority=priority,
         )
+        self.progress.comments.done += 1
+        return cast(list[str], comments)
+
+    async def _process_story(
+        self,
+        story: HackerNewsStory,
+        options: BriefOptions,
+        retry_policy: RetryPolicy,
+        priority: Priority = Priority.default,
+    ) -> StorySummary:
+        """Process a single story: get markdown (and comments) then summarize."""
+        if options.include_comments:
+            # Fetch the article and the comment thread side by side
+            markdown, comments = await asyncio.gather(
+                self._get_story_markdown(story, retry_policy, priority),
+                self._get_story_comments(story, retry_policy, priority),
+            )
+            args: tuple[object, ...] = (story, markdown, comments)
+        else:
+            markdown = await self._get_story_markdown(story, retry_policy, priority)
+            args = (story, markdown)
 
         # Summarize this story
         summary = cast(
             StorySummary,
             await workflow.execute_activity(
                 "summarize_story",
+                task_queue=dedicated_task_queue(
+                    workflow.info().task_queue, "summarize_story"
+                ),
                 result_type=StorySummary,
-                args=(story, markdown),
+                args=args,
                 start_to_close_timeout=timedelta(seconds=60),
+                heartbeat_timeout=STORY_HEARTBEAT_TIMEOUT,
                 retry_policy=retry_policy,
+                priority=priority,
             ),
         )
+        self.progress.summaries.done += 1
 
         return summary
 
+    async def _fetch_candidates(
+        self, num_stories: int, options: BriefOptions, retry_policy: RetryPolicy
+    ) -> list[HackerNewsStory]:
+        """Fetch details for enough top stories to pick `num_stories` from."""
+        # Get list of story IDs
+        list_of_ids = options.story_ids
+        if list_of_ids is None:
+            list_of_ids = await workflow.execute_activity(
+                "get_list_of_stories",
+                result_type=list[int],
+                start_to_close_timeout=timedelta(seconds=5),
+                retry_policy=retry_policy,
+            )
+
+        # Over-fetch IDs so filtering still leaves enough stories to pick from
+        num_candidates = min(
+            math.ceil(num_stories * max(options.overfetch_factor, 1.0)),
+            len(list_of_ids),
+        )
+        story_ids = list_of_ids[:num_candidates]
+        self.progress.details.total = len(story_ids)
+
+        # Fetch story details in batches, so each batch result is decoded with
+        # a single list validation instead of one payload per story
+        batch_futures = [
+            self._get_story_details(
+                story_ids[start : start + DETAIL_BATCH_SIZE], retry_policy
+            )
+            for start in range(0, len(story_ids), DETAIL_BATCH_SIZE)
+        ]
+        batches = await asyncio.gather(*batch_futures)
+        return [story for batch in batches for story in batch]
+
+    def _remaining(
+        self, options: BriefOptions, started_at: datetime
+    ) -> Optional[float]:
+        """Seconds left before the deadline, or None without one."""
+        if options.deadline_seconds is None:
+            return None
+        elapsed = (workflow.now() - started_at).total_seconds()
+        return max(options.deadline_seconds - elapsed, 0.0)
+
+    async def _summarize_stories(
+        self,
+        stories: list[HackerNewsStory],
+        options: BriefOptions,
+        retry_policy: RetryPolicy,
+        started_at: datetime,
+        summaries: Optional[dict[int, StorySummary]] = None,
+        omitted: Optional[list[OmittedStory]] = None,
+    ) -> tuple[dict[int, StorySummary], list[OmittedStory]]:
+        """Summarize stories until done or the deadline passes.
+
+        `summaries` and `omitted` hold stories already handled by an earlier
+        run of a batched brief. Returns the summaries by story ID and the
+        stories left out.
+        """
+        self.progress.markdown.total = len(stories)
+        if options.include_comments:
+            self.progress.comments.total = len(stories)
+        self.progress.summaries.total = len(stories)
+
+        if options.story_batch_size:
+            return await self._summarize_batches(
+                stories, options, started_at, summaries or {}, omitted or []
+            )
+        return await self._summarize_concurrently(
+            stories, options, retry_policy, started_at
+        )
+
+    async def _summarize_concurrently(
+        self,
+        stories: list[HackerNewsStory],
+        options: BriefOptions,
+        retry_policy: RetryPolicy,
+        started_at: datetime,
+    ) -> tuple[dict[int, StorySummary], list[OmittedStory]]:
+        """Summarize every story in this workflow, all at once.
+
+        Stories are ranked best first, and their activities are scheduled
+        with priorities by rank, so the top stories are fetched and
+        summarized before the rest when the task queue or worker is busy.
+        Stories whose activities fail for good are left out of the brief.
+        """
+        # Process each story through its pipeline (markdown → summary) concurrently
+        story_tasks = [
+            asyncio.create_task(
+                self._process_story(
+                    story,
+                    options,
+                    retry_policy,
+                    story_priority(rank, options.priority_levels),
+                )
+            )
+            for rank, story in enumerate(stories)
+        ]
+        timeout = self._remaining(options, started_at)
+
+        summaries: dict[int, StorySummary] = {}
+        omitted: list[OmittedStory] = []
+        if story_tasks:
+            _, pending = await workflow.wait(story_tasks, timeout=timeout)
+
+            # The top stories are waited for past the deadline, and stories
+            # finishing meanwhile are kept too
+            guaranteed = [
+                task
+                for task in story_tasks[: options.guaranteed_stories]
+                if task in pending
+            ]
+            if guaranteed:
+                await workflow.wait(guaranteed)
+                pending = [task for task in pending if not task.done()]
+
+            # Cancel stragglers and let their cancellation settle
+            if pending:
+                self.progress.deadline_reached = True
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            for story, task in zip(stories, story_tasks):
+                if task in pending:
+                    reason = "deadline"
+                elif task.exception() is not None:
+                    workflow.logger.warning(
+                        f"Leaving out story {story.id}: {task.exception()}"
+                    )
+                    reason = "error"
+                else:
+                    summaries[story.id] = task.result()
+                    continue
+                omitted.append(
+                    OmittedStory(
+                        id=story.id, title=story.title, url=story.url, reason=reason
+                    )
+                )
+        return summaries, omitted
+
+    async def _summarize_batches(
+        self,
+        stories: list[HackerNewsStory],
+        options: BriefOptions,
+        started_at: datetime,
+        summaries: dict[int, StorySummary],
+        omitted: list[OmittedStory],
+    ) -> tuple[dict[int, StorySummary], list[OmittedStory]]:
+        """Summarize stories in waves of child workflows.
+
+        Each child's activities live in its own history, so this workflow
+        only records one start and one result per batch, and replaying it
+        after a worker restart costs the same however many stories it has.
+        """
+        handled = set(summaries) | {story.id for story in omitted}
+        pending = [story for story in stories if story.id not in handled]
+        ranks = {story.id: rank for rank, story in enumerate(stories)}
+        size = cast(int, options.story_batch_size)
+        wave_size = size * max(options.batch_concurrency, 1)
+        while pending:
+            timeout = self._remaining(options, started_at)
+            if timeout == 0.0:
+                self.progress.deadline_reached = True
+                # Past the deadline only the guaranteed top stories still run
+                guaranteed = [
+                    story
+                    for story in pending
+                    if ranks[story.id] < options.guaranteed_stories
+                ]
+                omitted.extend(
+                    OmittedStory(
+                        id=story.id, title=story.title, url=story.url, reason="deadline"
+                    )
+                    for story in pending
+                    if story not in guaranteed
+                )
+                pending = guaranteed
+                if not pending:
+                    break
+
+            wave, pending = pending[:wave_size], pending[wave_size:]
+            results = await asyncio.gather(
+                *(
+                    self._summarize_batch(
+                        wave[start : start + size], ranks, options, timeout
+                    )
+                    for start in range(0, len(wave), size)
+                )
+            )
+            for result in results:
+                summaries.update(result.summaries)
+                omitted.extend(result.omitted)
+                for source in result.content_sources:
+                    self.content_sources[source.story_id] = source
+                self.progress.markdown.done += result.progress.markdown.done
+                self.progress.comments.done += result.progress.comments.done
+                self.progress.summaries.done += result.progress.summaries.done
+                if result.progress.deadline_reached:
+                    self.progress.deadline_reached = True
+
+            if pending:
+                self._checkpoint(summaries, omitted, options)
+        return summaries, omitted
+
+    async def _summarize_batch(
+        self,
+        batch: list[HackerNewsStory],
+        ranks: dict[int, int],
+        options: BriefOptions,
+        timeout: Optional[float],
+    ) -> StoryBatchResult:
+        """Summarize one batch of ranked stories in a child workflow.
+
+        The child runs at the priority of its best story, which its
+        activities inherit.
+        """
+        first = ranks[batch[0].id]
+        # Children get whatever time is left as their own deadline
+        child_options = options.model_copy(
+            update={
+                "story_batch_size": None,
+                "deadline_seconds": timeout,
+                "priority_levels": 1,
+                "guaranteed_stories": sum(
+                    1 for story in batch if ranks[story.id] < options.guaranteed_stories
+                ),
+            }
+        )
+        return await workflow.execute_child_workflow(
+            HackerNewsStoryBatch.run,
+            args=[batch, child_options],
+            id=f"{workflow.info().workflow_id}-stories-{batch[0].id}",
+            priority=story_priority(first, options.priority_levels),
+        )
+
+    def _checkpoint(
+        self,
+        summaries: dict[int, StorySummary],
+        omitted: list[OmittedStory],
+        options: BriefOptions,
+    ) -> None:
+        """Called between waves of batches; may continue the workflow as new."""
+
+    async def _write_brief(
+        self,
+        summaries: list[StorySummary],
+        options: BriefOptions,
+        retry_policy: RetryPolicy,
+        spec: Optional[BriefSpec] = None,
+    ) -> DailyBrief:
+        """Cluster the summaries and create a brief, styled by `spec` if given."""
+        clusters: Optional[list[StoryCluster]] = None
+        if options.cluster_stories and len(summaries) > 1:
+            # Pre-group stories so the brief prompt is smaller and needs no
+            # grouping pass of its own
+            clusters = cast(
+                list[StoryCluster],
+                await workflow.execute_activity(
+                    "cluster_summaries",
+                    result_type=list[StoryCluster],
+                    args=(
+                        summaries,
+                        options.cluster_threshold,
+                        options.duplicate_threshold,
+                    ),
+                    start_to_close_timeout=timedelta(seconds=30),
+                    retry_policy=retry_policy,
+                ),
+            )
+
+        args: tuple[object, ...] = (summaries,)
+        prompt, model = (spec.prompt, spec.model) if spec else (None, None)
+        if options.brief_date is not None:
+            brief_date = options.brief_date.strftime("%B %d, %Y")
+            args = (summaries, clusters, prompt, model, brief_date)
+        elif spec is not None:
+            args = (summaries, clusters, prompt, model)
+        elif clusters is not None:
+            args = (summaries, clusters)
+
+        brief = await workflow.execute_activity(
+            "create_daily_brief",
+            result_type=DailyBrief,
+            args=args,
+            start_to_close_timeout=timedelta(seconds=120),
+            retry_policy=retry_policy,
+        )
+        self.progress.brief.done += 1
+        return cast(DailyBrief, brief)
+
+    async def _finish_result(
+        self,
+        result: DailyBriefResult,
+        brief: DailyBrief,
+        options: BriefOptions,
+        retry_policy: RetryPolicy,
+        name: str,
+    ) -> DailyBriefResult:
+        """Complete a result whose texts the worker may have stored.
+
+        The worker fills in the stored brief and summaries, and returns the
+        result by reference when it is over the inline limit, so large text
+        never passes through this workflow's history.
+        """
+        stored = brief.artifact is not None or any(
+            summary.artifact is not None for summary in result.summaries
+        )
+        if not stored and (
+            len(result.model_dump_json().encode("utf-8")) <= options.inline_result_limit
+        ):
+            return result
+
+        return cast(
+            DailyBriefResult,
+            await workflow.execute_activity(
+                "store_result",
+                result_type=DailyBriefResult,
+                args=(name, result, brief, options.inline_result_limit),
+                start_to_close_timeout=timedelta(seconds=30),
+                retry_policy=retry_policy,
+            ),
+        )
+
+
+@workflow.defn
+class HackerNewsStoryBatch(BriefStages):
+    """Summaries for one batch of a batched brief's stories."""
+
+    @workflow.run
+    async def run(
+        self, stories: list[HackerNewsStory], options: BriefOptions
+    ) -> StoryBatchResult:
+        summaries, omitted = await self._summarize_stories(
+            stories, options, default_retry_policy(), workflow.now()
+        )
+        return StoryBatchResult(
+            summaries=summaries,
+            omitted=omitted,
+            content_sources=self._sources_for(stories),
+            progress=self.progress,
+        )
+
+
+@workflow.defn
+class HackerNewsDailyBrief(BriefStages):
+    def __init__(self) -> None:
+        super().__init__()
+        self.max_stories = 0
+        self.checkpoint: Optional[BriefCheckpoint] = None
+
     @workflow.run
-    async def run(self, max_stories: int) -> str:
+    async def run(
+        self,
+        max_stories: int,
+        options: Optional[BriefOptions] = None,
+        checkpoint: Optional[BriefCheckpoint] = None,
+    ) -> DailyBriefResult:
         # Validate max_stories
         if max_stories < 1 or max_stories > 500:
             max_stories = 35  # Fallback to default
+        self.max_stories = max_stories
+        options = options or BriefOptions()
+        retry = default_retry_policy()
+
+        if checkpoint is None:
+            started_at = workflow.now()
+            details_started = workflow.now()
+            candidates = await self._fetch_candidates(max_stories, options, retry)
+
+            # Filter, deduplicate and rank before any article fetch or LLM call
+            stories = select_stories(
+                candidates,
+                options.story_filter,
+                now=ranking_time(options),
+                limit=max_stories,
+            )
+            stories_started = workflow.now()
+            checkpoint = BriefCheckpoint(
+                stories=stories, started_at=started_at, stories_started=stories_started
+            )
+        else:
+            # Continued as new part way through the story batches
+            stories = checkpoint.stories
+            started_at = details_started = checkpoint.started_at
+            stories_started = checkpoint.stories_started
+            self.progress = checkpoint.progress
+            self.content_sources = {
+                source.story_id: source for source in checkpoint.content_sources
+            }
+        self.checkpoint = checkpoint
 
-        retry_policy = RetryPolicy(
-            maximum_attempts=5,
-            maximum_interval=timedelta(seconds=5),
-            non_retryable_error_types=[],
+        by_id, omitted = await self._summarize_stories(
+            stories,
+            options,
+            retry,
+            started_at,
+            dict(checkpoint.summaries),
+            list(checkpoint.omitted),
         )
+        summaries = [by_id[story.id] for story in stories if story.id in by_id]
 
-        # Get list of story IDs
-        list_of_ids = await workflow.execute_activity(
-            "get_list_of_stories",
-            result_type=list[int],
-            start_to_close_timeout=timedelta(seconds=5),
-            retry_policy=retry_policy,
+        # Create daily brief
+        self.progress.brief.total = 1
+        brief_started = workflow.now()
+        brief = await self._write_brief(summaries, options, retry)
+        finished = workflow.now()
+
+        tokens = TokenStats()
+        for summary in summaries:
+            tokens.add(summary.usage)
+        tokens.add(brief.usage)
+        content_sources = self._sources_for(stories)
+
+        result = DailyBriefResult(
+            brief=brief.text,
+            summaries=summaries,
+            sources=[summary.url for summary in summaries if summary.url],
+            omitted=omitted,
+            timings=StageTimings(
+                details=(stories_started - details_started).total_seconds(),
+                stories=(brief_started - stories_started).total_seconds(),
+                brief=(finished - brief_started).total_seconds(),
+                total=(finished - started_at).total_seconds(),
+            ),
+            tokens=tokens,
+            content_sources=content_sources,
+            report=build_report(
+                [summary.usage for summary in summaries] + [brief.usage],
+                content_sources,
+                options.model_prices,
+            ),
+        )
+        return await self._finish_result(
+            result, brief, options, retry, f"{workflow.info().workflow_id}.json"
         )
 
-        # Get details for first N stories
-        num_stories = min(max_stories, len(list_of_ids))
-        story_ids = list_of_ids[:num_stories]
+    def _checkpoint(
+        self,
+        summaries: dict[int, StorySummary],
+        omitted: list[OmittedStory],
+        options: BriefOptions,
+    ) -> None:
+        """Continue as new once the history grows past the configured size."""
+        info = workflow.info()
+        if self.checkpoint is None:
+            return
+        if (
+            not info.is_continue_as_new_suggested()
+            and info.get_current_history_size() < options.history_size_limit
+        ):
+            return
+        checkpoint = self.checkpoint.model_copy(
+            update={
+                "summaries": summaries,
+                "omitted": omitted,
+                "content_sources": list(self.content_sources.values()),
+                "progress": self.progress,
+            }
+        )
+        workflow.continue_as_new(args=[self.max_stories, options, checkpoint])
 
-        # Execute activities concurrently for each story detail
-        story_futures = []
-        for story_id in story_ids:
-            future = workflow.execute_activity(
-                "get_story_detail",
-                result_type=HackerNewsStory,
-                args=(story_id,),
-                start_to_close_timeout=timedelta(seconds=5),
-                retry_policy=retry_policy,
-            )
-            story_futures.append(future)
 
-        # Wait for all story details to complete concurrently
-        story_dicts = await asyncio.gather(*story_futures)
+@workflow.defn
+class HackerNewsMultiBrief(BriefStages):
+    """Several briefs built from one fetch and summary pass.
 
-        # Convert dictionaries back to HackerNewsStory objects
-        stories: list[HackerNewsStory] = [
-            HackerNewsStory.model_validate(story_dict) for story_dict in story_dicts
-        ]
+    Each spec picks its own stories from the shared candidates; the union
+    of those stories is summarized once, and only the brief step runs per
+    spec, in parallel.
+    """
 
-        # Filter to only include items of type 'story'
-        stories = [story for story in stories if story.type == "story" and story.url]
+    @workflow.run
+    async def run(
+        self,
+        max_stories: int,
+        specs: list[BriefSpec],
+        options: Optional[BriefOptions] = None,
+    ) -> MultiBriefResult:
+        if max_stories < 1 or max_stories > 500:
+            max_stories = 35  # Fallback to default
+        options = options or BriefOptions()
+        started_at = workflow.now()
+        retry = default_retry_policy()
 
-        # Process each story through its pipeline (markdown → summary) concurrently
-        story_processing_futures = [
-            self._process_story(story, retry_policy) for story in stories
+        details_started = workflow.now()
+        limits = [spec.max_stories or max_stories for spec in specs]
+        candidates = await self._fetch_candidates(
+            max(limits, default=max_stories), options, retry
+        )
+
+        now = ranking_time(options)
+        selections = [
+            select_stories(candidates, spec.story_filter, now=now, limit=limit)
+            for spec, limit in zip(specs, limits)
         ]
-        summaries = await asyncio.gather(*story_processing_futures)
+        # Summarize every selected story once, in first-selected order
+        union = list(
+            {story.id: story for stories in selections for story in stories}.values()
+        )
+        stories_started = workflow.now()
+        by_id, omitted = await self._summarize_stories(
+            union, options, retry, started_at
+        )
 
-        # Create daily brief
-        brief = cast(
-            str,
-            await workflow.execute_activity(
-                "create_daily_brief",
-                result_type=str,
-                args=(summaries,),
-                start_to_close_timeout=timedelta(seconds=120),
-                retry_policy=retry_policy,
-            ),
+        self.progress.brief.total = len(specs)
+        brief_started = workflow.now()
+        spec_summaries = [
+            [by_id[story.id] for story in stories if story.id in by_id]
+            for stories in selections
+        ]
+        briefs = await asyncio.gather(
+            *(
+                self._write_brief(summaries, options, retry, spec)
+                for spec, summaries in zip(specs, spec_summaries)
+            )
         )
+        finished = workflow.now()
+
+        shared_timings = {
+            "details": (stories_started - details_started).total_seconds(),
+            "stories": (brief_started - stories_started).total_seconds(),
+            "brief": (finished - brief_started).total_seconds(),
+        }
+        tokens = TokenStats()
+        for summary in by_id.values():
+            tokens.add(summary.usage)
 
-        return brief
+        results: dict[str, DailyBriefResult] = {}
+        for spec, stories, summaries, brief in zip(
+            specs, selections, spec_summaries, briefs
+        ):
+            tokens.add(brief.usage)
+            spec_tokens = TokenStats()
+            for summary in summaries:
+                spec_tokens.add(summary.usage)
+            spec_tokens.add(brief.usage)
+            selected = {story.id for story in stories}
+            content_sources = self._sources_for(stories)
+            result = DailyBriefResult(
+                brief=brief.text,
+                summaries=summaries,
+                sources=[summary.url for summary in summaries if summary.url],
+                omitted=[story for story in omitted if story.id in selected],
+                timings=StageTimings(
+                    **shared_timings,
+                    total=(finished - started_at).total_seconds(),
+                ),
+                tokens=spec_tokens,
+                content_sources=content_sources,
+                report=build_report(
+                    [summary.usage for summary in summaries] + [brief.usage],
+                    content_sources,
+                    options.model_prices,
+                ),
+            )
+            results[spec.name] = await self._finish_result(
+                result,
+                brief,
+                options,
+                retry,
+                f"{workflow.info().workflow_id}-{spec.name}.json",
+            )
+
+        return MultiBriefResult(
+            briefs=results,
+            timings=StageTimings(
+                **shared_timings, total=(finished - started_at).total_seconds()
+            ),
+            tokens=tokens,
+            report=build_report(
+                [summary.usage for summary in by_id.values()]
+                + [brief.usage for brief in briefs],
+                self._sources_for(union),
+                options.model_prices,
+            ),
+        )
@@ -0,0 +1,93 @@
+# mypy: disable-error-code="no-untyped-def"
+import importlib
+import tomllib
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from hnbrief.backfill import BackfillState, scan
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+
+DAY = 86400
+# 2026-01-01 00:00 UTC
+JAN_1 = 1767225600
+
+
+def make_story(story_id: int, time: int, score: int, **fields) -> HackerNewsStory:
+    return HackerNewsStory(
+        id=story_id,
+        type="story",
+        title=f"Story {story_id}",
+        url=f"https://example.com/{story_id}",
+        by="u",
+        time=time,
+        score=score,
+        **fields,
+    )
+
+
+def test_backfill_state_keeps_top_stories_per_day():
+    """Test that each day keeps only its highest scoring live stories."""
+    state = BackfillState(start_id=1, end_id=10, next_id=1)
+    state.add(
+        [
+            make_story(1, JAN_1 + 10, 5),
+            make_story(2, JAN_1 + 20, 50),
+            make_story(3, JAN_1 + 30, 20),
+            make_story(4, JAN_1 + DAY + 5, 1),
+            make_story(5, JAN_1 + 40, 99, dead=True),
+        ],
+        keep=2,
+    )
+
+    assert [story.id for story in state.days[date(2026, 1, 1)]] == [2, 3]
+    assert [story.id for story in state.days[date(2026, 1, 2)]] == [4]
+
+
+@pytest.mark.asyncio
+async def test_scan_resumes_from_saved_state(tmp_path):
+    """Test that a scan saves progress and a rerun skips scanned items."""
+    path = tmp_path / "state.json"
+    client = mock.Mock(spec=HackerNewsClient)
+
+    with mock.patch("hnbrief.backfill.SCAN_CHUNK_SIZE", 4):
+        state = BackfillState.load(path, 1, 6)
+        client.get_story_details.side_effect = [
+            [make_story(story_id, JAN_1, story_id) for story_id in range(1, 5)],
+            ConnectionError("interrupted"),
+            ConnectionError("interrupted"),
+            ConnectionError("interrupted"),
+        ]
+        with (
+            mock.patch("hnbrief.backfill.asyncio.sleep"),
+            pytest.raises(ConnectionError),
+        ):
+            await scan(client, state, path, keep=10)
+
+        resumed = BackfillState.load(path, 1, 6)
+        assert resumed.next_id == 5
+        client.get_story_details.side_effect = None
+        client.get_story_details.return_value = [make_story(6, JAN_1, 6)]
+        await scan(client, resumed, path, keep=10)
+
+    client.get_story_details.assert_called_with([5, 6])
+    assert [story.id for story in resumed.days[date(2026, 1, 1)]] == [6, 4, 3, 2, 1]
+    # A different ID range starts over
+    assert BackfillState.load(path, 1, 100).next_id == 1
+
+
+def test_backfill_console_script_runs_main():
+    """Test that the hnbrief-backfill entry point actually runs the command."""
+    pyproject = tomllib.loads(
+        (Path(__file__).parents[1] / "pyproject.toml").read_text(encoding="utf-8")
+    )
+    target = pyproject["project"]["scripts"]["hnbrief-backfill"]
+    module, _, name = target.partition(":")
+    entry_point = getattr(importlib.import_module(module), name)
+
+    with mock.patch("hnbrief.backfill.main", mock.AsyncMock()) as main:
+        assert entry_point() is None
+
+    main.assert_awaited_once_with()
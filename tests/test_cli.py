@@ -0,0 +1,125 @@
+# mypy: disable-error-code="no-untyped-def"
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from hnbrief.cli import format_progress, format_report, load_specs, write_briefs
+from hnbrief.workflows.hackernews import (
+    BriefProgress,
+    FetchReport,
+    ModelUsage,
+    RunReport,
+    StageProgress,
+    StageTimings,
+)
+
+
+def test_format_progress():
+    """Test that workflow progress renders as a single status line."""
+    progress = BriefProgress(
+        details=StageProgress(done=70, total=70),
+        markdown=StageProgress(done=30, total=35),
+        summaries=StageProgress(done=28, total=35),
+    )
+
+    assert format_progress(progress) == (
+        "details 70/70  markdown 30/35  summaries 28/35  brief 0/0"
+    )
+
+
+def test_format_progress_deadline():
+    """Test that a reached deadline is flagged in the status line."""
+    progress = BriefProgress(deadline_reached=True)
+
+    assert format_progress(progress).endswith("(deadline reached)")
+
+
+def test_format_progress_comments():
+    """Test that the comments stage is shown once it has work."""
+    progress = BriefProgress(comments=StageProgress(done=3, total=35))
+
+    assert "markdown 0/0  comments 3/35  summaries 0/0" in format_progress(progress)
+
+
+def test_format_report():
+    """Test that the run report lists stage times, models, cost and fetches."""
+    report = RunReport(
+        models={
+            "cheap": ModelUsage(
+                calls=2,
+                prompt_tokens=4000,
+                completion_tokens=400,
+                seconds=4.0,
+                cost=0.0048,
+            ),
+            "unknown": ModelUsage(calls=1, prompt_tokens=500, completion_tokens=50),
+        },
+        cost=0.0048,
+        unpriced_models=["unknown"],
+        fetches=FetchReport(
+            articles=1, size_bytes=2 * 1024 * 1024, seconds=0.5, cached_articles=1
+        ),
+    )
+    timings = StageTimings(details=1.0, stories=20.0, brief=5.0, total=26.0)
+
+    lines = format_report(report, timings).splitlines()
+
+    assert lines[1] == "  stages: details 1.0s  stories 20.0s  brief 5.0s  total 26.0s"
+    assert lines[2] == (
+        "  cheap: 2 calls  4000 prompt + 400 completion tokens  4.0s  $0.0048"
+    )
+    assert lines[3].endswith("0.0s  no price")
+    assert lines[4] == "  estimated cost: $0.0048 (no price for unknown)"
+    assert lines[5] == "  fetched: 1 articles  2.00 MiB  0.5s"
+    assert lines[6] == "  cache: 1 articles  0.00 MiB  0.0s saved"
+
+
+def test_load_specs(tmp_path):
+    """Test that a spec file yields validated brief specs."""
+    path = tmp_path / "briefs.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"name": "all"},
+                {
+                    "name": "rust",
+                    "story_filter": {"allowed_domains": ["rust-lang.org"]},
+                    "max_stories": 5,
+                    "prompt": "daily_brief_short",
+                    "model": "test-model",
+                },
+            ]
+        )
+    )
+
+    specs = load_specs(path)
+
+    assert [spec.name for spec in specs] == ["all", "rust"]
+    assert specs[0].prompt == "daily_brief"
+    assert specs[1].story_filter.allowed_domains == ["rust-lang.org"]
+
+
+def test_load_specs_rejects_bad_files(tmp_path):
+    """Test that duplicate names and unsafe brief or prompt names are rejected."""
+    path = tmp_path / "briefs.json"
+    path.write_text(json.dumps([{"name": "a"}, {"name": "a"}]))
+    with pytest.raises(ValueError, match="Duplicate brief names"):
+        load_specs(path)
+
+    path.write_text(json.dumps([{"name": "a", "prompt": "../secrets"}]))
+    with pytest.raises(ValidationError):
+        load_specs(path)
+
+    for name in ("../../etc/passwd", "a/b", "", "Rust"):
+        path.write_text(json.dumps([{"name": name}]))
+        with pytest.raises(ValidationError):
+            load_specs(path)
+
+
+def test_write_briefs_to_directory(tmp_path):
+    """Test that each brief is written to its own file."""
+    write_briefs({"all": "# All", "rust": "# Rust"}, "markdown", tmp_path / "out")
+
+    assert (tmp_path / "out" / "rust.md").read_text() == "# Rust"
+    assert (tmp_path / "out" / "all.md").read_text() == "# All"
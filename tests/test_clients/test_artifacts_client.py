@@ -0,0 +1,46 @@
+# mypy: disable-error-code="no-untyped-def"
+import pytest
+
+from hnbrief.clients.artifacts import ArtifactStore
+
+
+def test_artifact_store_round_trip(tmp_path):
+    """Test that a saved artifact can be loaded through its reference."""
+    store = ArtifactStore(tmp_path / "artifacts")
+
+    ref = store.save("brief.json", '{"brief": "content"}')
+
+    assert ref.size_bytes == len('{"brief": "content"}')
+    assert store.load(ref) == '{"brief": "content"}'
+    assert list((tmp_path / "artifacts").iterdir()) == [
+        tmp_path / "artifacts" / "brief.json"
+    ]
+
+
+def test_artifact_ref_resolves_against_reader_root(tmp_path):
+    """Test that a reference saved under one root loads from another mount."""
+    ref = ArtifactStore(tmp_path / "worker").save("brief.json", "content")
+    (tmp_path / "worker").rename(tmp_path / "cli")
+
+    assert ref.name == "brief.json"
+    assert ArtifactStore(tmp_path / "cli").load(ref) == "content"
+
+
+def test_artifact_store_rejects_names_outside_root(tmp_path):
+    """Test that a reference cannot point outside the store's root."""
+    store = ArtifactStore(tmp_path / "artifacts")
+    ref = store.save("brief.json", "content")
+
+    with pytest.raises(ValueError):
+        store.load(ref.model_copy(update={"name": "../brief.json"}))
+
+
+def test_artifact_store_detects_modification(tmp_path):
+    """Test that loading a modified artifact fails the checksum check."""
+    store = ArtifactStore(tmp_path)
+    ref = store.save("brief.json", "original")
+
+    (tmp_path / "brief.json").write_text("changed")
+
+    with pytest.raises(ValueError):
+        store.load(ref)
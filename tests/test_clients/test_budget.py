@@ -0,0 +1,162 @@
+# mypy: disable-error-code="no-untyped-def"
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hnbrief.clients.budget import ByteBudget
+from hnbrief.clients.circuit import DomainBreakers
+from hnbrief.clients.fetchers import DirectFetcher
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+
+PAGE_BYTES = 256 * 1024
+PAGES = 16
+PARAGRAPH = "<p>" + "word " * 100 + "</p>"
+PAGE = (PARAGRAPH * (PAGE_BYTES // len(PARAGRAPH))).encode()
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_waits_until_bytes_are_released():
+    """Test that reservations over the budget wait for earlier ones to finish."""
+    budget = ByteBudget(100)
+    first = await budget.acquire(80)
+    waiting = asyncio.create_task(budget.acquire(50))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    await budget.release(first)
+    assert await waiting == 50
+    # Oversized reservations are capped so they can still run alone
+    await budget.release(50)
+    assert await budget.acquire(500) == 100
+
+    assert budget.stats.waits == 1
+    assert budget.stats.peak_bytes == 100
+
+
+async def large_page_server() -> TestServer:
+    """Local site serving large pages, half of them without Content-Length."""
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/html"})
+        if request.path.startswith("/chunked/"):
+            response.enable_chunked_encoding()
+        else:
+            response.content_length = len(PAGE)
+        await response.prepare(request)
+        # Trickle the body out so fetches overlap as they would on a network
+        for start in range(0, len(PAGE), 64 * 1024):
+            await response.write(PAGE[start : start + 64 * 1024])
+            await asyncio.sleep(0.02)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+@pytest.mark.asyncio
+async def test_large_pages_stay_within_byte_budget():
+    """Stress test: many large pages at once never exceed the byte budget."""
+    server = await large_page_server()
+    budget = ByteBudget(3 * PAGE_BYTES // 2)
+    client = HackerNewsClient(
+        fetchers=[DirectFetcher(max_bytes=2 * PAGE_BYTES)], byte_budget=budget
+    )
+    stories = [
+        HackerNewsStory(
+            id=index,
+            type="story",
+            title=f"Story {index}",
+            url=str(server.make_url(f"/{'chunked' if index % 2 else 'plain'}/{index}")),
+            by="u",
+            time=1,
+        )
+        for index in range(PAGES)
+    ]
+    try:
+        contents = await asyncio.gather(*map(client.get_story_content, stories))
+    finally:
+        await client.close()
+        await server.close()
+
+    assert all(content.size_bytes == len(PAGE) for content in contents)
+    assert budget.stats.peak_bytes <= 3 * PAGE_BYTES // 2
+    assert budget.stats.waits > 0
+    assert budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_waits_do_not_count_as_site_timeouts():
+    """Test that queueing for the byte budget can outlast a fetcher's timeout."""
+    server = await large_page_server()
+    budget = ByteBudget(PAGE_BYTES)
+    breakers = DomainBreakers(failure_threshold=1)
+    client = HackerNewsClient(
+        fetchers=[DirectFetcher(timeout=0.2, max_bytes=2 * PAGE_BYTES)],
+        byte_budget=budget,
+        breakers=breakers,
+    )
+    # Only one page fits at a time, so the last one queues for longer than 0.2s
+    stories = [
+        HackerNewsStory(
+            id=index,
+            type="story",
+            title=f"Story {index}",
+            url=str(server.make_url(f"/plain/{index}")),
+            by="u",
+            time=1,
+        )
+        for index in range(4)
+    ]
+    try:
+        contents = await asyncio.gather(*map(client.get_story_content, stories))
+    finally:
+        await client.close()
+        await server.close()
+
+    assert [content.strategy for content in contents] == ["direct"] * 4
+    assert budget.stats.wait_seconds > 0.2
+    assert client.negative_cache.stats.stored == 0
+    assert breakers.for_url(stories[0].url or "").state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_budget_wait_ends_when_time_runs_out():
+    """Test that a fetch queued past its time left fails without blaming the site."""
+    server = await large_page_server()
+    budget = ByteBudget(PAGE_BYTES)
+    breakers = DomainBreakers(failure_threshold=1)
+    client = HackerNewsClient(
+        fetchers=[DirectFetcher(max_bytes=2 * PAGE_BYTES)],
+        byte_budget=budget,
+        breakers=breakers,
+    )
+    story = HackerNewsStory(
+        id=1,
+        type="story",
+        title="Story 1",
+        url=str(server.make_url("/plain/1")),
+        by="u",
+        time=1,
+    )
+    # Another fetch holds the whole budget for longer than the time left
+    held = await budget.acquire(PAGE_BYTES)
+    try:
+        content = await asyncio.wait_for(
+            client.get_story_content(story, time_left=0.2), timeout=2
+        )
+    finally:
+        await budget.release(held)
+        await client.close()
+        await server.close()
+
+    assert content.markdown == ""
+    assert budget.stats.waits == 1
+    assert budget.in_flight == 0
+    assert client.negative_cache.stats.stored == 0
+    assert breakers.for_url(story.url or "").state == "closed"
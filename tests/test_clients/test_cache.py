@@ -0,0 +1,112 @@
+# mypy: disable-error-code="no-untyped-def"
+import json
+import sqlite3
+
+from hnbrief.clients.cache import ItemCache
+from hnbrief.clients.hackernews import HackerNewsStory
+
+NOW = 1_700_000_000.0
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def raw_item(item_id: int, created: float = NOW - 3600, **extra) -> bytes:
+    data = {
+        "id": item_id,
+        "type": "story",
+        "title": f"Story {item_id}",
+        "by": "user",
+        "time": int(created),
+        "score": 10,
+    }
+    data.update(extra)
+    return json.dumps(data).encode()
+
+
+def test_memory_hit_returns_same_object():
+    """Test that LRU hits return the stored model without re-validation."""
+    cache = ItemCache(clock=FakeClock(NOW))
+    raw = raw_item(1)
+    story = HackerNewsStory.model_validate_json(raw)
+    cache.put(1, raw, story)
+
+    assert cache.get(1, HackerNewsStory) is story
+    assert cache.get(2, HackerNewsStory) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_live_items_expire_but_frozen_items_do_not():
+    """Test mutable TTL for live items and permanence for settled ones."""
+    clock = FakeClock(NOW)
+    cache = ItemCache(clock=clock, mutable_ttl=60, frozen_after=86400)
+    cache.put(1, raw_item(1))
+    cache.put(2, raw_item(2, created=NOW - 2 * 86400))
+    cache.put(3, raw_item(3, dead=True))
+
+    clock.now += 120
+
+    assert cache.get(1, HackerNewsStory) is None
+    assert cache.get(2, HackerNewsStory) is not None
+    assert cache.get(3, HackerNewsStory) is not None
+    assert cache.stats.stale == 1
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    """Test that items persist in the SQLite file across cache instances."""
+    path = tmp_path / "items.db"
+    first = ItemCache(path, clock=FakeClock(NOW))
+    first.put(1, raw_item(1))
+    first.close()
+
+    second = ItemCache(path, clock=FakeClock(NOW + 1))
+    story = second.get(1, HackerNewsStory)
+
+    assert story is not None and story.title == "Story 1"
+    assert second.stats.disk_hits == 1
+    assert second.get(1, HackerNewsStory) is story
+    assert second.stats.hits == 1
+
+
+def test_batched_writes_commit_once(tmp_path):
+    """Test that items stored in a batch reach the disk in one commit."""
+    path = tmp_path / "items.db"
+    cache = ItemCache(path, max_items=1, clock=FakeClock(NOW))
+    statements: list[str] = []
+    assert cache.db is not None
+    cache.db.set_trace_callback(statements.append)
+    reader = sqlite3.connect(path)
+
+    with cache.batch():
+        with cache.batch():
+            for item_id in range(3):
+                cache.put(item_id, raw_item(item_id))
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone() == (0,)
+        # Items evicted from memory are still served before they are written
+        assert cache.get(0, HackerNewsStory) is not None
+
+    assert reader.execute("SELECT COUNT(*) FROM items").fetchone() == (3,)
+    assert statements.count("COMMIT") == 1
+    reader.close()
+    cache.close()
+
+
+def test_snapshot_round_trip_and_eviction(tmp_path):
+    """Test snapshot warm-up and LRU eviction counting."""
+    snapshot = tmp_path / "items.jsonl.gz"
+    source = ItemCache(clock=FakeClock(NOW))
+    for item_id in range(3):
+        source.put(item_id, raw_item(item_id))
+    assert source.save_snapshot(snapshot) == 3
+
+    warmed = ItemCache(clock=FakeClock(NOW), max_items=2)
+    assert warmed.load_snapshot(snapshot) == 3
+
+    assert warmed.stats.evictions == 1
+    assert warmed.get(0, HackerNewsStory) is None
+    assert warmed.get(2, HackerNewsStory) is not None
@@ -0,0 +1,118 @@
+# mypy: disable-error-code="no-untyped-def"
+import sqlite3
+
+from hnbrief.clients.circuit import (
+    NOT_FOUND,
+    TIMEOUT,
+    CircuitBreaker,
+    DomainBreakers,
+    NegativeCache,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Test that a breaker opens at the threshold and resets on success."""
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_a_single_probe():
+    """Test that after the reset timeout exactly one probe is let through."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 60
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed probe opens the circuit for another full reset period
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_release_frees_the_probe():
+    """Test that a released probe lets the next request probe the site."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure()
+    clock.now += 60
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_domain_breakers_are_per_host():
+    """Test that failures on one site do not block another."""
+    breakers = DomainBreakers(failure_threshold=1, clock=FakeClock())
+
+    breakers.for_url("https://Down.example.com/a").record_failure()
+
+    assert not breakers.for_url("https://down.example.com/b").allow()
+    assert breakers.for_url("https://up.example.com/a").allow()
+
+
+def test_negative_cache_expires_by_reason(tmp_path):
+    """Test that failures expire after their reason's TTL and persist."""
+    clock = FakeClock()
+    path = tmp_path / "negative.db"
+    cache = NegativeCache(path, ttls={TIMEOUT: 10, NOT_FOUND: 100}, clock=clock)
+
+    cache.put("https://a.example.com", TIMEOUT)
+    cache.put("https://b.example.com", NOT_FOUND)
+    assert cache.get("https://a.example.com") == TIMEOUT
+    cache.close()
+
+    reloaded = NegativeCache(path, ttls={TIMEOUT: 10, NOT_FOUND: 100}, clock=clock)
+    clock.now += 10
+    assert reloaded.get("https://a.example.com") is None
+    assert reloaded.get("https://b.example.com") == NOT_FOUND
+    assert reloaded.stats.hits == 1
+    reloaded.close()
+
+
+def test_negative_cache_deletes_expired_rows_on_load(tmp_path):
+    """Test that expired failures are removed from the file, not just skipped."""
+    clock = FakeClock()
+    path = tmp_path / "negative.db"
+    ttls = {TIMEOUT: 10.0, NOT_FOUND: 100.0}
+    cache = NegativeCache(path, ttls=ttls, clock=clock)
+    cache.put("https://a.example.com", TIMEOUT)
+    cache.put("https://b.example.com", NOT_FOUND)
+    cache.close()
+
+    clock.now += 10
+    reloaded = NegativeCache(path, ttls=ttls, clock=clock)
+    reloaded.close()
+
+    db = sqlite3.connect(path)
+    assert db.execute("SELECT url FROM failures").fetchall() == [
+        ("https://b.example.com",)
+    ]
+    db.close()
+    assert list(reloaded.entries) == ["https://b.example.com"]
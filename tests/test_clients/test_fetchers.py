@@ -0,0 +1,173 @@
+# mypy: disable-error-code="no-untyped-def"
+import asyncio
+from dataclasses import replace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hnbrief.clients.circuit import FORBIDDEN, TOO_LARGE
+from hnbrief.clients.fetchers import (
+    ArchiveFetcher,
+    ArticleTimeouts,
+    DirectFetcher,
+    PdfFetcher,
+)
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+
+
+def make_pdf(text: str) -> bytes:
+    """Smallest single-page PDF showing `text`."""
+    stream = f"BT /F1 18 Tf 20 100 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 144] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    out += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(out)
+
+
+async def fixture_server(requests: list[str]) -> TestServer:
+    """Local site with a PDF, blocked, slow and streamed pages, and a mirror."""
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        requests.append(request.path)
+        if request.path == "/streamed":
+            # Sent in pieces, so the body arrives over several reads
+            response = web.StreamResponse(headers={"Content-Type": "text/html"})
+            await response.prepare(request)
+            for part in ("<h1>Start</h1>", "<p>middle</p>" * 500, "<p>End</p>"):
+                await response.write(part.encode())
+                await asyncio.sleep(0.01)
+            await response.write_eof()
+            return response
+        if request.path.startswith("/mirror/"):
+            return web.Response(text="<h1>Archived</h1>", content_type="text/html")
+        if request.path == "/paper.pdf":
+            return web.Response(
+                body=make_pdf("Hello PDF world"), content_type="application/pdf"
+            )
+        if request.path == "/blocked":
+            return web.Response(status=403)
+        if request.path == "/huge":
+            return web.Response(text="x" * 4096, content_type="text/html")
+        if request.path == "/slow":
+            await asyncio.sleep(1)
+        return web.Response(text="<h1>Hello</h1>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def story_at(url: str) -> HackerNewsStory:
+    return HackerNewsStory(id=1, type="story", title="T", url=url, by="u", time=1)
+
+
+@pytest.mark.asyncio
+async def test_streamed_page_is_read_whole():
+    """Test that a body arriving in several chunks is read to the end."""
+    requests: list[str] = []
+    server = await fixture_server(requests)
+    client = HackerNewsClient(fetchers=[DirectFetcher()])
+    try:
+        content = await client.get_story_content(
+            story_at(str(server.make_url("/streamed")))
+        )
+    finally:
+        await client.close()
+        await server.close()
+
+    assert content.strategy == "direct"
+    assert content.markdown.startswith("# Start")
+    assert content.markdown.rstrip().endswith("End")
+    assert content.size_bytes == len("<h1>Start</h1><p>End</p>") + 13 * 500
+
+
+@pytest.mark.asyncio
+async def test_pdf_story_is_extracted():
+    """Test that a PDF the direct fetch rejects is read by the PDF fetcher."""
+    pytest.importorskip("pypdf")
+    requests: list[str] = []
+    server = await fixture_server(requests)
+    client = HackerNewsClient(fetchers=[DirectFetcher(), PdfFetcher(workers=1)])
+    try:
+        content = await client.get_story_content(
+            story_at(str(server.make_url("/paper.pdf")))
+        )
+    finally:
+        await client.close()
+        await server.close()
+
+    assert content.strategy == "pdf"
+    assert "Hello PDF world" in content.markdown
+    assert content.size_bytes > 0
+    assert client.fetch_stats["direct"].successes == 0
+    assert client.fetch_stats["pdf"].successes == 1
+
+
+@pytest.mark.asyncio
+async def test_archive_fallback_is_recorded_and_cached():
+    """Test that a blocked page comes from the mirror and is then reused."""
+    requests: list[str] = []
+    server = await fixture_server(requests)
+    mirror = str(server.make_url("/mirror/")) + "{url}"
+    client = HackerNewsClient(fetchers=[DirectFetcher(), ArchiveFetcher(mirror)])
+    story = story_at(str(server.make_url("/blocked")))
+    try:
+        content = await client.get_story_content(story)
+        assert await client.get_story_content(story) == replace(content, cached=True)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert content.strategy == "archive"
+    assert "# Archived" in content.markdown
+    assert requests[0] == "/blocked"
+    assert requests[1].startswith("/mirror/")
+    assert len(requests) == 2
+    assert client.negative_cache.get(story.url or "") is None
+
+
+@pytest.mark.asyncio
+async def test_fetcher_budgets():
+    """Test that each fetcher stops at its own timeout and byte limit."""
+    requests: list[str] = []
+    server = await fixture_server(requests)
+    mirror = str(server.make_url("/mirror/")) + "{url}"
+    client = HackerNewsClient(
+        article_timeouts=ArticleTimeouts(total=5),
+        fetchers=[DirectFetcher(timeout=0.1, max_bytes=1024), ArchiveFetcher(mirror)],
+    )
+    slow = story_at(str(server.make_url("/slow")))
+    huge = story_at(str(server.make_url("/huge")))
+    blocked = story_at(str(server.make_url("/blocked")))
+    try:
+        assert (await client.get_story_content(slow)).strategy == "archive"
+        assert (await client.get_story_content(huge)).strategy == "archive"
+        client.fetchers = [DirectFetcher()]
+        failed = await client.get_story_content(blocked)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert (failed.markdown, failed.strategy) == ("", None)
+    assert client.fetch_stats["direct"].attempts == 3
+    assert client.negative_cache.get(blocked.url or "") == FORBIDDEN
+    assert TOO_LARGE not in client.negative_cache.stats.by_reason
@@ -1,5 +1,42 @@
 # mypy: disable-error-code="no-untyped-def"
-from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+import asyncio
+from unittest import mock
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from hnbrief.clients.circuit import FORBIDDEN, NON_HTML, TIMEOUT, DomainBreakers
+from hnbrief.clients.fetchers import ArticleTimeouts
+from hnbrief.clients.hackernews import (
+    CommentLimits,
+    HackerNewsClient,
+    HackerNewsComment,
+    HackerNewsStory,
+)
+
+# Comment tree used by the thread tests: 1 -> (2 -> 5), 3 (dead, -> 6), 4
+COMMENTS = {
+    2: HackerNewsComment(id=2, type="comment", by="a", text="<p>First</p>", kids=[5]),
+    3: HackerNewsComment(id=3, type="comment", text="gone", dead=True, kids=[6]),
+    4: HackerNewsComment(id=4, type="comment", by="b", text="Second &amp; last"),
+    5: HackerNewsComment(id=5, type="comment", by="c", text="Reply"),
+    6: HackerNewsComment(id=6, type="comment", by="d", text="Hidden reply"),
+}
+THREAD = HackerNewsStory(
+    id=1,
+    type="story",
+    title="Story",
+    by="user",
+    time=123,
+    descendants=5,
+    kids=[2, 3, 4],
+)
+
+
+async def get_comment(item_id: int, model: type) -> HackerNewsComment:
+    return COMMENTS[item_id]
 
 
 def test_hackernews_client_initialization():
@@ -85,3 +122,218 @@ def test_story_model_filtering_logic():
     assert len(filtered_stories) == 2
     assert filtered_stories[0].id == 1
     assert filtered_stories[1].id == 4
+
+
+@pytest.mark.asyncio
+async def test_get_story_details_skips_invalid_items():
+    """Test that batch fetches drop items that are not valid stories."""
+    client = HackerNewsClient()
+    story = HackerNewsStory(id=1, type="story", title="Story", by="user", time=123)
+    invalid = HackerNewsStory.model_validate_json  # deleted items lack a title
+
+    async def get_story_detail(story_id):
+        if story_id == 2:
+            return invalid(b'{"id": 2, "deleted": true, "type": "story", "time": 1}')
+        return story
+
+    with mock.patch.object(client, "get_story_detail", get_story_detail):
+        assert await client.get_story_details([1, 2]) == [story]
+
+
+@pytest.mark.asyncio
+async def test_get_story_details_raises_network_errors():
+    """Test that network failures fail the batch so it can be retried."""
+    client = HackerNewsClient()
+
+    with mock.patch.object(
+        client,
+        "get_story_detail",
+        mock.AsyncMock(side_effect=aiohttp.ClientError("boom")),
+    ):
+        with pytest.raises(aiohttp.ClientError):
+            await client.get_story_details([1])
+
+
+@pytest.mark.asyncio
+async def test_get_comment_thread_is_breadth_first():
+    """Test that comments are fetched level by level, skipping dead branches."""
+    client = HackerNewsClient()
+
+    with mock.patch.object(client, "_get_item", get_comment):
+        thread = await client.get_comment_thread(THREAD)
+
+    assert [comment.id for comment in thread] == [2, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_get_comment_thread_respects_caps():
+    """Test that depth and count caps bound the fetched thread."""
+    client = HackerNewsClient(comment_limits=CommentLimits(max_depth=1))
+    fetch = mock.AsyncMock(side_effect=get_comment)
+
+    with mock.patch.object(client, "_get_item", fetch):
+        assert [c.id for c in await client.get_comment_thread(THREAD)] == [2, 4]
+
+    client = HackerNewsClient(comment_limits=CommentLimits(max_comments=1))
+    fetch.reset_mock()
+    with mock.patch.object(client, "_get_item", fetch):
+        assert [c.id for c in await client.get_comment_thread(THREAD)] == [2]
+    assert fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_comment_threads_share_the_global_limit():
+    """Test that one story's queued comments don't hold global slots."""
+    client = HackerNewsClient(
+        comment_limits=CommentLimits(concurrency=2, story_concurrency=1)
+    )
+    # IDs of the comments in flight whenever a request starts
+    in_flight: list[int] = []
+    overlaps: list[list[int]] = []
+
+    async def slow_comment(item_id: int, model: type) -> HackerNewsComment:
+        in_flight.append(item_id)
+        overlaps.append(sorted(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(item_id)
+        return HackerNewsComment(id=item_id, type="comment", by="a", text="Hi")
+
+    stories = [
+        THREAD.model_copy(update={"id": story_id, "kids": list(range(kid, kid + 5))})
+        for story_id, kid in ((1, 10), (2, 20))
+    ]
+    with mock.patch.object(client, "_get_item", slow_comment):
+        threads = await asyncio.gather(*map(client.get_comment_thread, stories))
+
+    assert [len(thread) for thread in threads] == [5, 5]
+    # The second story starts while the first story's queue is still waiting
+    assert overlaps[:2] == [[10], [10, 20]]
+    assert max(map(len, overlaps)) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_comment_thread_deadline_returns_partial_thread():
+    """Test that a slow level is abandoned once the deadline passes."""
+    client = HackerNewsClient(comment_limits=CommentLimits(deadline=0.05))
+
+    async def slow_replies(item_id: int, model: type) -> HackerNewsComment:
+        if item_id == 5:
+            await asyncio.sleep(1)
+        return COMMENTS[item_id]
+
+    with mock.patch.object(client, "_get_item", slow_replies):
+        thread = await client.get_comment_thread(THREAD)
+
+    assert [comment.id for comment in thread] == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_get_top_comments_formats_and_caches():
+    """Test that top comments are plain text and complete threads are reused."""
+    client = HackerNewsClient()
+    fetch = mock.AsyncMock(side_effect=get_comment)
+
+    with mock.patch.object(client, "_get_item", fetch):
+        comments = await client.get_top_comments(THREAD)
+        fetched = fetch.await_count
+        assert await client.get_top_comments(THREAD) == comments
+
+    assert comments == ["a: First", "b: Second & last", "c: Reply"]
+    assert fetch.await_count == fetched
+
+
+async def article_server(requests: list[str]) -> TestServer:
+    """Local site with a working page, a blocked page, a PDF and a slow page."""
+
+    async def handle(request: web.Request) -> web.Response:
+        requests.append(request.path)
+        if request.path == "/forbidden":
+            return web.Response(status=403)
+        if request.path == "/paper.pdf":
+            return web.Response(body=b"%PDF-1.4", content_type="application/pdf")
+        if request.path == "/slow":
+            await asyncio.sleep(1)
+        return web.Response(text="<h1>Hello</h1>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def story_at(url: str) -> HackerNewsStory:
+    return HackerNewsStory(id=1, type="story", title="T", url=url, by="u", time=1)
+
+
+@pytest.mark.asyncio
+async def test_get_story_markdown_caches_failures():
+    """Test that failed URLs are remembered with a reason and not refetched."""
+    requests: list[str] = []
+    server = await article_server(requests)
+    client = HackerNewsClient()
+    try:
+        ok = story_at(str(server.make_url("/ok")))
+        forbidden = story_at(str(server.make_url("/forbidden")))
+        pdf = story_at(str(server.make_url("/paper.pdf")))
+
+        assert "# Hello" in await client.get_story_markdown(ok)
+        for story in (forbidden, pdf, forbidden, pdf):
+            assert await client.get_story_markdown(story) == ""
+    finally:
+        await client.close()
+        await server.close()
+
+    assert requests == ["/ok", "/forbidden", "/paper.pdf"]
+    assert client.negative_cache.get(forbidden.url or "") == FORBIDDEN
+    assert client.negative_cache.get(pdf.url or "") == NON_HTML
+
+
+@pytest.mark.asyncio
+async def test_get_story_markdown_opens_circuit_on_timeouts():
+    """Test that slow sites time out early and then stop being requested."""
+    requests: list[str] = []
+    server = await article_server(requests)
+    client = HackerNewsClient(
+        article_timeouts=ArticleTimeouts(connect=1, read=0.1, total=0.2),
+        breakers=DomainBreakers(failure_threshold=2),
+    )
+    urls = [str(server.make_url(page)) for page in ("/slow", "/slow?2", "/ok")]
+    try:
+        for url in urls:
+            assert await client.get_story_markdown(story_at(url)) == ""
+    finally:
+        await client.close()
+        await server.close()
+
+    # The working page is skipped once the site's circuit is open
+    assert requests == ["/slow", "/slow"]
+    assert client.negative_cache.get(urls[0]) == TIMEOUT
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_the_circuit():
+    """Test that cancelling a half-open probe lets the site be probed again."""
+    requests: list[str] = []
+    server = await article_server(requests)
+    client = HackerNewsClient(breakers=DomainBreakers(reset_timeout=0))
+    slow = str(server.make_url("/slow"))
+    breaker = client.breakers.for_url(slow)
+    breaker.opened_at = 0.0
+    try:
+        probe = asyncio.create_task(client.get_story_markdown(story_at(slow)))
+        while not requests:
+            await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert not breaker.probing
+        ok = story_at(str(server.make_url("/ok")))
+        assert "# Hello" in await client.get_story_markdown(ok)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert breaker.state == "closed"
+    assert requests == ["/slow", "/ok"]
@@ -1,8 +1,40 @@
 # mypy: disable-error-code="no-untyped-def"
+import asyncio
 import pytest
+from dataclasses import asdict
+from datetime import datetime
 from unittest import mock
 
-from hnbrief.clients.openai import OpenAIClient, StorySummary
+import poml  # type: ignore[import-untyped]
+from openai import DefaultAsyncHttpxClient
+from openai.types import CompletionUsage
+
+from hnbrief.clients.openai import (
+    LatencyTracker,
+    OpenAIClient,
+    StoryCluster,
+    StorySummary,
+    TokenUsage,
+    prompt_fields,
+)
+from hnbrief.config import OpenAIConfig
+
+
+def configure_llm_settings(config: mock.Mock) -> None:
+    """Give a mocked config real values for the cascade and hedging settings."""
+    config.fallback_models = []
+    config.fallback_base_url = None
+    config.fallback_api_key = None
+    config.summarize_attempt_timeout = 5.0
+    config.daily_brief_attempt_timeout = 5.0
+    config.hedge_delay = 1.0
+    config.hedge_percentile = 0.9
+    config.prompt_workers = 2
+    config.http_max_connections = None
+    config.http_keepalive_expiry = 5.0
+    config.http2 = False
+    config.http_connect_timeout = 1.0
+    config.http_pool_timeout = 1.0
 
 
 @pytest.mark.asyncio
@@ -11,6 +43,7 @@ async def test_summarize_story_success():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.summarize_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         # Mock the OpenAI client
@@ -43,6 +76,7 @@ async def test_summarize_story_success():
                 call_args = mock_poml.call_args
                 assert call_args[1]["context"]["title"] == "Test Title"
                 assert call_args[1]["context"]["markdown"] == "# Markdown content"
+                assert call_args[1]["context"]["comments"] == []
 
 
 @pytest.mark.asyncio
@@ -51,6 +85,7 @@ async def test_summarize_story_empty_markdown():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.summarize_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         result = await client.summarize_story("Test Title", "https://example.com", "")
@@ -67,6 +102,7 @@ async def test_summarize_story_openai_error():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.summarize_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         # Mock the POML function
@@ -96,6 +132,7 @@ async def test_create_daily_brief_success():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.daily_brief_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         summaries = [
@@ -125,12 +162,14 @@ async def test_create_daily_brief_success():
 
                 result = await client.create_daily_brief(summaries)
 
-                assert result == "Daily brief content here."
+                assert result.text == "Daily brief content here."
 
                 # Verify POML was called with correct context
                 mock_poml.assert_called_once()
                 call_args = mock_poml.call_args
-                assert len(call_args[1]["context"]["summaries"]) == 2
+                # Without clusters, each story is its own group
+                clusters = call_args[1]["context"]["clusters"]
+                assert [len(c["summaries"]) for c in clusters] == [1, 1]
                 assert "current_date" in call_args[1]["context"]
 
 
@@ -140,11 +179,12 @@ async def test_create_daily_brief_empty_summaries():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.daily_brief_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         result = await client.create_daily_brief([])
 
-        assert result == "No stories to summarize."
+        assert result.text == "No stories to summarize."
 
 
 @pytest.mark.asyncio
@@ -153,6 +193,7 @@ async def test_create_daily_brief_openai_error():
     # Mock the config to avoid validation errors
     with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
         mock_config.return_value.daily_brief_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
         client = OpenAIClient("https://api.example.com", "test-key")
 
         summaries = [
@@ -174,4 +215,316 @@ async def test_create_daily_brief_openai_error():
 
                 result = await client.create_daily_brief(summaries)
 
-                assert result == "Failed to generate daily brief."
+                assert result.text == "Failed to generate daily brief."
+
+
+def make_response(content: str) -> mock.Mock:
+    """Build a mocked chat completion response."""
+    response = mock.Mock()
+    response.choices = [mock.Mock()]
+    response.choices[0].message.content = content
+    return response
+
+
+@pytest.mark.asyncio
+async def test_summarize_story_falls_back_on_error():
+    """Test that a failing primary model cascades to the fallback model."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "primary"
+        configure_llm_settings(mock_config.return_value)
+        mock_config.return_value.fallback_models = ["backup"]
+        client = OpenAIClient("https://api.example.com", "test-key")
+
+        async def create(**kwargs):
+            if kwargs["model"] == "primary":
+                raise Exception("API Error")
+            return make_response(f"summary from {kwargs['model']}")
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                mock_poml.return_value = {"messages": []}
+
+                result = await client.summarize_story(
+                    "Test Title", "https://example.com", "# Content"
+                )
+
+                assert result.text == "summary from backup"
+
+
+@pytest.mark.asyncio
+async def test_summarize_story_hedges_slow_request():
+    """Test that a slow primary request is hedged and the fastest result wins."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "primary"
+        configure_llm_settings(mock_config.return_value)
+        mock_config.return_value.fallback_models = ["backup"]
+        mock_config.return_value.hedge_delay = 0.01
+        client = OpenAIClient("https://api.example.com", "test-key")
+        models_called = []
+
+        async def create(**kwargs):
+            models_called.append(kwargs["model"])
+            if kwargs["model"] == "primary":
+                await asyncio.sleep(10)
+            return make_response(f"summary from {kwargs['model']}")
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                mock_poml.return_value = {"messages": []}
+
+                result = await asyncio.wait_for(
+                    client.summarize_story(
+                        "Test Title", "https://example.com", "# Content"
+                    ),
+                    timeout=1,
+                )
+
+                assert result.text == "summary from backup"
+                assert models_called == ["primary", "backup"]
+
+
+def test_latency_tracker_percentile():
+    """Test that the hedge percentile needs a minimum number of samples."""
+    tracker = LatencyTracker()
+    for seconds in range(1, 10):
+        tracker.record(float(seconds))
+    assert tracker.percentile(0.9) is None
+
+    for seconds in range(10, 101):
+        tracker.record(float(seconds))
+    assert tracker.percentile(0.9) == 91.0
+
+
+@pytest.mark.asyncio
+async def test_summarize_story_records_usage():
+    """Test that token usage and the answering model are kept on the summary."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "test-model"
+        configure_llm_settings(mock_config.return_value)
+        client = OpenAIClient("https://api.example.com", "test-key")
+
+        mock_response = make_response("Summary.")
+        mock_response.usage = CompletionUsage(
+            prompt_tokens=120, completion_tokens=30, total_tokens=150
+        )
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(
+                client.client.chat.completions,
+                "create",
+                mock.AsyncMock(return_value=mock_response),
+            ):
+                mock_poml.return_value = {"messages": []}
+
+                result = await client.summarize_story(
+                    "Test Title", "https://example.com", "# Content"
+                )
+
+                assert result.usage == TokenUsage(
+                    prompt_tokens=120,
+                    completion_tokens=30,
+                    model="test-model",
+                    seconds=result.usage.seconds,
+                )
+                assert result.usage.seconds >= 0
+
+
+@pytest.mark.asyncio
+async def test_create_daily_brief_prompt_and_model_override():
+    """Test that a brief can use another prompt template and model."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.daily_brief_model = "default-model"
+        configure_llm_settings(mock_config.return_value)
+        client = OpenAIClient("https://api.example.com", "test-key")
+        summaries = [StorySummary(title="Story", url=None, text="Summary")]
+        create = mock.AsyncMock(return_value=make_response("Headlines"))
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            mock_poml.return_value = {"messages": []}
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                result = await client.create_daily_brief(
+                    summaries, prompt="daily_brief_short", model="spec-model"
+                )
+
+        assert result.text == "Headlines"
+        assert mock_poml.call_args[0][0].endswith("daily_brief_short.poml")
+        assert create.call_args.kwargs["model"] == "spec-model"
+
+
+@pytest.mark.asyncio
+async def test_create_daily_brief_renders_prompt_off_event_loop():
+    """Test that threaded rendering keeps the loop free and matches poml output."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.daily_brief_model = "brief-model"
+        configure_llm_settings(mock_config.return_value)
+        client = OpenAIClient("https://api.example.com", "test-key")
+    summaries = [
+        StorySummary(title=f"Story {index}", url=f"https://e.com/{index}", text="Sum")
+        for index in range(3)
+    ]
+    clusters = [
+        StoryCluster(summaries=summaries[:2], keywords=["rust"]),
+        StoryCluster(summaries=summaries[2:], duplicate_urls=["https://f.com/2"]),
+    ]
+    create = mock.AsyncMock(return_value=make_response("Brief"))
+
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    try:
+        with mock.patch.object(client.client.chat.completions, "create", create):
+            await client.create_daily_brief(summaries, clusters)
+    finally:
+        ticker.cancel()
+        await client.close()
+
+    # The same render made inline, as the client used to
+    expected = poml.poml(
+        str(client.prompts_dir / "daily_brief.poml"),
+        format="openai_chat",
+        context={
+            "clusters": [
+                asdict(cluster, dict_factory=prompt_fields) for cluster in clusters
+            ],
+            "current_date": datetime.now().strftime("%B %d, %Y"),
+        },
+    )
+    assert create.call_args.kwargs["messages"] == expected["messages"]
+    assert client.prompts.stats["daily_brief"].renders == 1
+    # The loop kept running while Node rendered the template
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_endpoints_share_one_sized_connection_pool():
+    """Test that primary and fallback endpoints share a pool of the given size."""
+    config = OpenAIConfig.model_validate(
+        {
+            "OPENROUTER_API_KEY": "test-key",
+            "FALLBACK_MODELS": "fallback-model",
+            "FALLBACK_BASE_URL": "https://fallback.example.com",
+            "OPENAI_HTTP2": True,
+        }
+    )
+    with (
+        mock.patch("hnbrief.clients.openai.HAS_H2", False),
+        mock.patch(
+            "hnbrief.clients.openai.DefaultAsyncHttpxClient",
+            wraps=DefaultAsyncHttpxClient,
+        ) as http_client,
+    ):
+        client = OpenAIClient(
+            "https://api.example.com", "test-key", config, max_connections=32
+        )
+
+    kwargs = http_client.call_args.kwargs
+    assert kwargs["limits"].max_connections == 32
+    assert kwargs["limits"].max_keepalive_connections == 32
+    # HTTP/2 falls back to HTTP/1.1 without the http2 extra
+    assert kwargs["http2"] is False
+    assert client._get_fallback_client()._client is client.http_client
+
+    await client.close()
+    assert client.http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_queued_request_is_not_hedged_or_timed_out():
+    """Test that waiting for a free connection doesn't count toward deadlines."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "primary"
+        configure_llm_settings(mock_config.return_value)
+        mock_config.return_value.fallback_models = ["backup"]
+        mock_config.return_value.hedge_delay = 0.05
+        mock_config.return_value.summarize_attempt_timeout = 0.2
+        client = OpenAIClient("https://api.example.com", "test-key", max_connections=1)
+        models_called = []
+
+        async def create(**kwargs):
+            models_called.append(kwargs["model"])
+            await asyncio.sleep(0.02)
+            return make_response(f"summary from {kwargs['model']}")
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                mock_poml.return_value = {"messages": []}
+
+                # Hold the only connection for longer than both deadlines
+                async with client.request_slots:
+                    queued = asyncio.create_task(
+                        client.summarize_story(
+                            "Test Title", "https://example.com", "# Content"
+                        )
+                    )
+                    await asyncio.sleep(0.3)
+                    assert models_called == []
+
+                result = await asyncio.wait_for(queued, timeout=1)
+
+                assert result.text == "summary from primary"
+                assert models_called == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_cascade_stops_at_overall_deadline():
+    """Test that the time left caps attempts and no fallback starts after it."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "primary"
+        configure_llm_settings(mock_config.return_value)
+        mock_config.return_value.fallback_models = ["backup"]
+        client = OpenAIClient("https://api.example.com", "test-key")
+        models_called = []
+
+        async def create(**kwargs):
+            models_called.append(kwargs["model"])
+            await asyncio.sleep(10)
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                mock_poml.return_value = {"messages": []}
+
+                result = await asyncio.wait_for(
+                    client.summarize_story(
+                        "Test Title", "https://example.com", "# Content", time_left=0.1
+                    ),
+                    timeout=1,
+                )
+
+        assert result.text == ""
+        assert models_called == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_connection_counts_toward_overall_deadline():
+    """Test that a request queued past the time left gives up without a call."""
+    with mock.patch("hnbrief.clients.openai.get_openai_config") as mock_config:
+        mock_config.return_value.summarize_model = "primary"
+        configure_llm_settings(mock_config.return_value)
+        client = OpenAIClient("https://api.example.com", "test-key", max_connections=1)
+        create = mock.AsyncMock(return_value=make_response("summary"))
+
+        with mock.patch("hnbrief.clients.openai.poml.poml") as mock_poml:
+            with mock.patch.object(client.client.chat.completions, "create", create):
+                mock_poml.return_value = {"messages": []}
+
+                async with client.request_slots:
+                    result = await asyncio.wait_for(
+                        client.summarize_story(
+                            "Test Title",
+                            "https://example.com",
+                            "# Content",
+                            time_left=0.1,
+                        ),
+                        timeout=1,
+                    )
+
+        assert result.text == ""
+        create.assert_not_called()
+        # The slot given up on is not leaked
+        assert not client.request_slots.locked()
@@ -0,0 +1,141 @@
+# mypy: disable-error-code="no-untyped-def"
+from unittest import mock
+
+import pytest
+
+from hnbrief.clients.fetchers import StoryContent
+from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
+from hnbrief.clients.openai import OpenAIClient, StorySummary, TokenUsage
+from hnbrief.clients.recording import (
+    Archive,
+    RecordingHackerNewsClient,
+    RecordingOpenAIClient,
+    ReplayHackerNewsClient,
+    ReplayMissError,
+    ReplayOpenAIClient,
+)
+from hnbrief.config import OpenAIConfig
+
+STORY = HackerNewsStory(
+    id=123,
+    type="story",
+    title="Test Story",
+    url="https://example.com",
+    by="testuser",
+    time=1234567890,
+)
+
+
+@pytest.mark.asyncio
+async def test_hackernews_record_then_replay(tmp_path):
+    """Test that recorded HN responses replay identically from the archive."""
+    archive = Archive(tmp_path / "archive.jsonl.gz")
+    recorder = RecordingHackerNewsClient(archive)
+
+    with (
+        mock.patch.object(
+            HackerNewsClient, "get_list_of_stories", mock.AsyncMock(return_value=[123])
+        ),
+        mock.patch.object(
+            HackerNewsClient,
+            "_fetch_item",
+            mock.AsyncMock(return_value=STORY.model_dump_json().encode()),
+        ),
+        mock.patch.object(
+            HackerNewsClient,
+            "get_story_content",
+            mock.AsyncMock(return_value=StoryContent("# MD", "pdf", 2048, 0.5)),
+        ),
+        mock.patch.object(
+            HackerNewsClient, "get_top_comments", mock.AsyncMock(return_value=["a: b"])
+        ),
+    ):
+        await recorder.get_list_of_stories()
+        await recorder.get_story_detail(123)
+        await recorder.get_story_markdown(STORY)
+        await recorder.get_top_comments(STORY)
+    archive.save()
+
+    replayer = ReplayHackerNewsClient(Archive.load(archive.path))
+
+    assert await replayer.get_list_of_stories() == [123]
+    assert await replayer.get_story_detail(123) == STORY
+    assert await replayer.get_story_markdown(STORY) == "# MD"
+    assert await replayer.get_story_content(STORY) == StoryContent(
+        "# MD", "pdf", 2048, 0.5
+    )
+    assert await replayer.get_top_comments(STORY) == ["a: b"]
+    with pytest.raises(ReplayMissError):
+        await replayer.get_story_detail(456)
+
+
+@pytest.mark.asyncio
+async def test_hackernews_replay_skips_recorded_invalid_items(tmp_path):
+    """Test that deleted and missing items are skipped on replay as when recorded."""
+    archive = Archive(tmp_path / "archive.jsonl.gz")
+    recorder = RecordingHackerNewsClient(archive)
+    responses = {
+        1: STORY.model_copy(update={"id": 1}).model_dump_json().encode(),
+        2: b'{"id": 2, "type": "story", "deleted": true, "time": 1234567890}',
+        3: b"null",
+        4: STORY.model_copy(update={"id": 4}).model_dump_json().encode(),
+    }
+
+    async def fetch_item(item_id):
+        return responses[item_id]
+
+    with mock.patch.object(
+        HackerNewsClient, "_fetch_item", mock.AsyncMock(side_effect=fetch_item)
+    ):
+        recorded = await recorder.get_story_details([1, 2, 3, 4])
+    archive.save()
+
+    replayer = ReplayHackerNewsClient(Archive.load(archive.path))
+    replayed = await replayer.get_story_details([1, 2, 3, 4])
+
+    assert [story.id for story in recorded] == [1, 4]
+    assert replayed == recorded
+
+
+@pytest.mark.asyncio
+async def test_hackernews_replays_archives_of_validated_items(tmp_path):
+    """Test that archives recorded before raw items still replay."""
+    archive = Archive(tmp_path / "archive.jsonl.gz")
+    archive.put("item", "123", STORY.model_dump(), 0.0)
+
+    replayer = ReplayHackerNewsClient(archive)
+
+    assert await replayer.get_story_detail(123) == STORY
+
+
+@pytest.mark.asyncio
+async def test_openai_record_then_replay(tmp_path):
+    """Test that recorded summaries and briefs replay without an API key."""
+    archive = Archive(tmp_path / "archive.jsonl.gz")
+    summary = StorySummary(
+        title="Test Story",
+        url="https://example.com",
+        text="Summary.",
+        usage=TokenUsage(prompt_tokens=10, completion_tokens=5),
+    )
+
+    config = OpenAIConfig.model_validate({"OPENROUTER_API_KEY": "key"})
+    recorder = RecordingOpenAIClient(
+        "https://api.example.com", "key", archive, config=config
+    )
+
+    with mock.patch.object(
+        OpenAIClient, "summarize_story", mock.AsyncMock(return_value=summary)
+    ):
+        await recorder.summarize_story("Test Story", "https://example.com", "# MD")
+    archive.save()
+
+    replayer = ReplayOpenAIClient(Archive.load(archive.path))
+
+    for _ in range(2):
+        assert (
+            await replayer.summarize_story("Test Story", "https://example.com", "# MD")
+            == summary
+        )
+    with pytest.raises(ReplayMissError):
+        await replayer.summarize_story("Test Story", "https://example.com", "# Other")
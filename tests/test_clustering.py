@@ -0,0 +1,78 @@
+# mypy: disable-error-code="no-untyped-def"
+import numpy as np
+
+from hnbrief.clients.openai import StorySummary
+from hnbrief.clustering import cluster_summaries, tokenize, vectorize
+
+
+def make_summary(title: str, text: str, url: str = "") -> StorySummary:
+    return StorySummary(title=title, url=url or None, text=text)
+
+
+SUMMARIES = [
+    make_summary(
+        "OpenAI releases GPT-5",
+        "OpenAI released GPT-5, a large language model with better reasoning "
+        "and coding benchmarks.",
+        "https://openai.example/gpt-5",
+    ),
+    make_summary(
+        "Rust 1.90 released",
+        "The Rust team shipped Rust 1.90 with faster compile times and a new "
+        "default linker.",
+        "https://rust.example/1.90",
+    ),
+    make_summary(
+        "GPT-5 is out",
+        "OpenAI has released GPT-5, its large language model, with improved "
+        "reasoning and coding benchmarks.",
+        "https://news.example/gpt-5",
+    ),
+    make_summary(
+        "New language model tops coding benchmarks",
+        "A large language model from another lab now leads coding benchmarks.",
+        "https://lab.example/model",
+    ),
+]
+
+
+def test_tokenize_drops_stop_words():
+    """Test that tokens are lowercased without stop words or single letters."""
+    assert tokenize("The C++ and C# compilers, a GPT-5 port") == [
+        "c++",
+        "c#",
+        "compilers",
+        "gpt",
+        "port",
+    ]
+
+
+def test_vectorize_normalizes_rows():
+    """Test that document vectors are unit length, or zero when empty."""
+    vectors, _ = vectorize(["rust compiler release", "", "rust release"])
+
+    norms = np.linalg.norm(vectors, axis=1)
+    assert np.allclose(norms, [1.0, 0.0, 1.0])
+    assert vectors[0] @ vectors[2] > 0.5
+
+
+def test_cluster_summaries_folds_duplicates_and_groups_topics():
+    """Test that duplicates collapse into the top story and topics group."""
+    clusters = cluster_summaries(SUMMARIES)
+
+    assert [[s.title for s in c.summaries] for c in clusters] == [
+        ["OpenAI releases GPT-5", "New language model tops coding benchmarks"],
+        ["Rust 1.90 released"],
+    ]
+    assert clusters[0].duplicate_urls == ["https://news.example/gpt-5"]
+    assert "rust" in clusters[1].keywords
+
+
+def test_cluster_summaries_thresholds():
+    """Test that strict thresholds leave every story on its own."""
+    clusters = cluster_summaries(
+        SUMMARIES, cluster_threshold=1.0, duplicate_threshold=1.0
+    )
+
+    assert [len(c.summaries) for c in clusters] == [1, 1, 1, 1]
+    assert cluster_summaries([]) == []
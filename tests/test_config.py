@@ -95,3 +95,26 @@ def test_get_hackernews_config_validation(
     else:
         config = get_hackernews_config()
         assert config.max_stories == max_stories
+
+
+def test_get_hackernews_config_filters(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test HackerNews story filter settings parse from environment variables."""
+    monkeypatch.setenv("MIN_SCORE", "20")
+    monkeypatch.setenv("BLOCKED_DOMAINS", "example.com, medium.com ,")
+    config = get_hackernews_config()
+    assert config.min_score == 20
+    assert config.blocked_domains == ["example.com", "medium.com"]
+    assert config.allowed_domains == []
+    assert config.overfetch_factor == 2.0
+
+
+def test_get_hackernews_config_model_prices(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that model prices parse from model=prompt/completion pairs."""
+    monkeypatch.setenv(
+        "MODEL_PRICES", "openai/gpt-4o-mini=0.15/0.60, x-ai/grok-4-fast:free=0/0"
+    )
+    config = get_hackernews_config()
+    assert config.model_prices == {
+        "openai/gpt-4o-mini": (0.15, 0.6),
+        "x-ai/grok-4-fast:free": (0.0, 0.0),
+    }
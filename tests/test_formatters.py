@@ -0,0 +1,82 @@
+# mypy: disable-error-code="no-untyped-def"
+import json
+
+import pytest
+
+from hnbrief.clients.openai import StorySummary
+from hnbrief.formatters import markdown_to_html, render
+from hnbrief.workflows.hackernews import DailyBriefResult, OmittedStory
+
+
+def make_result() -> DailyBriefResult:
+    return DailyBriefResult(
+        brief="# Daily Brief\n\nSome **news** from [HN](https://news.ycombinator.com).",
+        summaries=[
+            StorySummary(title="Story 1", url="https://example.com/1", text="Summary")
+        ],
+        sources=["https://example.com/1"],
+        omitted=[OmittedStory(id=2, title="Slow Story", reason="deadline")],
+    )
+
+
+def test_render_markdown_lists_omitted_stories():
+    """Test that markdown output appends the omitted stories."""
+    output = render(make_result(), "markdown")
+
+    assert output.startswith("# Daily Brief")
+    assert "## Omitted Stories\n\n- Slow Story (deadline)" in output
+
+
+def test_render_json_round_trips():
+    """Test that JSON output contains the full structured result."""
+    output = render(make_result(), "json")
+
+    data = json.loads(output)
+    assert data["summaries"][0]["title"] == "Story 1"
+    assert DailyBriefResult.model_validate_json(output) == make_result()
+
+
+def test_render_html():
+    """Test that HTML output converts the brief and lists sources."""
+    output = render(make_result(), "html")
+
+    assert "<h1>Daily Brief</h1>" in output
+    assert "<strong>news</strong>" in output
+    assert '<a href="https://news.ycombinator.com">HN</a>' in output
+    assert '<li><a href="https://example.com/1">' in output
+
+
+def test_markdown_to_html_escapes_and_lists():
+    """Test that raw HTML is escaped and list items are grouped."""
+    output = markdown_to_html("Intro <script>\n- one\n- two\n\nEnd")
+
+    assert output == (
+        "<p>Intro &lt;script&gt;</p>\n<ul><li>one</li><li>two</li></ul>\n<p>End</p>"
+    )
+
+
+def test_markdown_to_html_escapes_link_urls_once():
+    """Test that a URL with a query string is escaped once, not twice."""
+    output = markdown_to_html("See [Q&A](https://example.com/?a=1&b=<2>).")
+
+    assert output == (
+        '<p>See <a href="https://example.com/?a=1&amp;b=&lt;2&gt;">Q&amp;A</a>.</p>'
+    )
+
+
+def test_markdown_to_html_keeps_parentheses_in_urls():
+    """Test that a URL with balanced parentheses is linked in full."""
+    output = markdown_to_html(
+        "Read [the **article**](https://en.wikipedia.org/wiki/Rust_(language)) (wiki)"
+    )
+
+    assert output == (
+        '<p>Read <a href="https://en.wikipedia.org/wiki/Rust_(language)">'
+        "the <strong>article</strong></a> (wiki)</p>"
+    )
+
+
+def test_render_unknown_format():
+    """Test that an unknown format is rejected."""
+    with pytest.raises(ValueError):
+        render(make_result(), "pdf")
@@ -0,0 +1,106 @@
+# mypy: disable-error-code="no-untyped-def"
+import pytest
+
+from hnbrief.clients.hackernews import HackerNewsStory
+from hnbrief.ranking import (
+    StoryFilter,
+    canonical_url,
+    domain_matches,
+    select_stories,
+    story_domain,
+)
+
+NOW = 1_700_000_000
+
+
+def make_story(story_id: int, **kwargs) -> HackerNewsStory:
+    """Build a story posted one hour before NOW unless overridden."""
+    fields = {
+        "id": story_id,
+        "type": "story",
+        "title": f"Story {story_id}",
+        "url": f"https://example.com/{story_id}",
+        "by": "user",
+        "time": NOW - 3600,
+        "score": 100,
+        "descendants": 10,
+    }
+    fields.update(kwargs)
+    return HackerNewsStory.model_validate(fields)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.Example.com/post/", "https://example.com/post"),
+        ("http://example.com/post", "https://example.com/post"),
+        ("https://example.com/post#comments", "https://example.com/post"),
+        (
+            "https://example.com/post?utm_source=hn&id=1",
+            "https://example.com/post?id=1",
+        ),
+        ("https://example.com/?b=2&a=1", "https://example.com/?a=1&b=2"),
+    ],
+)
+def test_canonical_url(url: str, expected: str):
+    """Test that URL variants of the same article normalize identically."""
+    assert canonical_url(url) == expected
+
+
+def test_domain_matching():
+    """Test that domain patterns match exact hosts and their subdomains."""
+    assert story_domain("https://www.blog.example.com:8080/x") == "blog.example.com"
+    assert domain_matches("blog.example.com", ["example.com"])
+    assert domain_matches("example.com", ["www.example.com"])
+    assert not domain_matches("notexample.com", ["example.com"])
+
+
+def test_select_stories_filters_non_candidates():
+    """Test that jobs, link-less, dead and low-score stories are pruned."""
+    stories = [
+        make_story(1),
+        make_story(2, type="job"),
+        make_story(3, url=None),
+        make_story(4, dead=True),
+        make_story(5, score=3),
+        make_story(6, descendants=0),
+        make_story(7, time=NOW - 72 * 3600),
+    ]
+    story_filter = StoryFilter(min_score=10, min_comments=1, max_age_hours=48)
+
+    selected = select_stories(stories, story_filter, now=NOW, limit=10)
+
+    assert [story.id for story in selected] == [1]
+
+
+def test_select_stories_domain_lists():
+    """Test blocked and allowed domain lists."""
+    stories = [
+        make_story(1, url="https://blocked.com/a"),
+        make_story(2, url="https://news.allowed.org/b"),
+        make_story(3, url="https://other.net/c"),
+    ]
+
+    blocked = select_stories(
+        stories, StoryFilter(blocked_domains=["blocked.com"]), now=NOW, limit=10
+    )
+    allowed = select_stories(
+        stories, StoryFilter(allowed_domains=["allowed.org"]), now=NOW, limit=10
+    )
+
+    assert [story.id for story in blocked] == [2, 3]
+    assert [story.id for story in allowed] == [2]
+
+
+def test_select_stories_ranks_and_dedups():
+    """Test that stories are ranked and duplicate URLs keep the best entry."""
+    stories = [
+        make_story(1, score=50),
+        make_story(2, score=300, url="https://example.com/dup?utm_source=x"),
+        make_story(3, score=200, url="https://www.example.com/dup/"),
+        make_story(4, score=120, time=NOW - 20 * 3600),
+    ]
+
+    selected = select_stories(stories, StoryFilter(), now=NOW, limit=2)
+
+    assert [story.id for story in selected] == [2, 1]
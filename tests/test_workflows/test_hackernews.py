@@ -1,11 +1,50 @@
 # mypy: disable-error-code="no-untyped-def"
+import asyncio
+import dataclasses
+import os
 import pytest
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 from unittest import mock
 
+from temporalio import activity, workflow
+from temporalio.common import Priority
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import ActivityEnvironment, WorkflowEnvironment
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner
+
+from hnbrief.clients.artifacts import ArtifactStore
+from hnbrief.clients.fetchers import StoryContent
 from hnbrief.clients.hackernews import HackerNewsClient, HackerNewsStory
-from hnbrief.clients.openai import OpenAIClient, StorySummary
+from hnbrief.clients.openai import (
+    DailyBrief,
+    OpenAIClient,
+    StorySummary,
+    TokenUsage,
+)
+from hnbrief.activities.artifacts import ArtifactActivities
+from hnbrief.activities.clustering import ClusteringActivities
+from hnbrief.activities.deadline import DEADLINE_MARGIN, HEARTBEAT_INTERVAL
 from hnbrief.activities.hackernews import HackerNewsActivities
 from hnbrief.activities.openai import OpenAIActivities
+from hnbrief.config import WorkerConfig
+from hnbrief.worker import create_workers
+from hnbrief.workflows.hackernews import (
+    BriefCheckpoint,
+    BriefOptions,
+    BriefProgress,
+    ContentSource,
+    DailyBriefResult,
+    HackerNewsDailyBrief,
+    HackerNewsMultiBrief,
+    HackerNewsStoryBatch,
+    StageProgress,
+    build_report,
+    story_priority,
+)
 
 
 @pytest.mark.asyncio
@@ -42,6 +81,27 @@ async def test_hackernews_activities_get_story_detail():
     hn_client.get_story_detail.assert_called_once_with(123)
 
 
+@pytest.mark.asyncio
+async def test_hackernews_activities_get_story_details():
+    """Test the get_story_details activity."""
+    hn_client = mock.Mock(spec=HackerNewsClient)
+    expected_story = HackerNewsStory(
+        id=123,
+        type="story",
+        title="Test Story",
+        url="https://example.com",
+        by="testuser",
+        time=1234567890,
+    )
+    hn_client.get_story_details.return_value = [expected_story]
+
+    activities = HackerNewsActivities(hn_client)
+    result = await activities.get_story_details([123, 124])
+
+    assert result == [expected_story]
+    hn_client.get_story_details.assert_called_once_with([123, 124])
+
+
 @pytest.mark.asyncio
 async def test_hackernews_activities_get_story_markdown():
     """Test the get_story_markdown activity."""
@@ -63,6 +123,36 @@ async def test_hackernews_activities_get_story_markdown():
     hn_client.get_story_markdown.assert_called_once_with(story)
 
 
+@pytest.mark.asyncio
+async def test_hackernews_activities_get_story_comments():
+    """Test the get_story_comments activity."""
+    hn_client = mock.Mock(spec=HackerNewsClient)
+    story = HackerNewsStory(
+        id=123, type="story", title="Test Story", by="testuser", time=1234567890
+    )
+    hn_client.get_top_comments.return_value = ["alice: Nice work"]
+
+    activities = HackerNewsActivities(hn_client)
+    result = await activities.get_story_comments(story)
+
+    assert result == ["alice: Nice work"]
+    hn_client.get_top_comments.assert_called_once_with(story)
+
+
+def activity_environment(start_to_close: timedelta) -> ActivityEnvironment:
+    """Activity environment for an attempt that has just started."""
+    env = ActivityEnvironment()
+    now = datetime.now(timezone.utc)
+    env.info = dataclasses.replace(
+        env.info,
+        scheduled_time=now,
+        started_time=now,
+        start_to_close_timeout=start_to_close,
+        schedule_to_close_timeout=None,
+    )
+    return env
+
+
 @pytest.mark.asyncio
 async def test_openai_activities_summarize_story():
     """Test the summarize_story activity."""
@@ -84,19 +174,49 @@ async def test_openai_activities_summarize_story():
         time=1234567890,
     )
 
-    result = await activities.summarize_story(story, "markdown content")
+    env = activity_environment(timedelta(seconds=60))
+    result = await env.run(activities.summarize_story, story, "markdown content")
 
     assert result == expected_summary
     openai_client.summarize_story.assert_called_once_with(
-        "Test Story", "https://example.com", "markdown content"
+        "Test Story", "https://example.com", "markdown content", None, mock.ANY
     )
+    # The client gets the attempt's remaining time, less the margin
+    time_left = openai_client.summarize_story.call_args.args[4]
+    assert 58 - DEADLINE_MARGIN < time_left <= 60 - DEADLINE_MARGIN
+
+
+@pytest.mark.asyncio
+async def test_story_activities_heartbeat_while_running():
+    """Test that a long summary heartbeats, so cancellation can reach it."""
+    openai_client = mock.Mock(spec=OpenAIClient)
+
+    async def slow_summary(*args):
+        await asyncio.sleep(0.05)
+        return StorySummary(title="Test Story", url=None, text="Summary.")
+
+    openai_client.summarize_story.side_effect = slow_summary
+    activities = OpenAIActivities(openai_client)
+    story = HackerNewsStory(id=1, type="story", title="Test Story", by="u", time=1)
+    env = activity_environment(timedelta(seconds=60))
+    heartbeats = []
+    env.on_heartbeat = lambda *details: heartbeats.append(details)
+
+    with mock.patch(
+        "hnbrief.activities.deadline.HEARTBEAT_INTERVAL", HEARTBEAT_INTERVAL / 500
+    ):
+        await env.run(activities.summarize_story, story, "markdown content")
+
+    assert len(heartbeats) >= 2
 
 
 @pytest.mark.asyncio
 async def test_openai_activities_create_daily_brief():
     """Test the create_daily_brief activity."""
     openai_client = mock.Mock(spec=OpenAIClient)
-    openai_client.create_daily_brief.return_value = "Daily brief content"
+    openai_client.create_daily_brief.return_value = DailyBrief(
+        text="Daily brief content"
+    )
 
     activities = OpenAIActivities(openai_client)
     summaries = [
@@ -104,10 +224,84 @@ async def test_openai_activities_create_daily_brief():
         StorySummary(title="Story 2", url="https://example.com/2", text="Summary 2"),
     ]
 
-    result = await activities.create_daily_brief(summaries)
+    env = activity_environment(timedelta(seconds=60))
+    result = await env.run(activities.create_daily_brief, summaries)
+
+    assert result.text == "Daily brief content"
+    openai_client.create_daily_brief.assert_called_once_with(
+        summaries, None, None, None, None, mock.ANY
+    )
+
+
+@pytest.mark.asyncio
+async def test_openai_activities_keep_text_in_the_artifact_store(tmp_path):
+    """Test that summaries and briefs cross history as references only."""
+    store = ArtifactStore(tmp_path)
+    openai_client = mock.Mock(spec=OpenAIClient)
+    openai_client.summarize_story.return_value = StorySummary(
+        title="Test Story", url="https://example.com", text="Summary text."
+    )
+    openai_client.create_daily_brief.return_value = DailyBrief(text="Brief text.")
+    activities = OpenAIActivities(openai_client, store)
+    story = HackerNewsStory(id=123, type="story", title="Test Story", by="u", time=1)
+    env = activity_environment(timedelta(seconds=60))
+
+    summary = await env.run(activities.summarize_story, story, "markdown content")
+    brief = await env.run(activities.create_daily_brief, [summary])
+
+    assert summary.text == "" and summary.artifact is not None
+    assert store.load(summary.artifact) == "Summary text."
+    # The client is given the stored text back
+    sent = openai_client.create_daily_brief.call_args.args[0]
+    assert [s.text for s in sent] == ["Summary text."]
+    assert brief.text == "" and brief.artifact is not None
+    assert store.load(brief.artifact) == "Brief text."
+
+
+@pytest.mark.asyncio
+async def test_cluster_activity_reads_stored_summaries(tmp_path):
+    """Test that clustering reads stored text and returns the references."""
+    store = ArtifactStore(tmp_path)
+    inline = [
+        StorySummary(title="Rust 2.0", url=None, text="The Rust compiler ships."),
+        StorySummary(title="Rust 2.0 out", url=None, text="The Rust compiler ships."),
+        StorySummary(title="Sourdough", url=None, text="Baking bread at home."),
+    ]
+    summaries = [
+        dataclasses.replace(
+            summary, text="", artifact=store.save(f"{index}.md", summary.text)
+        )
+        for index, summary in enumerate(inline)
+    ]
+
+    clusters = await ClusteringActivities(store).cluster_summaries(summaries, 0.2, 0.5)
+    expected = await ClusteringActivities().cluster_summaries(inline, 0.2, 0.5)
+
+    assert [[s.title for s in c.summaries] for c in clusters] == [
+        [s.title for s in c.summaries] for c in expected
+    ]
+    assert all(s in summaries for c in clusters for s in c.summaries)
+
+
+@pytest.mark.asyncio
+async def test_store_result_fills_in_texts_and_stores_large_results(tmp_path):
+    """Test that a result is completed inline when small and stored when large."""
+    store = ArtifactStore(tmp_path)
+    summary = StorySummary(
+        title="Story", url=None, text="", artifact=store.save("s.md", "Summary.")
+    )
+    brief = DailyBrief(text="", artifact=store.save("b.md", "Brief."))
+    result = DailyBriefResult(brief="", summaries=[summary])
+    activities = ArtifactActivities(store)
 
-    assert result == "Daily brief content"
-    openai_client.create_daily_brief.assert_called_once_with(summaries)
+    small = await activities.store_result("run.json", result, brief, 10_000)
+    large = await activities.store_result("run.json", result, brief, 10)
+
+    assert small.brief == "Brief."
+    assert small.summaries == [StorySummary(title="Story", url=None, text="Summary.")]
+    assert large.brief == "" and large.summaries == []
+    assert large.artifact is not None
+    assert DailyBriefResult.model_validate_json(store.load(large.artifact)) == small
 
 
 def test_workflow_execution_order_logic():
@@ -174,3 +368,310 @@ def test_workflow_max_stories_validation():
         else:
             result = input_val
         assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_brief_checkpoint_round_trips_through_converter():
+    """Test that continue-as-new state survives Temporal's payload encoding."""
+    story = HackerNewsStory(
+        id=7, type="story", title="Story 7", url="https://example.com/7", by="u", time=1
+    )
+    started = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    checkpoint = BriefCheckpoint(
+        stories=[story],
+        summaries={7: StorySummary(title="Story 7", url=story.url, text="Summary")},
+        content_sources=[ContentSource(story_id=7, strategy="direct", size_bytes=10)],
+        progress=BriefProgress(summaries=StageProgress(done=1, total=1)),
+        started_at=started,
+        stories_started=started,
+    )
+
+    payloads = await pydantic_data_converter.encode([checkpoint])
+    decoded = await pydantic_data_converter.decode(payloads, [BriefCheckpoint])
+
+    assert decoded == [checkpoint]
+    assert list(decoded[0].summaries) == [7]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "workflow_class",
+    [HackerNewsDailyBrief, HackerNewsMultiBrief, HackerNewsStoryBatch],
+)
+async def test_workflows_load_in_sandbox(workflow_class):
+    """Test that the workflow modules import cleanly in the worker's sandbox."""
+    definition = workflow._Definition.from_class(workflow_class)
+    assert definition is not None
+    SandboxedWorkflowRunner().prepare_workflow(definition)
+
+
+def test_build_report_prices_models_and_counts_cache_savings():
+    """Test that the run report totals usage per model and cached fetches."""
+    usages = [
+        TokenUsage(1000, 100, "cheap", 1.5),
+        TokenUsage(3000, 300, "cheap", 2.5),
+        TokenUsage(500, 50, "unknown", 1.0),
+        # A failed summary
+        TokenUsage(),
+    ]
+    sources = [
+        ContentSource(story_id=1, strategy="direct", size_bytes=2048, seconds=0.5),
+        ContentSource(
+            story_id=2, strategy="pdf", size_bytes=4096, seconds=2.0, cached=True
+        ),
+    ]
+
+    report = build_report(usages, sources, {"cheap": (1.0, 2.0)})
+
+    cheap = report.models["cheap"]
+    assert (cheap.calls, cheap.prompt_tokens, cheap.completion_tokens) == (
+        2,
+        4000,
+        400,
+    )
+    assert cheap.seconds == 4.0
+    assert cheap.cost == pytest.approx(0.0048)
+    assert report.models["unknown"].cost is None
+    assert report.cost == pytest.approx(0.0048)
+    assert report.unpriced_models == ["unknown"]
+    assert (report.fetches.articles, report.fetches.size_bytes) == (1, 2048)
+    assert report.fetches.cached_articles == 1
+    assert report.fetches.cached_bytes == 4096
+    assert report.fetches.cached_seconds == 2.0
+
+
+def test_story_priority_bands_ranks_best_first():
+    """Test that ranked stories map to priority keys in doubling bands."""
+    keys = [story_priority(rank, 5).priority_key for rank in range(20)]
+
+    assert keys == [1, 2, 2, 3, 3, 3, 3] + [4] * 8 + [5] * 5
+    assert story_priority(0, 1) == Priority.default
+
+
+# Stories in the batching test, ranked in ID order
+BATCH_TEST_STORIES = 12
+
+
+@activity.defn(name="get_list_of_stories")
+async def list_stand_in() -> list[int]:
+    return list(range(1, BATCH_TEST_STORIES + 1))
+
+
+@activity.defn(name="get_story_details")
+async def details_stand_in(ids: list[int]) -> list[HackerNewsStory]:
+    return [
+        HackerNewsStory(
+            id=story_id,
+            type="story",
+            title=f"Story {story_id}",
+            url=f"https://example.com/{story_id}",
+            by="u",
+            time=int(datetime.now(timezone.utc).timestamp()),
+            score=100 - story_id,
+        )
+        for story_id in ids
+    ]
+
+
+@activity.defn(name="get_story_content")
+async def content_stand_in(story: HackerNewsStory) -> StoryContent:
+    return StoryContent(f"Article {story.id}", "direct", 9, 0.1)
+
+
+@activity.defn(name="get_story_comments")
+async def comments_stand_in(story: HackerNewsStory) -> list[str]:
+    return []
+
+
+@activity.defn(name="summarize_story")
+async def summarize_stand_in(story: HackerNewsStory, markdown: str) -> StorySummary:
+    return StorySummary(title=story.title, url=story.url, text=f"About {markdown}")
+
+
+@activity.defn(name="create_daily_brief")
+async def brief_stand_in(summaries: list[StorySummary]) -> DailyBrief:
+    return DailyBrief(" ".join(summary.title for summary in summaries))
+
+
+async def start_test_server() -> WorkflowEnvironment:
+    """Start the time-skipping Temporal test server.
+
+    The server is downloaded on first use. Without network access the test
+    is skipped locally, but CI (which sets CI) must be able to run it.
+    """
+    try:
+        return await WorkflowEnvironment.start_time_skipping(
+            data_converter=pydantic_data_converter
+        )
+    except RuntimeError as e:
+        if os.environ.get("CI"):
+            raise
+        pytest.skip(f"Temporal test server unavailable: {e}")
+
+
+@pytest.mark.asyncio
+async def test_batched_brief_continues_as_new_and_matches_unbatched():
+    """Test that story batches and continue-as-new give the unbatched result."""
+    env = await start_test_server()
+
+    task_queue = f"test-batches-{uuid.uuid4().hex}"
+    results = {}
+    continued = {}
+    async with env, AsyncExitStack() as stack:
+        workers = create_workers(
+            env.client,
+            task_queue,
+            WorkerConfig.model_validate({}),
+            workflows=[HackerNewsDailyBrief, HackerNewsStoryBatch],
+            activities=[list_stand_in, details_stand_in, brief_stand_in],
+            dedicated={
+                "get_story_content": content_stand_in,
+                "get_story_comments": comments_stand_in,
+                "summarize_story": summarize_stand_in,
+            },
+        )
+        for worker in workers:
+            await stack.enter_async_context(worker)
+        # The batched run has waves of two batches of 3 stories, and its
+        # history is always over the limit, so it continues as new after each
+        for name, batches in (
+            ("unbatched", {}),
+            (
+                "batched",
+                {
+                    "story_batch_size": 3,
+                    "batch_concurrency": 2,
+                    "history_size_limit": 1,
+                },
+            ),
+        ):
+            options = BriefOptions(overfetch_factor=1.0, cluster_stories=False)
+            handle = await env.client.start_workflow(
+                HackerNewsDailyBrief.run,
+                args=[BATCH_TEST_STORIES, options.model_copy(update=batches)],
+                id=f"test-{name}-{uuid.uuid4().hex}",
+                task_queue=task_queue,
+            )
+            results[name] = await handle.result()
+            latest = await env.client.get_workflow_handle(handle.id).describe()
+            continued[name] = latest.run_id != handle.result_run_id
+
+    unbatched, batched = results["unbatched"], results["batched"]
+    assert continued == {"unbatched": False, "batched": True}
+    assert len(batched.summaries) == BATCH_TEST_STORIES
+    assert batched.brief == unbatched.brief
+    assert batched.summaries == unbatched.summaries
+    assert batched.sources == unbatched.sources
+    assert batched.omitted == unbatched.omitted == []
+    assert batched.content_sources == unbatched.content_sources
+
+
+@activity.defn(name="get_story_content")
+async def stalled_content_stand_in(story: HackerNewsStory) -> StoryContent:
+    if story.id == 4:
+        # Runs until the deadline cancels it
+        while True:
+            activity.heartbeat()
+            await asyncio.sleep(0.1)
+    return await content_stand_in(story)
+
+
+@activity.defn(name="summarize_story")
+async def failing_summarize_stand_in(
+    story: HackerNewsStory, markdown: str
+) -> StorySummary:
+    if story.id == 2:
+        raise ApplicationError("model refused the story", non_retryable=True)
+    return await summarize_stand_in(story, markdown)
+
+
+async def run_daily_brief(
+    env: WorkflowEnvironment,
+    max_stories: int,
+    options: BriefOptions,
+    **dedicated: Callable[..., Any],
+) -> DailyBriefResult:
+    """Run a daily brief on stand-in activities, replacing the given ones."""
+    task_queue = f"test-brief-{uuid.uuid4().hex}"
+    async with AsyncExitStack() as stack:
+        workers = create_workers(
+            env.client,
+            task_queue,
+            WorkerConfig.model_validate({}),
+            workflows=[HackerNewsDailyBrief, HackerNewsStoryBatch],
+            activities=[list_stand_in, details_stand_in, brief_stand_in],
+            dedicated={
+                "get_story_content": content_stand_in,
+                "get_story_comments": comments_stand_in,
+                "summarize_story": summarize_stand_in,
+                **dedicated,
+            },
+        )
+        for worker in workers:
+            await stack.enter_async_context(worker)
+        return await env.client.execute_workflow(
+            HackerNewsDailyBrief.run,
+            args=[max_stories, options],
+            id=f"test-brief-{uuid.uuid4().hex}",
+            task_queue=task_queue,
+        )
+
+
+@pytest.mark.asyncio
+async def test_failed_and_stalled_stories_are_omitted():
+    """Test that a failing story and one stuck past the deadline are left out."""
+    env = await start_test_server()
+    options = BriefOptions(
+        overfetch_factor=1.0, cluster_stories=False, deadline_seconds=1.0
+    )
+    async with env:
+        result = await run_daily_brief(
+            env,
+            4,
+            options,
+            get_story_content=stalled_content_stand_in,
+            summarize_story=failing_summarize_stand_in,
+        )
+
+    assert [summary.title for summary in result.summaries] == ["Story 1", "Story 3"]
+    assert [(story.id, story.reason) for story in result.omitted] == [
+        (2, "error"),
+        (4, "deadline"),
+    ]
+
+
+@activity.defn(name="summarize_story")
+async def slow_top_summarize_stand_in(
+    story: HackerNewsStory, markdown: str
+) -> StorySummary:
+    if story.id == 1:
+        # Still running when the deadline passes
+        await asyncio.sleep(2)
+    return await summarize_stand_in(story, markdown)
+
+
+@pytest.mark.asyncio
+async def test_guaranteed_story_running_at_deadline_is_kept():
+    """Test that the top story is waited for past the deadline, unlike the rest."""
+    env = await start_test_server()
+    options = BriefOptions(
+        overfetch_factor=1.0,
+        cluster_stories=False,
+        deadline_seconds=1.0,
+        guaranteed_stories=1,
+    )
+    async with env:
+        result = await run_daily_brief(
+            env,
+            4,
+            options,
+            get_story_content=stalled_content_stand_in,
+            summarize_story=slow_top_summarize_stand_in,
+        )
+
+    assert [summary.title for summary in result.summaries] == [
+        "Story 1",
+        "Story 2",
+        "Story 3",
+    ]
+    assert [(story.id, story.reason) for story in result.omitted] == [(4, "deadline")]